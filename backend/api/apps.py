@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api import checks  # noqa: F401
+        from core.db import connect_health_checks
+
+        connect_health_checks()
+        if settings.WARMUP_ON_READY:
+            from api.warmup import warm_up
+
+            warm_up(data=False)
+        if settings.THROTTLE_SYNC_ON_READY:
+            from api.throttling import TokenBucketThrottle
+
+            TokenBucketThrottle.start_sync()
@@ -0,0 +1,185 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core.compression import precompress, set_precompressed_content
+from core.constants import CACHE_LOCK_POLL_INTERVAL, RESPONSE_CACHE_TIMEOUT
+from core.singleflight import SingleFlight
+from recipes.caches import (
+    acquire_cache_lock,
+    cache_versions,
+    release_cache_lock,
+)
+
+single_flight = SingleFlight()
+
+# Кеши, которые другие воркеры не видят
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+def get_lock_timeout():
+    """
+    Время блокировки пересчета ключа между воркерами. С кешем в памяти
+    процесса воркеры не видят записей, сохраненных держателем
+    блокировки, и только ждали бы ее истечения, поэтому блокировка
+    не используется (см. api.checks).
+    """
+    if settings.CACHES['default']['BACKEND'] in LOCAL_CACHE_BACKENDS:
+        return 0
+    return settings.RESPONSE_CACHE_LOCK_SECONDS
+
+
+def make_cache_key(prefix, request, *parts):
+    """
+    Ключ кеша ответа: адрес, выбранный при согласовании формат ответа
+    (а не заголовок Accept, который у клиентов записан по-разному)
+    и дополнительные части.
+    """
+    signature = repr(
+        (request.get_full_path(), request.accepted_media_type) + parts
+    )
+    return f'{prefix}:{hashlib.sha1(signature.encode()).hexdigest()}'
+
+
+class CachedResponseMixin:
+    """
+    Кеш готовых ответов, хранящихся сразу в сжатом виде.
+
+    Обработчик вызывает get_cached_response() с ключом и версией
+    данных. Если в кеше есть запись этой версии и она не истекла, ответ
+    возвращается без сериализации. Иначе ответ строит только один поток
+    процесса (SingleFlight): он рендерится, сжимается во всех
+    кодированиях и сохраняется, поэтому сжатие выполняется один раз
+    на версию ответа. Остальные потоки в это время отдают устаревшую
+    запись не старше RESPONSE_CACHE_STALE_SECONDS или ждут результата.
+    С RESPONSE_CACHE_LOCK_SECONDS и общим для воркеров кешем пересчет
+    ключа между воркерами дополнительно ограничивается блокировкой в
+    таблице CacheLock.
+    """
+
+    cached_entry = None
+
+    def get_cached_response(self, request, key, version, get_response):
+        entry = cache.get(key)
+        now = time.time()
+        stale = None
+        if entry is not None:
+            if entry['version'] == version and now < entry['expires_at']:
+                return self.get_entry_response(entry)
+            if (
+                now - entry['expires_at']
+                < settings.RESPONSE_CACHE_STALE_SECONDS
+            ):
+                stale = entry
+        # Другим потокам SingleFlight передает только запись кеша, ответ
+        # DRF остается у потока, который его построил.
+        responses = []
+
+        def compute():
+            entry, response = self.compute_entry(
+                request, key, version, get_response, stale
+            )
+            responses.append(response)
+            return entry
+
+        entry = single_flight.run(key, compute, stale=stale)
+        if entry is not None:
+            return self.get_entry_response(entry)
+        # Ответ не кешируется (например, 404): построивший его поток
+        # отдает свой ответ, остальные потоки строят собственный.
+        if responses and responses[0] is not None:
+            return responses[0]
+        return get_response()
+
+    def compute_entry(self, request, key, version, get_response, stale):
+        """Строит и сохраняет запись кеша, возвращает (запись, ответ)."""
+        lock_timeout = get_lock_timeout()
+        locked = bool(lock_timeout) and acquire_cache_lock(key, lock_timeout)
+        if lock_timeout and not locked:
+            if stale is not None:
+                return stale, None
+            entry = self.wait_for_entry(key, version, lock_timeout)
+            if entry is not None:
+                return entry, None
+        try:
+            response = get_response()
+            if response.status_code != 200:
+                return None, response
+            response = super().finalize_response(request, response)
+            response.render()
+            content_type = response['Content-Type']
+            entry = {
+                'version': version,
+                'expires_at': time.time() + RESPONSE_CACHE_TIMEOUT,
+                'content_type': content_type,
+                'bodies': precompress(content_type, response.content),
+            }
+            cache.set(
+                key,
+                entry,
+                RESPONSE_CACHE_TIMEOUT + settings.RESPONSE_CACHE_STALE_SECONDS,
+            )
+            return entry, None
+        finally:
+            if locked:
+                release_cache_lock(key)
+
+    def wait_for_entry(self, key, version, timeout):
+        """Ждет, пока другой воркер сохранит запись нужной версии."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(CACHE_LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None and entry['version'] == version:
+                return entry
+        return None
+
+    def get_entry_response(self, entry):
+        self.cached_entry = entry
+        return HttpResponse(content_type=entry['content_type'])
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self.cached_entry is None or response.status_code != 200:
+            return response
+        return set_precompressed_content(
+            request, response, self.cached_entry['bodies']
+        )
+
+
+class ReferenceCacheMixin(CachedResponseMixin):
+    """
+    Кеш ответов справочников (теги, ингредиенты). Версия записи -
+    версия справочника cache_version (CacheVersion), поэтому любое
+    изменение записей сбрасывает кеш во всех воркерах.
+    """
+
+    cache_version = None
+
+    def get_reference_response(self, request, get_response):
+        return self.get_cached_response(
+            request,
+            make_cache_key(self.basename, request, self.action, self.kwargs),
+            cache_versions.get(self.cache_version),
+            get_response,
+        )
+
+    def list(self, request, *args, **kwargs):
+        parent = super()
+        return self.get_reference_response(
+            request, lambda: parent.list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        parent = super()
+        return self.get_reference_response(
+            request, lambda: parent.retrieve(request, *args, **kwargs)
+        )
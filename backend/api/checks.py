@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from api.caching import get_lock_timeout
+
+
+@register(Tags.caches)
+def check_response_cache_lock(app_configs, **kwargs):
+    """Блокировка пересчета ответов бесполезна с кешем процесса."""
+    if settings.RESPONSE_CACHE_LOCK_SECONDS and not get_lock_timeout():
+        return [
+            Warning(
+                'RESPONSE_CACHE_LOCK_SECONDS is ignored: the default cache '
+                'is local to each process.',
+                hint='Set CACHE_BACKEND and CACHE_LOCATION to a cache '
+                'shared by all workers (memcached, Redis).',
+                id='api.W001',
+            )
+        ]
+    return []
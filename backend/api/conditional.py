@@ -0,0 +1,140 @@
+import hashlib
+
+from django.db.models import Subquery
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from recipes.models import Ingredient, Tag
+
+
+def latest_updated_at(model):
+    """Подзапрос с датой последнего изменения объектов модели."""
+    return Subquery(
+        model.objects.order_by('-updated_at').values('updated_at')[:1]
+    )
+
+
+class ConditionalGetMixin:
+    """
+    Поддержка условных GET-запросов (If-None-Match, If-Modified-Since)
+    для списка и детального просмотра рецептов.
+
+    Валидаторы вычисляются легкими запросами без сериализации ответа:
+    id и даты изменения рецептов страницы, даты изменения их авторов,
+    тегов и ингредиентов, а также версия избранного, списка покупок
+    и подписок текущего пользователя (CustomUser.state_version),
+    поэтому ETag у разных пользователей различается.
+    """
+
+    def get_viewer_signature(self, request):
+        user = request.user
+        if user.is_anonymous:
+            return ('anonymous',)
+        return (user.pk, user.state_version)
+
+    def make_etag(self, request, *parts):
+        signature = repr(
+            (
+                request.get_host(),
+                request.get_full_path(),
+                request.META.get('HTTP_ACCEPT', ''),
+                self.get_viewer_signature(request),
+            )
+            + parts
+        )
+        return quote_etag(hashlib.sha1(signature.encode()).hexdigest())
+
+    def get_list_etag(self, request):
+        """
+        ETag страницы списка: число рецептов под фильтром и версии
+        рецептов страницы. Если номер страницы некорректен, возвращает
+        None, и ошибку формирует обычная пагинация.
+        """
+        paginator = self.paginator
+        page_size = paginator.get_page_size(request)
+        try:
+            page_number = int(
+                request.query_params.get(paginator.page_query_param, 1)
+            )
+        except ValueError:
+            return None
+        if page_size is None or page_number < 1:
+            return None
+
+        queryset = self.filter_queryset(super().get_queryset())
+        offset = (page_number - 1) * page_size
+        rows = list(
+            queryset.annotate(
+                tags_updated_at=latest_updated_at(Tag),
+                ingredients_updated_at=latest_updated_at(Ingredient),
+            ).values_list(
+                'id',
+                'updated_at',
+                'author__updated_at',
+                'tags_updated_at',
+                'ingredients_updated_at',
+            )[offset: offset + page_size]
+        )
+        return self.make_etag(request, queryset.count(), rows)
+
+    def get_detail_validators(self, request):
+        """ETag и дата изменения одного рецепта с учетом зрителя."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            queryset = super().get_queryset().filter(**lookup)
+        except (TypeError, ValueError):
+            return None, None
+        row = (
+            queryset.with_user_flags(request.user)
+            .annotate(
+                tags_updated_at=latest_updated_at(Tag),
+                ingredients_updated_at=latest_updated_at(Ingredient),
+            )
+            .values_list(
+                'updated_at',
+                'author__updated_at',
+                'tags_updated_at',
+                'ingredients_updated_at',
+                'is_favorited',
+                'is_in_shopping_cart',
+                'author_is_subscribed',
+            )
+            .first()
+        )
+        if row is None:
+            return None, None
+        last_modified = max(value for value in row[:4] if value is not None)
+        return self.make_etag(request, row), last_modified
+
+    def conditional_response(self, request, etag, last_modified=None):
+        """Возвращает 304, если у клиента актуальная версия ответа."""
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=(
+                int(last_modified.timestamp())
+                if last_modified and request.user.is_anonymous
+                else None
+            ),
+        )
+        if response is not None:
+            self.set_validators(request, response, etag, last_modified)
+        return response
+
+    def set_validators(self, request, response, etag, last_modified=None):
+        response['ETag'] = etag
+        # Last-Modified не учитывает состояние зрителя и удаления из
+        # списка, поэтому отдается только анонимам и только для рецепта.
+        if last_modified is not None and request.user.is_anonymous:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        patch_vary_headers(response, ('Accept', 'Authorization', 'Cookie'))
+        if request.user.is_authenticated:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+        return response
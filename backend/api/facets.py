@@ -0,0 +1,108 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q
+from rest_framework.exceptions import ValidationError
+
+from core.constants import COOKING_TIME_BUCKETS, FACETS_CACHE_TIMEOUT
+from recipes.caches import cache_versions, tag_slug_cache
+from recipes.models import CacheVersion, Recipe
+
+FACET_TAGS = 'tags'
+FACET_COOKING_TIME = 'cooking_time'
+FACETS = (FACET_TAGS, FACET_COOKING_TIME)
+
+# Параметры, которые не влияют на фасеты.
+IGNORED_PARAMS = ('page', 'limit', 'facets')
+
+
+def parse_facets(request):
+    """Разбирает параметр ?facets=tags,cooking_time."""
+    value = request.query_params.get('facets')
+    if not value:
+        return []
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = set(names) - set(FACETS)
+    if unknown:
+        raise ValidationError(
+            {'facets': f'Неизвестные фасеты: {", ".join(sorted(unknown))}'}
+        )
+    return names
+
+
+def get_cache_key(request, names):
+    """
+    Ключ кеша по набору фильтров запроса и версиям рецептов и тегов:
+    после их изменения фасеты пересчитываются, не дожидаясь
+    FACETS_CACHE_TIMEOUT.
+    """
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        if key not in IGNORED_PARAMS
+        for value in values
+    )
+    versions = (
+        cache_versions.get(CacheVersion.RECIPES),
+        cache_versions.get(CacheVersion.TAGS),
+    )
+    signature = hashlib.sha1(
+        repr((names, params, versions)).encode()
+    ).hexdigest()
+    return f'recipe-facets:{signature}'
+
+
+def compute_facets(queryset, names):
+    """
+    Считает число рецептов по каждому тегу и интервалу времени
+    приготовления одним агрегирующим запросом с условными COUNT.
+    """
+    aggregates = {}
+    slug_to_id = tag_slug_cache.get_map()
+    if FACET_TAGS in names:
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk')
+        )
+        for slug, tag_id in slug_to_id.items():
+            aggregates[f'tag_{tag_id}'] = Count(
+                'pk', filter=Q(Exists(recipe_tags.filter(tag_id=tag_id)))
+            )
+    if FACET_COOKING_TIME in names:
+        for index, (label, low, high) in enumerate(COOKING_TIME_BUCKETS):
+            aggregates[f'bucket_{index}'] = Count(
+                'pk', filter=Q(cooking_time__gte=low, cooking_time__lte=high)
+            )
+    counts = queryset.order_by().aggregate(**aggregates) if aggregates else {}
+
+    facets = {}
+    if FACET_TAGS in names:
+        facets[FACET_TAGS] = [
+            {'id': tag_id, 'slug': slug, 'count': counts[f'tag_{tag_id}']}
+            for slug, tag_id in sorted(slug_to_id.items())
+        ]
+    if FACET_COOKING_TIME in names:
+        facets[FACET_COOKING_TIME] = [
+            {
+                'bucket': label,
+                'min': low,
+                'max': high,
+                'count': counts[f'bucket_{index}'],
+            }
+            for index, (label, low, high) in enumerate(COOKING_TIME_BUCKETS)
+        ]
+    return facets
+
+
+def get_recipe_facets(request, queryset, names):
+    """
+    Возвращает фасеты для отфильтрованного queryset. Для анонимных
+    пользователей результат кешируется по набору фильтров.
+    """
+    if request.user.is_authenticated:
+        return compute_facets(queryset, names)
+    key = get_cache_key(request, names)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset, names)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
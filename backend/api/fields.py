@@ -0,0 +1,56 @@
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from core.constants import MAX_IMAGE_DIMENSION, MAX_IMAGE_SIZE
+
+
+class ImageUploadField(Base64ImageField):
+    """
+    Поле изображения, принимающее как строку base64 в JSON,
+    так и файл из multipart/form-data.
+
+    Размер проверяется до декодирования base64, а ширина, высота и формат -
+    по заголовку картинки, без декодирования пикселей.
+    """
+
+    TOO_LARGE_MESSAGE = (
+        f'Размер изображения не должен превышать '
+        f'{MAX_IMAGE_SIZE // 2**20} МБ.'
+    )
+    TOO_BIG_DIMENSIONS_MESSAGE = (
+        f'Ширина и высота изображения не должны превышать '
+        f'{MAX_IMAGE_DIMENSION} пикселей.'
+    )
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            if getattr(data, 'truncated', False) or data.size > MAX_IMAGE_SIZE:
+                raise ValidationError(self.TOO_LARGE_MESSAGE)
+            self.validate_image_header(data)
+            return serializers.ImageField.to_internal_value(self, data)
+
+        if isinstance(data, str) and len(data) * 3 // 4 > MAX_IMAGE_SIZE:
+            raise ValidationError(self.TOO_LARGE_MESSAGE)
+        image = super().to_internal_value(data)
+        if image is not None:
+            self.validate_image_header(image)
+        return image
+
+    def validate_image_header(self, file):
+        """Проверяет формат и размеры, читая только заголовок файла."""
+        file.seek(0)
+        try:
+            with Image.open(file) as image:
+                image_format = (image.format or '').lower()
+                width, height = image.size
+        except (OSError, Image.DecompressionBombError):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        finally:
+            file.seek(0)
+        if image_format not in self.ALLOWED_TYPES:
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+        if max(width, height) > MAX_IMAGE_DIMENSION:
+            raise ValidationError(self.TOO_BIG_DIMENSIONS_MESSAGE)
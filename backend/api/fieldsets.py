@@ -0,0 +1,74 @@
+from rest_framework.exceptions import ValidationError
+
+RECIPE_FIELDS = (
+    'id',
+    'tags',
+    'author',
+    'ingredients',
+    'is_favorited',
+    'is_in_shopping_cart',
+    'name',
+    'image',
+    'text',
+    'cooking_time',
+)
+RECIPE_EXPANDABLE_FIELDS = ('tags', 'author', 'ingredients')
+RECIPE_FLAGS = ('is_favorited', 'is_in_shopping_cart')
+
+
+def parse_names(request, param, allowed):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names - set(allowed)
+    if unknown:
+        raise ValidationError(
+            {param: f'Неизвестные поля: {", ".join(sorted(unknown))}'}
+        )
+    return names
+
+
+def parse_recipe_fieldset(request):
+    """
+    Разбирает параметры ?fields=id,name,image и ?expand=author,ingredients.
+
+    Без fields возвращает None: рецепт выводится целиком. Иначе
+    возвращает кортеж выбранных полей в порядке полного ответа и множество
+    раскрываемых вложенных объектов. Поле из expand выводится, даже если
+    его нет в fields.
+    """
+    fields = parse_names(request, 'fields', RECIPE_FIELDS)
+    expand = parse_names(request, 'expand', RECIPE_EXPANDABLE_FIELDS) or set()
+    if fields is None:
+        return None
+    fields |= expand
+    return (
+        tuple(name for name in RECIPE_FIELDS if name in fields),
+        frozenset(expand),
+    )
+
+
+def apply_recipe_fieldset(queryset, fieldset, user):
+    """
+    Загружает только связи и аннотации, нужные выбранным полям:
+    автор присоединяется только при раскрытии, ингредиенты без раскрытия
+    берутся из связующей таблицы без JOIN справочника, описание рецепта
+    не читается, если его нет в ответе.
+    """
+    fields, expand = fieldset
+    flags = [name for name in RECIPE_FLAGS if name in fields]
+    if 'author' in expand:
+        queryset = queryset.select_related('author')
+        flags.append('author_is_subscribed')
+    if 'tags' in fields:
+        queryset = queryset.prefetch_related('tags')
+    if 'ingredients' in fields:
+        queryset = queryset.prefetch_related(
+            'recipe_ingredients__ingredient'
+            if 'ingredients' in expand
+            else 'recipe_ingredients'
+        )
+    if 'text' not in fields:
+        queryset = queryset.defer('text')
+    return queryset.with_user_flags(user, flags)
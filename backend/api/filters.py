@@ -1,11 +1,30 @@
+from django import forms
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import (
     BooleanFilter,
     CharFilter,
+    ChoiceFilter,
+    Filter,
     FilterSet,
-    ModelMultipleChoiceFilter,
 )
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.caches import tag_slug_cache
+from recipes.models import Ingredient, Recipe
+
+TAGS_MODE_ANY = 'any'
+TAGS_MODE_ALL = 'all'
+ORDERING_TRENDING = 'trending'
+
+
+class MultipleValueField(forms.MultipleChoiceField):
+    """Список значений без проверки по заранее заданному набору."""
+
+    def valid_value(self, value):
+        return True
+
+
+class MultipleValueFilter(Filter):
+    field_class = MultipleValueField
 
 
 class IngredientFilter(FilterSet):
@@ -17,18 +36,49 @@ class IngredientFilter(FilterSet):
 
 
 class RecipeFilter(FilterSet):
-    tags = ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all(),
+    tags = MultipleValueFilter(method='filter_by_tags')
+    tags_mode = ChoiceFilter(
+        choices=((TAGS_MODE_ANY, 'any'), (TAGS_MODE_ALL, 'all')),
+        method='skip_filter',
     )
     is_favorited = BooleanFilter(method='filter_by_favorites')
     is_in_shopping_cart = BooleanFilter(method='filter_by_shopping_cart')
+    ordering = ChoiceFilter(
+        choices=((ORDERING_TRENDING, 'trending'),), method='order_by'
+    )
 
     class Meta:
         model = Recipe
         fields = ['tags', 'author', 'is_favorited', 'is_in_shopping_cart']
 
+    def skip_filter(self, queryset, name, value):
+        return queryset
+
+    def filter_by_tags(self, queryset, name, value):
+        """
+        Фильтрует рецепты по слагам тегов подзапросом EXISTS к связующей
+        таблице: в отличие от JOIN он не размножает строки рецептов.
+        По умолчанию рецепт должен иметь хотя бы один из тегов,
+        при tags_mode=all - все теги.
+        """
+        tag_ids = set(tag_slug_cache.get_ids(value))
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk')
+        )
+        if self.form.cleaned_data.get('tags_mode') == TAGS_MODE_ALL:
+            if len(tag_ids) < len(set(value)):
+                return queryset.none()
+            for tag_id in sorted(tag_ids):
+                queryset = queryset.filter(
+                    Exists(recipe_tags.filter(tag_id=tag_id))
+                )
+            return queryset
+        if not tag_ids:
+            return queryset.none()
+        return queryset.filter(
+            Exists(recipe_tags.filter(tag_id__in=sorted(tag_ids)))
+        )
+
     def filter_by_favorites(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
@@ -40,3 +90,12 @@ class RecipeFilter(FilterSet):
         if value and user.is_authenticated:
             return queryset.filter(shopping_cart__user=user)
         return queryset
+
+    def order_by(self, queryset, name, value):
+        """
+        ordering=trending: по убыванию trending_score, порядок
+        поддерживается индексом recipe_trending.
+        """
+        if value == ORDERING_TRENDING:
+            return queryset.order_by('-trending_score', '-id')
+        return queryset
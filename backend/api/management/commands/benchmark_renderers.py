@@ -0,0 +1,61 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import (
+    FastJSONRenderer,
+    MessagePackRenderer,
+    msgpack,
+    orjson,
+)
+from api.serializers import RecipeListSerializer
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Measure encode throughput of API renderers on recipe list output'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/api/recipes/')
+        request.user = AnonymousUser()
+        recipes = Recipe.objects.prefetch_related(
+            'tags', 'recipe_ingredients__ingredient'
+        ).select_related('author')[: options['limit']]
+        data = RecipeListSerializer(
+            recipes, many=True, context={'request': request}
+        ).data
+
+        if not data:
+            self.stdout.write(
+                self.style.WARNING('No recipes found in the database.')
+            )
+            return
+
+        renderers = [('stdlib json', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+        if msgpack is not None:
+            renderers.append(('msgpack', MessagePackRenderer()))
+
+        self.stdout.write(
+            f'Rendering {len(data)} recipes x {options["iterations"]} times'
+        )
+        baseline = None
+        for name, renderer in renderers:
+            start = time.perf_counter()
+            for _ in range(options['iterations']):
+                body = renderer.render(data)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f'{name:<12} {options["iterations"] / elapsed:>10.1f} ops/s '
+                f'{len(body) * options["iterations"] / elapsed / 2**20:>8.1f} '
+                f'MB/s  {len(body):>8} bytes  x{baseline / elapsed:.2f}'
+            )
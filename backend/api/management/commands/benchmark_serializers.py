@@ -0,0 +1,91 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import (
+    RecipeListSerializer,
+    RecipeReadSerializer,
+    SubscriptionReadSerializer,
+    SubscriptionSerializer,
+)
+from api.views import UserViewSet
+from recipes.models import Recipe
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that fast read serializers match the regular ones '
+        'and measure the speedup'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--user', help='Email of the viewer (anonymous by default)'
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/api/recipes/', {'recipes_limit': 3})
+        request.user = AnonymousUser()
+        if options['user']:
+            request.user = CustomUser.objects.get(email=options['user'])
+        context = {'request': request}
+
+        recipes = list(
+            Recipe.objects.with_related().with_user_flags(request.user)[
+                : options['limit']
+            ]
+        )
+        self.compare(
+            'recipes',
+            RecipeListSerializer,
+            RecipeReadSerializer,
+            recipes,
+            context,
+            options['iterations'],
+        )
+
+        if request.user.is_authenticated:
+            authors = list(
+                UserViewSet().get_subscriptions_queryset(request.user)[
+                    : options['limit']
+                ]
+            )
+            self.compare(
+                'subscriptions',
+                SubscriptionSerializer,
+                SubscriptionReadSerializer,
+                authors,
+                context,
+                options['iterations'],
+            )
+
+    def compare(self, label, regular, fast, objects, context, iterations):
+        renderer = JSONRenderer()
+        expected = renderer.render(
+            regular(objects, many=True, context=context).data
+        )
+        actual = renderer.render(
+            fast(objects, many=True, context=context).data
+        )
+        if expected != actual:
+            raise CommandError(f'{label}: fast serializer output differs')
+
+        timings = []
+        for serializer_class in (regular, fast):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                serializer_class(objects, many=True, context=context).data
+            timings.append((time.perf_counter() - start) / iterations)
+
+        self.stdout.write(
+            f'{label}: {len(objects)} objects, output identical; '
+            f'{regular.__name__} {timings[0] * 1000:.2f} ms, '
+            f'{fast.__name__} {timings[1] * 1000:.2f} ms, '
+            f'x{timings[0] / timings[1]:.1f}'
+        )
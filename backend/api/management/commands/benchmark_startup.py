@@ -0,0 +1,96 @@
+import json
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+FIRST_REQUEST_URLS = (
+    '/api/tags/',
+    '/api/ingredients/',
+    '/api/recipes/',
+    '/api/users/',
+)
+
+# Таймер запускается до импорта Django, чтобы учесть время импортов.
+PROBE = (
+    'import time; started = time.perf_counter(); '
+    'import django; django.setup(); '
+    'from api.management.commands.benchmark_startup import probe; '
+    'probe(started, {warm})'
+)
+
+
+def probe(started, warm):
+    """
+    Замеры в свежем процессе: запуск Django, прогрев и первый и второй
+    запросы к каждому адресу. Результат печатается в stdout в JSON.
+    """
+    result = {'setup': time.perf_counter() - started, 'warm_up': {}}
+    if warm:
+        from api.warmup import warm_up
+
+        result['warm_up'] = warm_up()
+    setup_test_environment()
+    client = Client()
+    for url in FIRST_REQUEST_URLS:
+        timings = []
+        for _ in range(2):
+            request_started = time.perf_counter()
+            client.get(url)
+            timings.append(time.perf_counter() - request_started)
+        result[url] = timings
+    print(json.dumps(result))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure process startup and first-request latency '
+        'with and without warm-up'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Fresh processes per variant, the median is reported',
+        )
+
+    def run_probe(self, warm):
+        process = subprocess.run(
+            [sys.executable, '-c', PROBE.format(warm=warm)],
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode:
+            raise CommandError(process.stderr)
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def median(self, values):
+        values = sorted(values)
+        return values[len(values) // 2]
+
+    def handle(self, *args, **options):
+        results = {
+            warm: [self.run_probe(warm) for _ in range(options['runs'])]
+            for warm in (False, True)
+        }
+        for warm, runs in results.items():
+            self.stdout.write('With warm-up:' if warm else 'Cold start:')
+            self.stdout.write(
+                f'  django.setup()  '
+                f'{self.median([run["setup"] for run in runs]) * 1000:8.1f} ms'
+            )
+            for step in runs[0]['warm_up']:
+                seconds = self.median([run['warm_up'][step] for run in runs])
+                self.stdout.write(f'  {step:<24} {seconds * 1000:8.1f} ms')
+            for url in FIRST_REQUEST_URLS:
+                first = self.median([run[url][0] for run in runs])
+                second = self.median([run[url][1] for run in runs])
+                self.stdout.write(
+                    f'  GET {url:<20} first {first * 1000:8.1f} ms, '
+                    f'then {second * 1000:6.1f} ms'
+                )
@@ -1,5 +1,22 @@
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 
 
 class CustomPaginator(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+def parse_recipes_limit(request):
+    """
+    Разбирает параметр ?recipes_limit=3 - сколько рецептов автора
+    выводить в подписках. Без параметра возвращает None: выводятся
+    все рецепты.
+    """
+    value = request.GET.get('recipes_limit')
+    if value is None:
+        return None
+    if not value.isdecimal():
+        raise ValidationError(
+            {'recipes_limit': 'Укажите целое неотрицательное число.'}
+        )
+    return int(value)
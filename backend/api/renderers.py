@@ -0,0 +1,70 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson
+    else 0
+)
+
+
+def default_encoder(obj):
+    """
+    Приводит типы, которые не умеют кодировать orjson и msgpack
+    (Decimal, даты, ленивые строки, QuerySet), к тем же значениям,
+    что и стандартный JSONEncoder DRF.
+    """
+    return JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson.
+
+    Если orjson не установлен или клиент запросил форматирование
+    с отступами, используется стандартный рендерер DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data, default=default_encoder, option=ORJSON_OPTIONS
+        )
+        # Как и в JSONRenderer, экранируем U+2028 и U+2029,
+        # чтобы ответ оставался корректным JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Рендерер в формат MessagePack (Accept: application/msgpack)."""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=default_encoder, use_bin_type=True)
@@ -1,8 +1,8 @@
 from django.forms import ValidationError
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
 
+from core.constants import MAX_BULK_FOLLOW
 from core.mixins import SubscriptionCheckMixin
 from core.validators import (
     max_amount_validator,
@@ -10,6 +10,7 @@ from core.validators import (
     min_amount_validator,
     min_cooking_time_validator,
 )
+from recipes.duplicates import update_recipe_signature
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -19,6 +20,8 @@ from recipes.models import (
     Tag,
 )
 from users.models import CustomUser, Follow
+from .fields import ImageUploadField
+from .pagination import parse_recipes_limit
 
 
 class CustomUserCreateSerializer(serializers.ModelSerializer):
@@ -66,17 +69,32 @@ class CustomUserSerializer(serializers.ModelSerializer):
     def get_is_subscribed(self, obj):
         """
         Проверяет, подписан ли текущий пользователь на данного автора.
+        Использует аннотацию is_subscribed, если queryset ее добавил.
         """
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
         return Follow.objects.filter(user=user, author=obj).exists()
 
+    def to_representation(self, instance):
+        """Со счетчиками, если в контексте передан with_counts."""
+        data = super().to_representation(instance)
+        if self.context.get('with_counts'):
+            data.update(
+                recipes_count=instance.recipes_count,
+                followers_count=instance.followers_count,
+                following_count=instance.following_count,
+            )
+        return data
+
 
 class AvatarSerializer(serializers.ModelSerializer):
     """Сериализатор для обновления аватара пользователя."""
 
-    avatar = Base64ImageField(required=False)
+    avatar = ImageUploadField(required=False)
 
     class Meta:
         model = CustomUser
@@ -192,6 +210,158 @@ class RecipeListSerializer(serializers.ModelSerializer):
         return self.check_recipe_status(recipe, ShoppingCart)
 
 
+class FastReadSerializerMixin:
+    """
+    Общие методы сериализаторов быстрого чтения.
+
+    Такие сериализаторы наследуются от BaseSerializer и собирают словари
+    напрямую из объектов с предзагруженными связями, минуя создание
+    дерева полей DRF. Результат совпадает с выводом обычных
+    сериализаторов.
+    """
+
+    @property
+    def request(self):
+        return self.context.get('request')
+
+    @staticmethod
+    def get_related(obj, name):
+        """
+        Возвращает предзагруженные связанные объекты без создания
+        менеджера связи, а без prefetch - выполняет запрос.
+        """
+        cache = getattr(obj, '_prefetched_objects_cache', {})
+        if name in cache:
+            return cache[name]
+        return getattr(obj, name).all()
+
+    def get_file_url(self, value, absolute=True):
+        """Повторяет представление FileField/ImageField в DRF."""
+        if not value:
+            return None
+        try:
+            url = value.url
+        except AttributeError:
+            return None
+        if absolute and self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+    def get_flag(self, obj, name, model, **lookups):
+        """
+        Возвращает аннотированный признак, а если queryset не был
+        аннотирован - проверяет его отдельным запросом.
+        """
+        value = getattr(obj, name, None)
+        if value is not None:
+            return value
+        if self.request is None or self.request.user.is_anonymous:
+            return False
+        return model.objects.filter(user=self.request.user, **lookups).exists()
+
+    def author_to_representation(self, author, is_subscribed):
+        """Повторяет вывод CustomUserSerializer."""
+        return {
+            'email': author.email,
+            'id': author.id,
+            'username': author.username,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+            'is_subscribed': is_subscribed,
+            'avatar': self.get_file_url(author.avatar),
+        }
+
+
+class RecipeReadSerializer(
+    FastReadSerializerMixin, serializers.BaseSerializer
+):
+    """
+    Сериализатор быстрого чтения для списка и детального просмотра
+    рецептов. Формирует тот же ответ, что и RecipeListSerializer.
+
+    Ожидает queryset, подготовленный методами with_related()
+    и with_user_flags(). Если в контексте передан fieldset
+    (см. api.fieldsets), выводятся только выбранные поля, а вложенные
+    объекты, не указанные в expand, заменяются их id.
+    """
+
+    def to_representation(self, recipe):
+        fieldset = self.context.get('fieldset')
+        if fieldset is not None:
+            fields, expand = fieldset
+            return {
+                name: self.get_field_value(recipe, name, name in expand)
+                for name in fields
+            }
+        return {
+            'id': recipe.id,
+            'tags': self.tags_to_representation(recipe),
+            'author': self.recipe_author_to_representation(recipe),
+            'ingredients': self.ingredients_to_representation(recipe),
+            'is_favorited': self.get_flag(
+                recipe, 'is_favorited', Favorite, recipe=recipe
+            ),
+            'is_in_shopping_cart': self.get_flag(
+                recipe, 'is_in_shopping_cart', ShoppingCart, recipe=recipe
+            ),
+            'name': recipe.name,
+            'image': self.get_file_url(recipe.image),
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+        }
+
+    def get_field_value(self, recipe, name, expanded):
+        if name == 'tags':
+            return self.tags_to_representation(recipe, expanded)
+        if name == 'author':
+            return self.recipe_author_to_representation(recipe, expanded)
+        if name == 'ingredients':
+            return self.ingredients_to_representation(recipe, expanded)
+        if name == 'is_favorited':
+            return self.get_flag(recipe, name, Favorite, recipe=recipe)
+        if name == 'is_in_shopping_cart':
+            return self.get_flag(recipe, name, ShoppingCart, recipe=recipe)
+        if name == 'image':
+            return self.get_file_url(recipe.image)
+        return getattr(recipe, name)
+
+    def tags_to_representation(self, recipe, expanded=True):
+        tags = self.get_related(recipe, 'tags')
+        if not expanded:
+            return [tag.id for tag in tags]
+        return [
+            {'id': tag.id, 'name': tag.name, 'slug': tag.slug} for tag in tags
+        ]
+
+    def recipe_author_to_representation(self, recipe, expanded=True):
+        if not expanded:
+            return recipe.author_id
+        author = recipe.author
+        return self.author_to_representation(
+            author,
+            self.get_flag(
+                recipe, 'author_is_subscribed', Follow, author=author
+            ),
+        )
+
+    def ingredients_to_representation(self, recipe, expanded=True):
+        items = self.get_related(recipe, 'recipe_ingredients')
+        if not expanded:
+            return [
+                {'id': item.ingredient_id, 'amount': item.amount}
+                for item in items
+            ]
+        return [
+            {
+                'id': item.ingredient.id,
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in items
+        ]
+
+
 class IngredientWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для записи ингредиентов в рецепт."""
 
@@ -212,7 +382,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания и обновления рецепта."""
 
     author = CustomUserSerializer(required=False)
-    image = Base64ImageField(required=True)
+    image = ImageUploadField(required=True)
     tags = serializers.PrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True
     )
@@ -253,6 +423,12 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             for ingredient in ingredients
         )
 
+    def update_signature(self, recipe, ingredients):
+        """Обновляет сигнатуру рецепта для поиска похожих рецептов."""
+        update_recipe_signature(
+            recipe, [ingredient['ingredient'].id for ingredient in ingredients]
+        )
+
     def create(self, validated_data):
         """Создает новый рецепт."""
         ingredients = validated_data.pop('recipe_ingredients')
@@ -260,6 +436,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         self.get_ingredients_in_recipe(recipe, ingredients)
         recipe.tags.set(tags)
+        self.update_signature(recipe, ingredients)
         return recipe
 
     def update(self, instance, validated_data):
@@ -270,7 +447,9 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         self.get_ingredients_in_recipe(instance, ingredients)
         instance.tags.remove()
         instance.tags.set(tags)
-        return super().update(instance, validated_data)
+        instance = super().update(instance, validated_data)
+        self.update_signature(instance, ingredients)
+        return instance
 
     def validate(self, value):
         """Общая валидация данных."""
@@ -316,54 +495,32 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         return RecipeListSerializer(instance, context=self.context).data
 
 
-class FollowSerializer(serializers.ModelSerializer):
-    """Сериализатор для подписок."""
-
-    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+class BulkFollowSerializer(serializers.Serializer):
+    """Список id авторов для подписки одним запросом."""
 
-    class Meta:
-        model = Follow
-        fields = ('user', 'author')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Follow.objects.all(),
-                fields=('user', 'author'),
-                message='Вы уже подписаны на этого автора',
-            )
-        ]
+    authors = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_FOLLOW,
+    )
 
-    def validate_author(self, value):
-        """
-        Проверяет, что пользователь не пытается подписаться
-        на самого себя.
-        """
-        if self.context['request'].user == value:
+    def validate_authors(self, value):
+        """Убирает повторы и проверяет, что среди авторов нет себя."""
+        if self.context['request'].user.pk in value:
             raise ValidationError('Нельзя подписываться на самого себя')
-        return value
-
-    def to_representation(self, instance):
-        """Возвращает представление автора, на которого подписались."""
-        return SubscriptionSerializer(
-            instance.author, context=self.context
-        ).data
+        return list(dict.fromkeys(value))
 
 
-class UnfollowSerializer(SubscriptionCheckMixin, serializers.Serializer):
-    """Сериализатор для отписки."""
+class FollowSuggestionSerializer(CustomUserSerializer):
+    """
+    Рекомендованный автор и число подписок пользователя, подписанных
+    на него. Ожидает атрибуты is_subscribed и mutual_count.
+    """
 
-    def validate(self, data):
-        """Проверяет, что пользователь подписан на автора."""
-        if not self.is_subscribed():
-            raise ValidationError('Вы не подписаны на этого автора.')
-        return data
+    mutual_count = serializers.IntegerField(read_only=True)
 
-    def delete(self, validated_data):
-        """Отписывает пользователя от автора."""
-        author = self.context['view'].get_object()
-        Follow.objects.filter(
-            user=self.context['request'].user, author=author
-        ).delete()
-        return {'detail': f'Вы успешно отписались от {author.username}'}
+    class Meta(CustomUserSerializer.Meta):
+        fields = CustomUserSerializer.Meta.fields + ('mutual_count',)
 
 
 class SubscriptionSerializer(
@@ -395,14 +552,52 @@ class SubscriptionSerializer(
 
     def get_recipes(self, obj):
         """Возвращает рецепты автора с учетом параметра recipes_limit."""
-        request = self.context.get('request')
-        recipes_limit = request.GET.get('recipes_limit')
+        recipes_limit = parse_recipes_limit(self.context.get('request'))
         if recipes_limit is not None:
-            recipes = obj.recipes.all()[: int(recipes_limit)]
+            recipes = obj.recipes.all()[:recipes_limit]
         else:
             recipes = obj.recipes.all()
         return ShortRecipeSerializer(recipes, many=True).data
 
     def get_recipes_count(self, obj):
         """Возвращает общее количество рецептов автора."""
-        return obj.recipes.count()
+        return obj.recipes_count
+
+
+class SubscriptionReadSerializer(
+    FastReadSerializerMixin, serializers.BaseSerializer
+):
+    """
+    Сериализатор быстрого чтения для списка подписок.
+    Формирует тот же ответ, что и SubscriptionSerializer.
+
+    Ожидает queryset авторов с аннотацией is_subscribed и предзагруженными
+    рецептами. Число рецептов берется из счетчика CustomUser.recipes_count.
+    """
+
+    def to_representation(self, author):
+        recipes = self.get_related(author, 'recipes')
+        recipes_limit = parse_recipes_limit(self.request)
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
+        return {
+            'email': author.email,
+            'id': author.id,
+            'username': author.username,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+            'is_subscribed': self.get_flag(
+                author, 'is_subscribed', Follow, author=author
+            ),
+            'recipes': [
+                {
+                    'id': recipe.id,
+                    'name': recipe.name,
+                    'image': self.get_file_url(recipe.image, absolute=False),
+                    'cooking_time': recipe.cooking_time,
+                }
+                for recipe in recipes
+            ],
+            'recipes_count': author.recipes_count,
+            'avatar': self.get_file_url(author.avatar),
+        }
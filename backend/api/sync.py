@@ -0,0 +1,70 @@
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone
+
+from django.utils import timezone as django_timezone
+from rest_framework.exceptions import ValidationError
+
+from core.constants import SYNC_TOKEN_OVERLAP, SYNC_TOMBSTONE_RETENTION_DAYS
+from recipes.models import Ingredient, Recipe, Tag, Tombstone
+
+SYNC_MODELS = (
+    ('recipes', Recipe, Tombstone.RECIPE),
+    ('tags', Tag, Tombstone.TAG),
+    ('ingredients', Ingredient, Tombstone.INGREDIENT),
+)
+
+
+def encode_token(moment):
+    """Кодирует момент времени в непрозрачный токен."""
+    microseconds = int(moment.timestamp() * 1_000_000)
+    return base64.urlsafe_b64encode(str(microseconds).encode()).decode()
+
+
+def decode_token(token):
+    """
+    Момент времени из токена. Неразборчивый токен и момент вне
+    диапазона datetime дают ошибку валидации (400).
+    """
+    try:
+        microseconds = int(base64.urlsafe_b64decode(token.encode()))
+        return datetime.fromtimestamp(
+            microseconds / 1_000_000, tz=timezone.utc
+        )
+    except (binascii.Error, ValueError, OverflowError, OSError):
+        raise ValidationError({'since': 'Некорректный токен синхронизации.'})
+
+
+def get_changes(since=None):
+    """
+    Возвращает id измененных и удаленных с момента since рецептов,
+    тегов и ингредиентов и токен для следующего запроса.
+
+    Транзакция, начатая раньше запроса, может зафиксироваться позже,
+    поэтому окно выборки захватывает SYNC_TOKEN_OVERLAP секунд до
+    токена: клиент может получить id повторно, но не пропустит изменение.
+    Если токен старше срока хранения записей об удалении, возвращается
+    reset=True и полный список id: клиенту нужно удалить локальные
+    объекты, которых нет в ответе.
+    """
+    now = django_timezone.now()
+    retention_start = now - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS)
+    reset = since is None or since < retention_start
+    changed_after = (
+        None if reset else since - timedelta(seconds=SYNC_TOKEN_OVERLAP)
+    )
+
+    data = {'token': encode_token(now), 'reset': reset}
+    for key, model, model_name in SYNC_MODELS:
+        changed = model.objects.order_by('id')
+        deleted = []
+        if changed_after is not None:
+            changed = changed.filter(updated_at__gte=changed_after)
+            deleted = Tombstone.objects.filter(
+                model_name=model_name, deleted_at__gte=changed_after
+            ).values_list('object_id', flat=True).distinct()
+        data[key] = {
+            'changed': list(changed.values_list('id', flat=True)),
+            'deleted': sorted(deleted),
+        }
+    return data
@@ -0,0 +1,73 @@
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.constants import MAX_BATCH_RECIPES
+from recipes.models import Recipe
+from users.models import CustomUser
+
+BATCH_URL = '/api/recipes/batch/'
+
+
+class RecipeBatchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user(
+            email='author@example.org',
+            username='author',
+            password='password',
+            first_name='Автор',
+            last_name='Автор',
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {number}',
+                text='Приготовить',
+                cooking_time=number + 1,
+            )
+            for number in range(3)
+        ]
+
+    def test_recipes_in_requested_order(self):
+        first, _, third = (recipe.pk for recipe in self.recipes)
+        missing = third + 100
+        response = self.client.get(
+            BATCH_URL, {'ids': f'{third},{first},{missing},{third}'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(
+            [recipe['id'] for recipe in data['results']], [third, first]
+        )
+        self.assertEqual(data['missing'], [missing])
+        self.assertEqual(
+            data['results'][0],
+            self.client.get(f'/api/recipes/{third}/').json(),
+        )
+
+    def test_repeated_parameter(self):
+        first, second, _ = (recipe.pk for recipe in self.recipes)
+        response = self.client.get(f'{BATCH_URL}?ids={second}&ids={first}')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            [second, first],
+        )
+
+    def test_deleted_recipes_are_missing(self):
+        recipe = self.recipes[0]
+        Recipe.all_objects.filter(pk=recipe.pk).update(
+            deleted_at=timezone.now()
+        )
+        data = self.client.get(BATCH_URL, {'ids': recipe.pk}).json()
+        self.assertEqual(data, {'results': [], 'missing': [recipe.pk]})
+
+    def test_invalid_ids(self):
+        too_many = ','.join(map(str, range(1, MAX_BATCH_RECIPES + 2)))
+        for ids in ('', '1,abc', too_many):
+            with self.subTest(ids=ids[:20]):
+                response = self.client.get(BATCH_URL, {'ids': ids})
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn('ids', response.json())
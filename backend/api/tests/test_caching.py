@@ -0,0 +1,79 @@
+import threading
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.caching import CachedResponseMixin, get_lock_timeout
+from api.checks import check_response_cache_lock
+
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'response_cache',
+    }
+}
+
+
+class CachedView(CachedResponseMixin):
+    pass
+
+
+class CachedResponseMixinTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/api/recipes/1/')
+
+    def test_uncached_response_is_not_shared_between_threads(self):
+        """
+        Ответ 404 не кешируется: ведущий поток возвращает свой ответ,
+        а ожидавший поток строит собственный.
+        """
+        leader_started = threading.Event()
+        release_leader = threading.Event()
+        built = []
+
+        def get_response():
+            response = Response(status=status.HTTP_404_NOT_FOUND)
+            built.append(response)
+            if len(built) == 1:
+                leader_started.set()
+                release_leader.wait(5)
+            return response
+
+        results = {}
+
+        def run(name):
+            results[name] = CachedView().get_cached_response(
+                self.request, 'recipes:test', 'v1', get_response
+            )
+
+        leader = threading.Thread(target=run, args=('leader',))
+        leader.start()
+        self.assertTrue(leader_started.wait(5))
+        follower = threading.Thread(target=run, args=('follower',))
+        follower.start()
+        follower.join(0.2)
+        release_leader.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(len(built), 2)
+        self.assertIs(results['leader'], built[0])
+        self.assertIs(results['follower'], built[1])
+
+
+@override_settings(RESPONSE_CACHE_LOCK_SECONDS=5)
+class ResponseCacheLockTests(SimpleTestCase):
+    def test_lock_is_ignored_with_process_cache(self):
+        self.assertEqual(get_lock_timeout(), 0)
+        self.assertEqual(
+            [warning.id for warning in check_response_cache_lock(None)],
+            ['api.W001'],
+        )
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_lock_is_used_with_shared_cache(self):
+        self.assertEqual(get_lock_timeout(), 5)
+        self.assertEqual(check_response_cache_lock(None), [])
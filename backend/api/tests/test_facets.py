@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe, Tag
+from users.models import CustomUser
+
+RECIPES_URL = '/api/recipes/'
+
+
+class RecipeFacetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user(
+            email='author@example.org',
+            username='author',
+            password='password',
+            first_name='Автор',
+            last_name='Автор',
+        )
+        cls.breakfast = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.dinner = Tag.objects.create(name='Ужин', slug='dinner')
+        for cooking_time, tags in (
+            (10, [cls.breakfast]),
+            (15, [cls.breakfast, cls.dinner]),
+            (45, [cls.dinner]),
+            (90, []),
+        ):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {cooking_time}',
+                text='Приготовить',
+                cooking_time=cooking_time,
+            )
+            recipe.tags.set(tags)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_facets(self, **params):
+        response = self.client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_counts(self):
+        data = self.get_facets(facets='tags,cooking_time')
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(
+            data['facets']['tags'],
+            [
+                {'id': self.breakfast.pk, 'slug': 'breakfast', 'count': 2},
+                {'id': self.dinner.pk, 'slug': 'dinner', 'count': 2},
+            ],
+        )
+        self.assertEqual(
+            [bucket['count'] for bucket in data['facets']['cooking_time']],
+            [2, 0, 1, 1],
+        )
+
+    def test_counts_follow_filters(self):
+        data = self.get_facets(facets='tags,cooking_time', tags='dinner')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(
+            [tag['count'] for tag in data['facets']['tags']], [1, 2]
+        )
+        self.assertEqual(
+            [bucket['count'] for bucket in data['facets']['cooking_time']],
+            [1, 0, 1, 0],
+        )
+
+    def test_cached_facets_follow_new_recipes(self):
+        self.get_facets(facets='cooking_time')
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.create(
+                author=CustomUser.objects.get(username='author'),
+                name='Рецепт 5',
+                text='Приготовить',
+                cooking_time=5,
+            )
+        data = self.get_facets(facets='cooking_time')
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(
+            [bucket['count'] for bucket in data['facets']['cooking_time']],
+            [3, 0, 1, 1],
+        )
+
+    def test_only_requested_facets(self):
+        data = self.get_facets(facets='cooking_time')
+        self.assertEqual(list(data['facets']), ['cooking_time'])
+        self.assertNotIn('facets', self.get_facets())
+
+    def test_unknown_facet(self):
+        response = self.client.get(RECIPES_URL, {'facets': 'tags,color'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('facets', response.json())
@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from users.models import CustomUser
+
+SECRET = 'profiling-secret'
+PROFILES_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(PROFILING_SECRET=SECRET, PROFILES_ROOT=PROFILES_ROOT)
+class ProfilingTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.addClassCleanup(shutil.rmtree, PROFILES_ROOT, True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user(
+            email='staff@example.org',
+            username='staff',
+            password='password',
+            first_name='Сотрудник',
+            last_name='Сотрудник',
+            is_staff=True,
+        )
+        cls.user = CustomUser.objects.create_user(
+            email='user@example.org',
+            username='user',
+            password='password',
+            first_name='Пользователь',
+            last_name='Пользователь',
+        )
+
+    def get_profiled(self, user, **params):
+        token, _ = Token.objects.get_or_create(user=user)
+        return self.client.get(
+            '/api/recipes/',
+            {'limit': 1, '_profile': SECRET, **params},
+            HTTP_AUTHORIZATION=f'Token {token.key}',
+        )
+
+    def test_report_omits_secret(self):
+        response = self.get_profiled(self.staff)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response['Content-Type'], 'text/plain; charset=utf-8'
+        )
+        report = response.content.decode()
+        self.assertTrue(
+            report.startswith('GET /api/recipes/?limit=1 -> 200')
+        )
+        self.assertNotIn(SECRET, report)
+
+    def test_stored_report_is_staff_only(self):
+        response = self.get_profiled(self.staff, _profile_output='store')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('results', response.json())
+        url = urlsplit(response['X-Profile-Report']).path
+        self.assertTrue(url.startswith('/api/profiles/'))
+        self.assertNotIn(settings.MEDIA_URL, url)
+
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.client.force_authenticate(self.user)
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_403_FORBIDDEN
+        )
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = b''.join(response.streaming_content).decode()
+        self.assertIn('== SQL ==', report)
+        self.assertNotIn(SECRET, report)
+
+    def test_missing_report(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/profiles/missing.txt/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_non_staff_gets_regular_response(self):
+        response = self.get_profiled(self.user, _profile_output='store')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Report', response)
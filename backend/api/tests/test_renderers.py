@@ -0,0 +1,132 @@
+import json
+import unittest
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api import parsers, renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from recipes.models import Tag
+from users.models import CustomUser
+
+DATA = {
+    'price': Decimal('12.50'),
+    'created': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'name': 'Борщ\u2028',
+    1: None,
+}
+EXPECTED = {
+    'price': 12.5,
+    'created': '2024-05-01T12:30:15.123456Z',
+    'id': '12345678-1234-5678-1234-567812345678',
+    'name': 'Борщ\u2028',
+    '1': None,
+}
+
+
+class FastJSONTests(TestCase):
+    """orjson и стандартный рендерер DRF выдают один и тот же JSON."""
+
+    def render(self):
+        return FastJSONRenderer().render(DATA, 'application/json')
+
+    def test_orjson_output_matches_drf(self):
+        with mock.patch.object(
+            renderers.orjson, 'dumps', wraps=renderers.orjson.dumps
+        ) as dumps:
+            content = self.render()
+        dumps.assert_called_once()
+        self.assertEqual(json.loads(content), EXPECTED)
+        self.assertEqual(
+            content, JSONRenderer().render(DATA, 'application/json')
+        )
+        self.assertIn(b'\\u2028', content)
+
+    def test_indent_uses_drf_renderer(self):
+        with mock.patch.object(renderers.orjson, 'dumps') as dumps:
+            content = FastJSONRenderer().render(
+                DATA, 'application/json; indent=2'
+            )
+        dumps.assert_not_called()
+        self.assertEqual(json.loads(content), EXPECTED)
+
+    @mock.patch('api.renderers.orjson', None)
+    def test_renderer_falls_back_without_orjson(self):
+        self.assertEqual(json.loads(self.render()), EXPECTED)
+
+    @mock.patch('api.parsers.orjson', None)
+    def test_parser_falls_back_without_orjson(self):
+        stream = BytesIO('{"name": "Борщ"}'.encode())
+        self.assertEqual(FastJSONParser().parse(stream), {'name': 'Борщ'})
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{'))
+
+    def test_parser_reports_invalid_json(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{'))
+
+
+@unittest.skipIf(renderers.msgpack is None, 'msgpack is not installed')
+class MessagePackTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        CustomUser.objects.create_user(
+            email='user@example.org',
+            username='user',
+            password='password',
+            first_name='Пользователь',
+            last_name='Пользователь',
+        )
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+
+    def test_accept_header_selects_msgpack(self):
+        response = self.client.get(
+            '/api/tags/', HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(
+            renderers.msgpack.unpackb(response.content),
+            self.client.get('/api/tags/').json(),
+        )
+
+    def test_json_is_default(self):
+        response = self.client.get('/api/tags/')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_msgpack_renders_drf_types(self):
+        data = {key: DATA[key] for key in ('price', 'created', 'id')}
+        content = renderers.MessagePackRenderer().render(data)
+        self.assertEqual(
+            parsers.MessagePackParser().parse(BytesIO(content)),
+            {key: EXPECTED[key] for key in data},
+        )
+
+    def test_msgpack_request_body(self):
+        response = self.client.post(
+            '/api/auth/token/login/',
+            renderers.msgpack.packb(
+                {'email': 'user@example.org', 'password': 'password'}
+            ),
+            content_type='application/msgpack',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('auth_token', response.json())
+
+    def test_invalid_msgpack_body_is_rejected(self):
+        response = self.client.post(
+            '/api/auth/token/login/',
+            b'\xc1',
+            content_type='application/msgpack',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,133 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from core.middleware import PRIMARY_PIN_COOKIE
+from core.routers import (
+    REPLICA_DB_ALIAS,
+    PrimaryReplicaRouter,
+    finish_request,
+    start_request,
+)
+from recipes.models import Tag
+from users.models import CustomUser
+
+
+def make_user(name):
+    return CustomUser.objects.create_user(
+        email=f'{name}@example.org',
+        username=name,
+        password='password',
+        first_name=name.title(),
+        last_name=name.title(),
+    )
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Основная база - тестовая SQLite, реплика - файл SQLite с копией
+    ее данных на момент setUp(). Реплика подключается после
+    setUpClass(): запросы к ней не должны считаться запрещенными.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.replica = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+        }
+        connections.settings[REPLICA_DB_ALIAS] = cls.replica
+        cls.settings = override_settings(
+            DATABASES={**settings.DATABASES, REPLICA_DB_ALIAS: cls.replica},
+            DATABASE_ROUTERS=['core.routers.PrimaryReplicaRouter'],
+        )
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        connections[REPLICA_DB_ALIAS].close()
+        del connections[REPLICA_DB_ALIAS]
+        del connections.settings[REPLICA_DB_ALIAS]
+        shutil.rmtree(cls.directory)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.author = make_user('author')
+        self.reader = make_user('reader')
+        self.token = Token.objects.create(user=self.reader)
+        self.copy_to_replica()
+        self.fresh = make_user('fresh')
+        PrimaryReplicaRouter.unavailable_until = 0
+        self.addCleanup(
+            setattr, PrimaryReplicaRouter, 'unavailable_until', 0
+        )
+
+    def copy_to_replica(self):
+        connections[REPLICA_DB_ALIAS].close()
+        primary = connections['default']
+        primary.ensure_connection()
+        replica = sqlite3.connect(self.replica['NAME'])
+        primary.connection.backup(replica)
+        replica.close()
+
+    def get_fresh_user(self):
+        return self.client.get(f'/api/users/{self.fresh.pk}/')
+
+    def test_safe_request_reads_from_replica(self):
+        self.assertEqual(self.get_fresh_user().status_code, 404)
+        self.assertEqual(
+            self.client.get(f'/api/users/{self.author.pk}/').status_code,
+            200,
+        )
+
+    def test_write_pins_client_to_primary(self):
+        response = self.client.post(
+            f'/api/users/{self.author.pk}/subscribe/',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+        self.assertEqual(self.get_fresh_user().status_code, 200)
+        del self.client.cookies[PRIMARY_PIN_COOKIE]
+        self.assertEqual(self.get_fresh_user().status_code, 404)
+
+    def test_reads_after_write_use_primary(self):
+        router = PrimaryReplicaRouter()
+        start_request(True)
+        try:
+            self.assertEqual(router.db_for_read(Tag), REPLICA_DB_ALIAS)
+            Tag.objects.create(name='Завтрак', slug='breakfast')
+            self.assertEqual(router.db_for_read(Tag), 'default')
+        finally:
+            self.assertTrue(finish_request())
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        replica = connections[REPLICA_DB_ALIAS]
+        replica.close()
+        missing = os.path.join(self.directory, 'missing', 'replica.sqlite3')
+        with mock.patch.dict(replica.settings_dict, NAME=missing):
+            self.assertEqual(self.get_fresh_user().status_code, 200)
+        self.assertGreater(PrimaryReplicaRouter.unavailable_until, 0)
+
+    def test_dropped_replica_connection_falls_back_to_primary(self):
+        self.assertEqual(self.get_fresh_user().status_code, 404)
+        replica = connections[REPLICA_DB_ALIAS]
+        self.assertIsNotNone(replica.connection)
+        with mock.patch.object(
+            replica,
+            'create_cursor',
+            side_effect=sqlite3.OperationalError('connection lost'),
+        ):
+            self.assertEqual(self.get_fresh_user().status_code, 200)
+        self.assertIsNone(replica.connection)
+        self.assertGreater(PrimaryReplicaRouter.unavailable_until, 0)
@@ -0,0 +1,137 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import (
+    RecipeListSerializer,
+    RecipeReadSerializer,
+    SubscriptionReadSerializer,
+    SubscriptionSerializer,
+)
+from api.views import UserViewSet
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import CustomUser, Follow
+
+
+def make_user(name, **fields):
+    return CustomUser.objects.create_user(
+        email=f'{name}@example.org',
+        username=name,
+        password='password',
+        first_name=name.title(),
+        last_name=name.title(),
+        **fields,
+    )
+
+
+class FastSerializerParityTests(TestCase):
+    """Быстрые сериализаторы выдают тот же JSON, что и обычные."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = make_user('viewer')
+        cls.author = make_user('author', avatar='users/avatar.png')
+        cls.other = make_user('other')
+        breakfast = Tag.objects.create(name='Завтрак', slug='breakfast')
+        dinner = Tag.objects.create(name='Ужин', slug='dinner')
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        milk = Ingredient.objects.create(name='молоко', measurement_unit='мл')
+
+        cls.recipes = []
+        for number, (author, tags, ingredients) in enumerate(
+            (
+                (cls.author, [breakfast, dinner], [(salt, 5), (milk, 200)]),
+                (cls.author, [dinner], [(milk, 1)]),
+                (cls.other, [], []),
+                (cls.author, [breakfast], [(salt, 1)]),
+            )
+        ):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {number}',
+                text='Приготовить',
+                image=f'recipes/images/{number}.png',
+                cooking_time=number + 1,
+            )
+            recipe.tags.set(tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=amount
+                )
+                for ingredient, amount in ingredients
+            )
+            cls.recipes.append(recipe)
+
+        Favorite.objects.create(user=cls.viewer, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.viewer, recipe=cls.recipes[1])
+        Follow.objects.create(user=cls.viewer, author=cls.author)
+        Follow.objects.create(user=cls.viewer, author=cls.other)
+
+    def make_context(self, user, **params):
+        request = APIRequestFactory().get('/api/recipes/', params)
+        request.user = user
+        return {'request': request}
+
+    def assertSameOutput(self, regular, fast):
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(fast.data), renderer.render(regular.data)
+        )
+
+    def test_recipe_list(self):
+        for user in (AnonymousUser(), self.viewer):
+            with self.subTest(user=user):
+                context = self.make_context(user)
+                recipes = list(
+                    Recipe.objects.with_related().with_user_flags(user)
+                )
+                self.assertSameOutput(
+                    RecipeListSerializer(recipes, many=True, context=context),
+                    RecipeReadSerializer(recipes, many=True, context=context),
+                )
+
+    def test_recipe_detail(self):
+        context = self.make_context(self.viewer)
+        for recipe in self.recipes:
+            with self.subTest(recipe=recipe.name):
+                fast = (
+                    Recipe.objects.with_related()
+                    .with_user_flags(self.viewer)
+                    .get(pk=recipe.pk)
+                )
+                self.assertSameOutput(
+                    RecipeListSerializer(recipe, context=context),
+                    RecipeReadSerializer(fast, context=context),
+                )
+
+    def test_recipe_without_prefetch(self):
+        """Без подготовки queryset признаки проверяются запросами."""
+        context = self.make_context(self.viewer)
+        recipe = Recipe.objects.get(pk=self.recipes[0].pk)
+        self.assertSameOutput(
+            RecipeListSerializer(recipe, context=context),
+            RecipeReadSerializer(recipe, context=context),
+        )
+
+    def test_subscriptions_with_nested_recipes(self):
+        authors = list(UserViewSet().get_subscriptions_queryset(self.viewer))
+        self.assertEqual(len(authors), 2)
+        for params in ({}, {'recipes_limit': 1}, {'recipes_limit': 0}):
+            with self.subTest(params=params):
+                context = self.make_context(self.viewer, **params)
+                self.assertSameOutput(
+                    SubscriptionSerializer(
+                        authors, many=True, context=context
+                    ),
+                    SubscriptionReadSerializer(
+                        authors, many=True, context=context
+                    ),
+                )
@@ -0,0 +1,172 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.views import UserViewSet
+from recipes.models import Recipe
+from users.models import CustomUser, Follow
+
+BULK_URL = '/api/users/subscribe/'
+SUBSCRIPTIONS_URL = '/api/users/subscriptions/'
+
+
+def make_user(name):
+    return CustomUser.objects.create_user(
+        email=f'{name}@example.org',
+        username=name,
+        password='password',
+        first_name=name.title(),
+        last_name=name.title(),
+    )
+
+
+class SubscriptionTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('reader')
+        cls.author = make_user('author')
+        cls.other = make_user('other')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def subscribe_url(self, author_id):
+        return f'/api/users/{author_id}/subscribe/'
+
+    def assertCounters(self, following, followers):
+        self.user.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(self.user.following_count, following)
+        self.assertEqual(self.author.followers_count, followers)
+
+    def test_subscribe_and_unsubscribe(self):
+        version = self.user.state_version
+        response = self.client.post(self.subscribe_url(self.author.pk))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['id'], self.author.pk)
+        self.assertTrue(response.json()['is_subscribed'])
+        self.assertCounters(1, 1)
+
+        response = self.client.delete(self.subscribe_url(self.author.pk))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Follow.objects.exists())
+        self.assertCounters(0, 0)
+        self.assertEqual(self.user.state_version, version + 2)
+
+    def test_subscribe_errors(self):
+        self.client.post(self.subscribe_url(self.author.pk))
+        for author_id, expected in (
+            (self.author.pk, status.HTTP_400_BAD_REQUEST),
+            (self.user.pk, status.HTTP_400_BAD_REQUEST),
+            (self.other.pk + 100, status.HTTP_404_NOT_FOUND),
+        ):
+            with self.subTest(author_id=author_id):
+                response = self.client.post(self.subscribe_url(author_id))
+                self.assertEqual(response.status_code, expected)
+        self.assertCounters(1, 1)
+
+    def test_unsubscribe_errors(self):
+        for author_id, expected in (
+            (self.author.pk, status.HTTP_400_BAD_REQUEST),
+            (self.other.pk + 100, status.HTTP_404_NOT_FOUND),
+        ):
+            with self.subTest(author_id=author_id):
+                response = self.client.delete(self.subscribe_url(author_id))
+                self.assertEqual(response.status_code, expected)
+        self.assertCounters(0, 0)
+
+    def test_bulk_subscribe(self):
+        missing = self.other.pk + 100
+        authors = [self.author.pk, missing, self.other.pk]
+        response = self.client.post(
+            BULK_URL, {'authors': authors}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.json(),
+            {
+                'subscribed': [self.author.pk, self.other.pk],
+                'already_subscribed': [],
+                'missing': [missing],
+            },
+        )
+        self.assertCounters(2, 1)
+
+        response = self.client.post(
+            BULK_URL, {'authors': authors}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['subscribed'], [])
+        self.assertEqual(
+            response.json()['already_subscribed'],
+            [self.author.pk, self.other.pk],
+        )
+        self.assertCounters(2, 1)
+
+    def test_bulk_subscribe_rejects_self(self):
+        response = self.client.post(
+            BULK_URL, {'authors': [self.user.pk]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_counts(self):
+        """
+        Подписка: вставка с проверкой автора, два обновления счетчиков
+        и автор с рецептами для ответа (плюс точка сохранения вокруг
+        вставки). Отписка: удаление с загрузкой строки и обновления
+        счетчиков в сигнале.
+        """
+        with self.assertNumQueries(7):
+            self.client.post(self.subscribe_url(self.author.pk))
+        with self.assertNumQueries(5):
+            self.client.delete(self.subscribe_url(self.author.pk))
+        authors = {'authors': [self.author.pk, self.other.pk]}
+        with self.assertNumQueries(6):
+            self.client.post(BULK_URL, authors, format='json')
+        with self.assertNumQueries(4):
+            self.client.post(BULK_URL, authors, format='json')
+
+    def create_recipes(self, count):
+        return [
+            Recipe.objects.create(
+                author=self.author,
+                name=f'Рецепт {number}',
+                text='Приготовить',
+                cooking_time=number + 1,
+            ).pk
+            for number in range(count)
+        ]
+
+    def test_recipes_limit_is_applied_in_database(self):
+        recipe_ids = self.create_recipes(3)
+        Follow.objects.create(user=self.user, author=self.author)
+        author = UserViewSet().get_subscriptions_queryset(self.user, 2)[0]
+        prefetched = author._prefetched_objects_cache['recipes']
+        self.assertEqual(
+            [recipe.pk for recipe in prefetched], recipe_ids[:0:-1]
+        )
+
+        response = self.client.get(SUBSCRIPTIONS_URL, {'recipes_limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()['results'][0]
+        self.assertEqual(
+            [recipe['id'] for recipe in data['recipes']], recipe_ids[:0:-1]
+        )
+        self.assertEqual(data['recipes_count'], 3)
+
+    def test_invalid_recipes_limit(self):
+        for value in ('abc', '-1', '1.5'):
+            with self.subTest(value=value):
+                response = self.client.get(
+                    SUBSCRIPTIONS_URL, {'recipes_limit': value}
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                response = self.client.post(
+                    f'{self.subscribe_url(self.author.pk)}'
+                    f'?recipes_limit={value}'
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+        self.assertFalse(Follow.objects.exists())
@@ -0,0 +1,81 @@
+import base64
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.sync import encode_token
+from recipes.models import Recipe, Tag, Tombstone
+from users.models import CustomUser
+
+SYNC_URL = '/api/sync/'
+
+
+def make_token(value):
+    return base64.urlsafe_b64encode(str(value).encode()).decode()
+
+
+class SyncTokenTests(APITestCase):
+    def test_out_of_range_tokens_are_rejected(self):
+        for value in (
+            '99999999999999999999999',
+            '-99999999999999999999999',
+            'not a number',
+        ):
+            with self.subTest(value=value):
+                response = self.client.get(
+                    SYNC_URL, {'since': make_token(value)}
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn('since', response.json())
+
+    def test_malformed_base64_is_rejected(self):
+        response = self.client.get(SYNC_URL, {'since': '!!!'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_changes_since_token(self):
+        token = encode_token(timezone.now())
+        tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        response = self.client.get(SYNC_URL, {'since': token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertFalse(data['reset'])
+        self.assertEqual(data['tags']['changed'], [tag.pk])
+
+        tag_id = tag.pk
+        tag.delete()
+        data = self.client.get(SYNC_URL, {'since': data['token']}).json()
+        self.assertEqual(data['tags']['deleted'], [tag_id])
+
+    def test_soft_deleted_recipe_is_reported_at_once(self):
+        author = CustomUser.objects.create_user(
+            email='author@example.org',
+            username='author',
+            password='password',
+            first_name='Автор',
+            last_name='Автор',
+        )
+        recipe = Recipe.objects.create(
+            author=author, name='Суп', text='Сварить', cooking_time=10
+        )
+        token = self.client.get(SYNC_URL).json()['token']
+
+        self.client.force_authenticate(author)
+        response = self.client.delete(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        data = self.client.get(SYNC_URL, {'since': token}).json()
+        self.assertEqual(data['recipes']['deleted'], [recipe.pk])
+        self.assertEqual(data['recipes']['changed'], [])
+
+        call_command('purge_deleted', stdout=StringIO())
+        self.assertFalse(Recipe.all_objects.filter(pk=recipe.pk).exists())
+        self.assertEqual(
+            Tombstone.objects.filter(
+                model_name=Tombstone.RECIPE, object_id=recipe.pk
+            ).count(),
+            1,
+        )
@@ -0,0 +1,92 @@
+import threading
+from types import SimpleNamespace
+
+from django.test import TestCase, override_settings
+
+from api.throttling import TokenBucketThrottle
+from recipes.models import ThrottleBucket
+
+RATES = {
+    'DEFAULT_THROTTLE_RATES': {'small': '10/min', 'large': '120/min'}
+}
+
+
+def make_worker():
+    """Троттлинг отдельного процесса: свои корзины в памяти."""
+    return type(
+        'WorkerThrottle',
+        (TokenBucketThrottle,),
+        {'buckets': {}, 'lock': threading.Lock(), 'pruned_at': 0},
+    )
+
+
+@override_settings(REST_FRAMEWORK=RATES)
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        self.request = SimpleNamespace(
+            user=SimpleNamespace(is_authenticated=True, pk=1)
+        )
+
+    def allow(self, worker, scope='small'):
+        view = SimpleNamespace(throttle_scope=scope)
+        return worker().allow_request(self.request, view)
+
+    def test_requests_do_not_touch_database(self):
+        worker = make_worker()
+        with self.assertNumQueries(0):
+            allowed = [self.allow(worker) for _ in range(15)]
+        self.assertEqual(sum(allowed), 10)
+        self.assertFalse(ThrottleBucket.objects.exists())
+
+    def test_sync_shares_limit_between_workers(self):
+        first, second = make_worker(), make_worker()
+        for _ in range(10):
+            self.assertTrue(self.allow(first))
+        self.assertTrue(self.allow(second))
+        first.sync()
+        second.sync()
+        self.assertLess(ThrottleBucket.objects.get().tokens, 0)
+        self.assertFalse(self.allow(second))
+        first.sync()
+        self.assertFalse(self.allow(first))
+
+    def test_sync_keeps_requests_made_meanwhile(self):
+        worker = make_worker()
+        for _ in range(4):
+            self.allow(worker)
+        worker.sync()
+        self.assertAlmostEqual(
+            ThrottleBucket.objects.get().tokens, 6, places=2
+        )
+        for _ in range(3):
+            self.allow(worker)
+        worker.sync()
+        self.assertAlmostEqual(
+            ThrottleBucket.objects.get().tokens, 3, places=2
+        )
+
+    def test_denied_request_reports_retry_after(self):
+        worker = make_worker()
+        for _ in range(10):
+            self.assertTrue(self.allow(worker))
+        throttle = worker()
+        view = SimpleNamespace(throttle_scope='small')
+        self.assertFalse(throttle.allow_request(self.request, view))
+        self.assertGreater(throttle.wait(), 0)
+        self.assertLessEqual(throttle.wait(), 6)
+
+    def test_rates_follow_settings(self):
+        worker = make_worker()
+        self.assertTrue(self.allow(worker, 'extra'))
+        self.assertTrue(self.allow(worker, 'extra'))
+        with self.settings(
+            REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'extra': '1/min'}}
+        ):
+            self.assertTrue(self.allow(worker, 'extra'))
+            self.assertFalse(self.allow(worker, 'extra'))
+
+    def test_view_without_scope_is_not_throttled(self):
+        worker = make_worker()
+        self.assertTrue(self.allow(worker, None))
+        worker.sync()
+        self.assertFalse(ThrottleBucket.objects.exists())
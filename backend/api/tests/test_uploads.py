@@ -0,0 +1,121 @@
+import base64
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.fields import ImageUploadField
+from core.uploadhandlers import LimitedTemporaryFileUploadHandler
+from users.models import CustomUser
+
+AVATAR_URL = '/api/users/me/avatar/'
+# Ограничение размера в тестах, чтобы не передавать мегабайты
+SIZE_LIMIT = 4096
+
+
+def make_png(size=8, noise=False):
+    image = Image.new('RGB', (size, size), 'red')
+    if noise:
+        image.frombytes(os.urandom(size * size * 3))
+    buffer = BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ImageUploadTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='user@example.org',
+            username='user',
+            password='password',
+            first_name='Пользователь',
+            last_name='Пользователь',
+        )
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client.force_authenticate(self.user)
+
+    def put_multipart(self, content):
+        return self.client.put(
+            AVATAR_URL,
+            {'avatar': SimpleUploadedFile('avatar.png', content)},
+            format='multipart',
+        )
+
+    def put_base64(self, content):
+        return self.client.put(
+            AVATAR_URL,
+            {
+                'avatar': 'data:image/png;base64,'
+                + base64.b64encode(content).decode()
+            },
+            format='json',
+        )
+
+    def assertRejected(self, response, message):
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'avatar': [message]})
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+
+    def test_small_image_is_accepted(self):
+        for put in (self.put_multipart, self.put_base64):
+            with self.subTest(put=put.__name__):
+                response = put(make_png())
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @mock.patch('api.fields.MAX_IMAGE_SIZE', SIZE_LIMIT)
+    @mock.patch('core.uploadhandlers.MAX_IMAGE_SIZE', SIZE_LIMIT)
+    def test_oversized_image_is_rejected(self):
+        content = make_png(64, noise=True)
+        self.assertGreater(len(content), SIZE_LIMIT)
+        for put in (self.put_multipart, self.put_base64):
+            with self.subTest(put=put.__name__):
+                self.assertRejected(
+                    put(content), ImageUploadField.TOO_LARGE_MESSAGE
+                )
+
+    @mock.patch('core.uploadhandlers.MAX_IMAGE_SIZE', SIZE_LIMIT)
+    def test_truncated_upload_is_rejected(self):
+        """Файл, обрезанный обработчиком загрузки, не принимается."""
+        self.assertRejected(
+            self.put_multipart(make_png(64, noise=True)),
+            ImageUploadField.TOO_LARGE_MESSAGE,
+        )
+
+    @mock.patch('api.fields.MAX_IMAGE_DIMENSION', 4)
+    def test_image_dimensions_are_limited(self):
+        for put in (self.put_multipart, self.put_base64):
+            with self.subTest(put=put.__name__):
+                self.assertRejected(
+                    put(make_png(8)),
+                    ImageUploadField.TOO_BIG_DIMENSIONS_MESSAGE,
+                )
+
+
+@mock.patch('core.uploadhandlers.MAX_IMAGE_SIZE', SIZE_LIMIT)
+class LimitedUploadHandlerTests(APITestCase):
+    def test_data_over_limit_is_not_written(self):
+        handler = LimitedTemporaryFileUploadHandler()
+        handler.new_file('avatar', 'avatar.png', 'image/png', None)
+        chunk = b'x' * 1024
+        for start in range(0, 2 * SIZE_LIMIT, len(chunk)):
+            handler.receive_data_chunk(chunk, start)
+        upload = handler.file_complete(2 * SIZE_LIMIT)
+        self.addCleanup(upload.close)
+        self.assertTrue(upload.truncated)
+        upload.seek(0, os.SEEK_END)
+        self.assertEqual(upload.tell(), SIZE_LIMIT)
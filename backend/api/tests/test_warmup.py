@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+
+from api.warmup import WARMUP_URLS, load_reference_data
+from recipes.caches import cache_versions
+from recipes.models import Ingredient, Tag
+
+
+class WarmUpTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+        Ingredient.objects.create(name='Соль', measurement_unit='г')
+
+    def setUp(self):
+        cache.clear()
+        cache_versions.refresh()
+
+    def test_first_reference_requests_are_served_from_cache(self):
+        load_reference_data()
+        with mock.patch(
+            'rest_framework.mixins.ListModelMixin.list',
+            side_effect=AssertionError('ответ не из кеша'),
+        ):
+            for url in WARMUP_URLS:
+                for accept in ('application/json', '*/*', None):
+                    with self.subTest(url=url, accept=accept):
+                        headers = {'HTTP_ACCEPT': accept} if accept else {}
+                        response = self.client.get(url, **headers)
+                        self.assertEqual(
+                            response.status_code, status.HTTP_200_OK
+                        )
+        self.assertEqual(
+            self.client.get('/api/tags/').json()[0]['slug'], 'breakfast'
+        )
+
+    def test_changed_reference_data_is_not_served_stale(self):
+        load_reference_data()
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Обед', slug='lunch')
+        cache_versions.refresh()
+        slugs = [tag['slug'] for tag in self.client.get('/api/tags/').json()]
+        self.assertIn('lunch', slugs)
@@ -0,0 +1,265 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    IntegrityError,
+    close_old_connections,
+    transaction,
+)
+from django.db.models import F
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from core.constants import (
+    MAX_LENGTH_THROTTLE_KEY,
+    THROTTLE_PRUNE_INTERVAL,
+    THROTTLE_SYNC_BATCH_SIZE,
+    THROTTLE_SYNC_INTERVAL,
+)
+from recipes.models import ThrottleBucket
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class LocalBucket:
+    """Копия общей корзины в памяти процесса."""
+
+    __slots__ = ('tokens', 'updated_at', 'used_at', 'spent', 'rate')
+
+    def __init__(self, rate, now):
+        self.tokens = rate[0]
+        self.updated_at = now
+        self.used_at = now
+        self.spent = 0
+        self.rate = rate
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов алгоритмом token bucket.
+
+    Лимит задается для области (throttle_scope представления) в
+    DEFAULT_THROTTLE_RATES в виде '30/min': емкость корзины 30 запросов,
+    пополнение 30 токенов в минуту. Представления без throttle_scope
+    не ограничиваются.
+
+    Решение принимается по корзине в памяти процесса, без обращений к
+    базе. Раз в THROTTLE_SYNC_INTERVAL секунд фоновый поток (см.
+    start_sync) списывает израсходованные процессом токены из общей
+    корзины в таблице ThrottleBucket и выравнивает по ней локальные
+    корзины. Общая корзина может уйти в минус: перерасход между
+    синхронизациями возвращается паузой, поэтому средняя частота
+    соблюдается при любом числе воркеров, а всплеск не превышает
+    емкости плюс пополнения за интервал на каждый воркер.
+    """
+
+    buckets = {}
+    lock = threading.Lock()
+    pruned_at = 0
+    sync_pid = None
+
+    def get_rate(self, scope):
+        """Емкость корзины и скорость пополнения в токенах в секунду."""
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return None
+        num, period = rate.split('/')
+        return int(num), int(num) / PERIODS[period[0]]
+
+    def get_key(self, request, scope):
+        if request.user and request.user.is_authenticated:
+            key = f'{scope}:{request.user.pk}'
+        else:
+            key = f'{scope}:{self.get_ident(request)}'
+        if len(key) > MAX_LENGTH_THROTTLE_KEY:
+            key = f'{scope}:{hashlib.sha1(key.encode()).hexdigest()}'
+        return key
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rate = self.get_rate(scope) if scope else None
+        if rate is None:
+            return True
+        capacity, per_second = rate
+        key = self.get_key(request, scope)
+        now = time.time()
+
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = LocalBucket(rate, now)
+            bucket.rate = rate
+            bucket.tokens = min(
+                capacity,
+                bucket.tokens
+                + max(now - bucket.updated_at, 0) * per_second,
+            )
+            bucket.updated_at = now
+            bucket.used_at = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                bucket.spent += 1
+                return True
+            self.retry_after = (1 - bucket.tokens) / per_second
+            return False
+
+    @classmethod
+    def sync(cls):
+        """
+        Списывает израсходованные процессом токены из общих корзин и
+        переносит их уровень в локальные. Если база недоступна,
+        расход не теряется и списывается при следующей синхронизации.
+        """
+        with cls.lock:
+            pending = {
+                key: (bucket.spent, bucket.rate)
+                for key, bucket in cls.buckets.items()
+            }
+            for bucket in cls.buckets.values():
+                bucket.spent = 0
+        if not pending:
+            return
+        try:
+            levels, now = cls.merge(pending)
+        except Exception:
+            with cls.lock:
+                for key, (spent, _) in pending.items():
+                    if key in cls.buckets:
+                        cls.buckets[key].spent += spent
+            raise
+        with cls.lock:
+            for key, tokens in levels.items():
+                bucket = cls.buckets.get(key)
+                if bucket is not None:
+                    # Токены, потраченные во время синхронизации, еще
+                    # не списаны из общей корзины.
+                    bucket.tokens = tokens - bucket.spent
+                    bucket.updated_at = now
+        cls.prune(now)
+
+    @classmethod
+    def merge(cls, pending):
+        """
+        Уровень общих корзин после списания расхода процесса.
+        Корзины с расходом обновляются каждая в своей короткой
+        транзакции, остальные только читаются.
+        """
+        buckets = ThrottleBucket.objects.using(DEFAULT_DB_ALIAS)
+        now = time.time()
+        levels = {}
+        idle = []
+        for key, (spent, (capacity, per_second)) in pending.items():
+            if not spent:
+                idle.append(key)
+                continue
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                cls.lock_bucket(buckets, key, capacity, now)
+                bucket = buckets.get(key=key)
+                # Долг ограничен емкостью: после простоя корзина
+                # наполняется не дольше, чем за один полный период.
+                tokens = max(
+                    -capacity,
+                    min(
+                        capacity,
+                        bucket.tokens
+                        + max(now - bucket.updated_at, 0) * per_second,
+                    )
+                    - spent,
+                )
+                buckets.filter(key=key).update(
+                    tokens=tokens,
+                    updated_at=now,
+                    expires_at=now + (capacity - tokens) / per_second,
+                )
+            levels[key] = tokens
+        for start in range(0, len(idle), THROTTLE_SYNC_BATCH_SIZE):
+            keys = idle[start:start + THROTTLE_SYNC_BATCH_SIZE]
+            stored = {
+                key: (tokens, updated_at)
+                for key, tokens, updated_at in buckets.filter(
+                    key__in=keys
+                ).values_list('key', 'tokens', 'updated_at')
+            }
+            for key in keys:
+                capacity, per_second = pending[key][1]
+                tokens, updated_at = stored.get(key, (capacity, now))
+                levels[key] = min(
+                    capacity,
+                    tokens + max(now - updated_at, 0) * per_second,
+                )
+        return levels, now
+
+    @staticmethod
+    def lock_bucket(buckets, key, capacity, now):
+        """
+        Блокирует строку корзины до конца транзакции, создавая ее при
+        необходимости. Транзакция начинается с записи, а не с SELECT
+        FOR UPDATE: SQLite его не поддерживает и при переходе от чтения
+        к записи сразу возвращает ошибку блокировки вместо ожидания.
+        """
+        if buckets.filter(key=key).update(tokens=F('tokens')):
+            return
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                buckets.create(
+                    key=key, tokens=capacity, updated_at=now, expires_at=now
+                )
+        except IntegrityError:
+            buckets.filter(key=key).update(tokens=F('tokens'))
+
+    @classmethod
+    def prune(cls, now):
+        """
+        Удаляет давно не использовавшиеся корзины процесса и полностью
+        пополненные корзины в базе: отсутствие строки равносильно полной
+        корзине.
+        """
+        with cls.lock:
+            for key, bucket in list(cls.buckets.items()):
+                idle = now - bucket.used_at > THROTTLE_PRUNE_INTERVAL
+                if idle and not bucket.spent:
+                    del cls.buckets[key]
+            if now - cls.pruned_at < THROTTLE_PRUNE_INTERVAL:
+                return
+            cls.pruned_at = now
+        ThrottleBucket.objects.using(DEFAULT_DB_ALIAS).filter(
+            expires_at__lt=now
+        ).delete()
+
+    @classmethod
+    def start_sync(cls, interval=THROTTLE_SYNC_INTERVAL):
+        """
+        Запускает фоновый поток синхронизации корзин процесса. Поток не
+        переживает fork, поэтому вызывается в каждом воркере; повторный
+        вызов в том же процессе ничего не делает.
+        """
+        with cls.lock:
+            if cls.sync_pid == os.getpid():
+                return
+            cls.sync_pid = os.getpid()
+        threading.Thread(
+            target=cls.run_sync,
+            args=(interval,),
+            name='throttle-sync',
+            daemon=True,
+        ).start()
+
+    @classmethod
+    def run_sync(cls, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                cls.sync()
+            except Exception:
+                logger.exception('Throttle sync failed')
+            finally:
+                close_old_connections()
+
+    def wait(self):
+        return self.retry_after
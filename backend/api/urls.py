@@ -1,7 +1,14 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework import routers
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from .views import (
+    IngredientViewSet,
+    ProfileReportView,
+    RecipeViewSet,
+    SyncView,
+    TagViewSet,
+    UserViewSet,
+)
 
 router = routers.DefaultRouter()
 
@@ -13,6 +20,12 @@ router.register(r'recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('sync/', SyncView.as_view(), name='sync'),
+    re_path(
+        r'^profiles/(?P<name>[\w-]+\.txt)/$',
+        ProfileReportView.as_view(),
+        name='profile-report',
+    ),
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
@@ -1,15 +1,26 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Exists, OuterRef, Prefetch, Subquery, Sum
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotAuthenticated
-from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
+from rest_framework.exceptions import NotAuthenticated, ValidationError
+from rest_framework.permissions import (
+    SAFE_METHODS,
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+)
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from core.constants import MAX_BATCH_RECIPES
+from core.profiling import get_report_storage
+from recipes.caches import cache_versions
+from recipes.deletion import mark_recipes_deleted, mark_user_deleted
 from recipes.models import (
+    CacheVersion,
     Favorite,
     Ingredient,
     Recipe,
@@ -17,22 +28,27 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
-from users.models import CustomUser
+from users.models import CustomUser, Follow, FollowSuggestion
+from .caching import CachedResponseMixin, ReferenceCacheMixin, make_cache_key
+from .conditional import ConditionalGetMixin
+from .facets import get_recipe_facets, parse_facets
+from .fieldsets import apply_recipe_fieldset, parse_recipe_fieldset
 from .filters import IngredientFilter, RecipeFilter
-from .pagination import CustomPaginator
+from .pagination import CustomPaginator, parse_recipes_limit
 from .permissions import IsAuthorOrAdminOrReadOnly
 from .serializers import (
     AvatarSerializer,
+    BulkFollowSerializer,
     CustomUserSerializer,
-    FollowSerializer,
+    FollowSuggestionSerializer,
     IngredientSerializer,
     RecipeCreateSerializer,
-    RecipeListSerializer,
+    RecipeReadSerializer,
     ShortRecipeSerializer,
-    SubscriptionSerializer,
+    SubscriptionReadSerializer,
     TagSerializer,
-    UnfollowSerializer,
 )
+from .sync import decode_token, get_changes
 
 
 class UserViewSet(DjoserUserViewSet):
@@ -40,9 +56,68 @@ class UserViewSet(DjoserUserViewSet):
 
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
+    throttle_scope = None
     pagination_class = CustomPaginator
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
 
+    def get_queryset(self):
+        """
+        Пользователи с признаком подписки текущего пользователя,
+        вычисленным подзапросом EXISTS вместо запроса на каждого.
+        """
+        queryset = super().get_queryset()
+        user = self.request.user
+        if self.action in ('list', 'retrieve') and user.is_authenticated:
+            queryset = queryset.annotate(
+                is_subscribed=Exists(
+                    Follow.objects.filter(user=user, author=OuterRef('pk'))
+                )
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        """С параметром ?counts=true в ответ добавляются счетчики."""
+        context = super().get_serializer_context()
+        context['with_counts'] = self.request.query_params.get(
+            'counts', ''
+        ).lower() in ('1', 'true')
+        return context
+
+    def get_subscriptions_queryset(self, user, recipes_limit=None):
+        """
+        Авторы, на которых подписан пользователь, с аннотациями
+        и рецептами для SubscriptionReadSerializer. С recipes_limit
+        рецепты каждого автора ограничиваются в базе коррелированным
+        подзапросом с LIMIT, а не срезом уже загруженного списка.
+        """
+        recipes = Recipe.objects.only(
+            'id', 'author_id', 'name', 'image', 'cooking_time'
+        ).order_by('-pub_date', '-id')
+        if recipes_limit == 0:
+            recipes = recipes.none()
+        elif recipes_limit is not None:
+            recipes = recipes.filter(
+                pk__in=Subquery(
+                    Recipe.objects.filter(author=OuterRef('author'))
+                    .order_by('-pub_date', '-id')
+                    .values('pk')[:recipes_limit]
+                )
+            )
+        return (
+            CustomUser.objects.filter(following__user=user)
+            .annotate(
+                is_subscribed=Exists(
+                    Follow.objects.filter(user=user, author=OuterRef('pk'))
+                ),
+            )
+            .prefetch_related(Prefetch('recipes', queryset=recipes))
+            .order_by('id')
+        )
+
+    def perform_destroy(self, instance):
+        """Помечает пользователя удаленным, строки удалит purge_deleted."""
+        mark_user_deleted(instance)
+
     @action(
         methods=['get'],
         detail=False,
@@ -91,62 +166,180 @@ class UserViewSet(DjoserUserViewSet):
     )
     def subscriptions(self, request):
         """Список подписок пользователя."""
-        queryset = CustomUser.objects.filter(following__user=request.user)
+        queryset = self.get_subscriptions_queryset(
+            request.user, parse_recipes_limit(request)
+        )
         page = self.paginate_queryset(queryset)
-        serializer = SubscriptionSerializer(
+        serializer = SubscriptionReadSerializer(
             page, many=True, context={'request': request}
         )
         return self.get_paginated_response(serializer.data)
 
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=(IsAuthenticated,),
+    )
+    def suggestions(self, request):
+        """
+        Рекомендации подписок, рассчитанные refresh_suggestions, одним
+        запросом по индексу follow_suggestion_rank. Авторы, на которых
+        пользователь подписался после расчета, пропускаются.
+        """
+        suggestions = (
+            FollowSuggestion.objects.filter(
+                user=request.user, author__deleted_at__isnull=True
+            )
+            .exclude(
+                Exists(
+                    Follow.objects.filter(
+                        user=request.user, author=OuterRef('author')
+                    )
+                )
+            )
+            .select_related('author')
+            .order_by('-score', 'author_id')
+        )
+        authors = []
+        for suggestion in suggestions:
+            author = suggestion.author
+            author.is_subscribed = False
+            author.mutual_count = suggestion.mutual_count
+            authors.append(author)
+        return Response(
+            FollowSuggestionSerializer(
+                authors, many=True, context=self.get_serializer_context()
+            ).data
+        )
+
+    def get_subscription_response(self, request, author_id, recipes_limit):
+        """Автор с рецептами для ответа на подписку одним запросом."""
+        author = self.get_subscriptions_queryset(
+            request.user, recipes_limit
+        ).get(pk=author_id)
+        return Response(
+            SubscriptionReadSerializer(
+                author, context={'request': request}
+            ).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    def get_author_id(self, id):
+        try:
+            return int(id)
+        except (TypeError, ValueError):
+            raise Http404
+
     @action(
         detail=True,
         methods=['post'],
         permission_classes=[IsAuthenticated],
         url_path='subscribe',
         url_name='subscribe',
+        throttle_scope='subscribe',
     )
     def subscribe(self, request, id=None):
-        """Подписка на автора."""
-        author = get_object_or_404(CustomUser, id=id)
-        serializer = FollowSerializer(
-            data={'author': author.id}, context={'request': request}
+        """
+        Подписка на автора: вставка с ON CONFLICT DO NOTHING, а при
+        неудаче - одна проверка, существует ли автор.
+        """
+        author_id = self.get_author_id(id)
+        recipes_limit = parse_recipes_limit(request)
+        if author_id == request.user.pk:
+            raise ValidationError(
+                {'author': ['Нельзя подписываться на самого себя']}
+            )
+        if Follow.objects.follow(request.user, [author_id]):
+            cache_versions.bump(CacheVersion.FOLLOWS)
+            return self.get_subscription_response(
+                request, author_id, recipes_limit
+            )
+        if not CustomUser.objects.filter(pk=author_id).exists():
+            raise Http404
+        raise ValidationError(
+            {'non_field_errors': ['Вы уже подписаны на этого автора']}
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @subscribe.mapping.delete
     def unsubscribe(self, request, id=None):
-        """Отписка от автора."""
-        serializer = UnfollowSerializer(
-            data={}, context=self.get_serializer_context()
+        """Отписка от автора, существование автора проверяется при неудаче."""
+        author_id = self.get_author_id(id)
+        if Follow.objects.unfollow(request.user, author_id):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if not CustomUser.objects.filter(pk=author_id).exists():
+            raise Http404
+        raise ValidationError(
+            {'non_field_errors': ['Вы не подписаны на этого автора.']}
+        )
+
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAuthenticated],
+        url_path='subscribe',
+        url_name='bulk-subscribe',
+        throttle_scope='subscribe',
+    )
+    def bulk_subscribe(self, request):
+        """
+        Подписка на несколько авторов: POST /api/users/subscribe/
+        с телом {"authors": [1, 2, 3]}. Ответ 201, если создана хотя бы
+        одна подписка, иначе 200.
+        """
+        serializer = BulkFollowSerializer(
+            data=request.data, context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
-        response_data = serializer.delete(serializer.validated_data)
-        return Response(response_data, status=status.HTTP_204_NO_CONTENT)
+        author_ids = serializer.validated_data['authors']
+        created = set(Follow.objects.follow(request.user, author_ids))
+        if created:
+            cache_versions.bump(CacheVersion.FOLLOWS)
+        existing = set(
+            CustomUser.objects.filter(pk__in=author_ids).values_list(
+                'pk', flat=True
+            )
+        )
+        return Response(
+            {
+                'subscribed': [pk for pk in author_ids if pk in created],
+                'already_subscribed': [
+                    pk
+                    for pk in author_ids
+                    if pk in existing and pk not in created
+                ],
+                'missing': [pk for pk in author_ids if pk not in existing],
+            },
+            status=(
+                status.HTTP_201_CREATED if created else status.HTTP_200_OK
+            ),
+        )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet для работы с тегами."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    cache_version = CacheVersion.TAGS
     permission_classes = (AllowAny,)
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet для работы с ингредиентами."""
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    cache_version = CacheVersion.INGREDIENTS
     permission_classes = (AllowAny,)
     pagination_class = None
     filterset_class = IngredientFilter
     filter_backends = (DjangoFilterBackend,)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
     """ViewSet для работы с рецептами."""
 
     queryset = Recipe.objects.all()
@@ -154,21 +347,151 @@ class RecipeViewSet(viewsets.ModelViewSet):
     pagination_class = CustomPaginator
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    throttle_scope = None
 
     def get_queryset(self):
         """Получение queryset с учетом аутентификации пользователя."""
         queryset = super().get_queryset()
-        user = self.request.user
-        if user.is_authenticated:
-            queryset = queryset.prefetch_related('favorites', 'shopping_cart')
-        return queryset
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            return apply_recipe_fieldset(
+                queryset, fieldset, self.request.user
+            )
+        return queryset.with_related().with_user_flags(self.request.user)
+
+    def get_fieldset(self):
+        """Поля рецепта, выбранные параметрами ?fields и ?expand."""
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = parse_recipe_fieldset(self.request)
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in SAFE_METHODS:
+            context['fieldset'] = self.get_fieldset()
+        return context
+
+    def get_throttles(self):
+        """Создание рецептов ограничивается отдельным лимитом."""
+        if self.action == 'create':
+            self.throttle_scope = 'recipe_create'
+        return super().get_throttles()
 
     def get_serializer_class(self):
         """Выбор сериализатора в зависимости от действия."""
-        if self.action in SAFE_METHODS:
-            return RecipeListSerializer
+        if self.request.method in SAFE_METHODS:
+            return RecipeReadSerializer
         return RecipeCreateSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Список рецептов. С параметром ?facets=tags,cooking_time ответ
+        дополняется числом рецептов по тегам и времени приготовления.
+        """
+        facets = parse_facets(request)
+        if facets:
+            response = super().list(request, *args, **kwargs)
+            response.data['facets'] = get_recipe_facets(
+                request,
+                self.filter_queryset(super().get_queryset()),
+                facets,
+            )
+            return response
+
+        etag = self.get_list_etag(request)
+        if etag is None:
+            return super().list(request, *args, **kwargs)
+        response = self.conditional_response(request, etag)
+        if response is not None:
+            return response
+        parent = super()
+        return self.set_validators(
+            request,
+            self.get_recipe_response(
+                request,
+                etag,
+                lambda: parent.list(request, *args, **kwargs),
+            ),
+            etag,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Рецепт с поддержкой If-None-Match и If-Modified-Since."""
+        etag, last_modified = self.get_detail_validators(request)
+        if etag is None:
+            return super().retrieve(request, *args, **kwargs)
+        response = self.conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        parent = super()
+        return self.set_validators(
+            request,
+            self.get_recipe_response(
+                request,
+                etag,
+                lambda: parent.retrieve(request, *args, **kwargs),
+            ),
+            etag,
+            last_modified,
+        )
+
+    def get_recipe_response(self, request, etag, get_response):
+        """
+        Ответы анонимам (список и рецепт) кешируются в сжатом виде,
+        версия записи - ETag ответа.
+        """
+        if request.user.is_authenticated:
+            return get_response()
+        # Ссылки на картинки в ответе абсолютные, поэтому ключ
+        # зависит от хоста.
+        return self.get_cached_response(
+            request,
+            make_cache_key('recipes', request, request.get_host()),
+            etag,
+            get_response,
+        )
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        Несколько рецептов за один запрос: GET /api/recipes/batch/?ids=1,2,3.
+        Рецепты возвращаются в порядке ids, отсутствующие id
+        перечисляются в missing.
+        """
+        ids = self.get_batch_ids(request)
+        recipes = self.get_queryset().in_bulk(ids)
+        return Response(
+            {
+                'results': self.get_serializer(
+                    [recipes[pk] for pk in ids if pk in recipes], many=True
+                ).data,
+                'missing': [pk for pk in ids if pk not in recipes],
+            }
+        )
+
+    def get_batch_ids(self, request):
+        """Разбирает ?ids=1,2,3 без повторов, сохраняя порядок."""
+        values = ','.join(request.query_params.getlist('ids')).split(',')
+        try:
+            ids = list(
+                dict.fromkeys(int(value) for value in values if value.strip())
+            )
+        except ValueError:
+            raise ValidationError({'ids': 'id рецептов должны быть числами.'})
+        if not ids:
+            raise ValidationError({'ids': 'Укажите id рецептов.'})
+        if len(ids) > MAX_BATCH_RECIPES:
+            raise ValidationError(
+                {'ids': f'Не более {MAX_BATCH_RECIPES} рецептов за запрос.'}
+            )
+        return ids
+
+    def perform_destroy(self, instance):
+        """Помечает рецепт удаленным, строки удалит purge_deleted."""
+        mark_recipes_deleted(Recipe.objects.filter(pk=instance.pk))
+
     def perform_create(self, serializer):
         """Сохраняет рецепт с автором."""
         user = self.request.user
@@ -217,6 +540,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=True,
         methods=['post', 'delete'],
         permission_classes=[IsAuthenticated],
+        throttle_scope='favorite',
     )
     def favorite(self, request, pk=None):
         """Добавляет/удаляет рецепт в/из избранного."""
@@ -233,6 +557,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=True,
         methods=['post', 'delete'],
         permission_classes=[IsAuthenticated],
+        throttle_scope='shopping_cart',
     )
     def shopping_cart(self, request, pk=None):
         """Добавляет/удаляет рецепт в/из списка покупок."""
@@ -251,7 +576,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
             'Рецепт успешно удален из списка покупок',
         )
 
-    @action(detail=True, methods=['GET'], url_path='get-link')
+    @action(
+        detail=True,
+        methods=['GET'],
+        url_path='get-link',
+        throttle_scope='get_link',
+    )
     def get_short_link(self, request, pk=None):
         """
         Генерация короткой ссылки с использованием ID рецепта.
@@ -279,7 +609,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """
         ingredients = (
             RecipeIngredient.objects.filter(
-                recipe__shopping_cart__user=request.user
+                recipe__shopping_cart__user=request.user,
+                recipe__deleted_at__isnull=True,
             )
             .values('ingredient__name', 'ingredient__measurement_unit')
             .annotate(total_amount=Sum('amount'))
@@ -308,3 +639,32 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
         return response
+
+
+class SyncView(APIView):
+    """
+    Изменения рецептов, тегов и ингредиентов с момента прошлой
+    синхронизации: GET /api/sync/?since=<token>.
+    """
+
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        return Response(get_changes(decode_token(since) if since else None))
+
+
+class ProfileReportView(APIView):
+    """Сохраненный отчет профилирования, только для сотрудников."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, name):
+        storage = get_report_storage()
+        if not storage.exists(name):
+            raise Http404
+        response = FileResponse(
+            storage.open(name), content_type='text/plain; charset=utf-8'
+        )
+        response['Cache-Control'] = 'no-store'
+        return response
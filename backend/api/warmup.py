@@ -0,0 +1,99 @@
+import importlib
+import time
+
+from django.apps import apps
+from django.test import RequestFactory
+from django.urls import URLResolver, get_resolver, resolve
+
+from api import serializers
+from recipes.caches import cache_versions, tag_slug_cache
+
+# Модули, которые иначе импортируются только при первом запросе.
+WARMUP_MODULES = (
+    'PIL.Image',
+    'PIL.JpegImagePlugin',
+    'PIL.PngImagePlugin',
+    'rest_framework.renderers',
+    'rest_framework.parsers',
+    'rest_framework.authtoken.views',
+    'djoser.views',
+    'django_filters.rest_framework',
+    'drf_extra_fields.fields',
+    'api.renderers',
+    'api.parsers',
+)
+
+# Ответы, которые кешируются при прогреве.
+WARMUP_URLS = ('/api/tags/', '/api/ingredients/')
+
+WARMUP_SERIALIZERS = (
+    'CustomUserSerializer',
+    'TagSerializer',
+    'IngredientSerializer',
+    'ShortRecipeSerializer',
+    'RecipeListSerializer',
+    'RecipeCreateSerializer',
+    'SubscriptionSerializer',
+)
+
+
+def import_modules():
+    for name in WARMUP_MODULES:
+        importlib.import_module(name)
+
+
+def compile_urls(resolver=None):
+    """
+    Импортирует URLconf и компилирует регулярные выражения всех
+    маршрутов, которые Django иначе строит при первом обращении.
+    """
+    if resolver is None:
+        resolver = get_resolver()
+        resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            compile_urls(pattern)
+
+
+def build_serializer_fields():
+    """Заполняет кеши _meta моделей и строит поля сериализаторов."""
+    for model in apps.get_models():
+        model._meta.get_fields()
+    for name in WARMUP_SERIALIZERS:
+        getattr(serializers, name)().fields
+
+
+def load_reference_data():
+    """
+    Загружает версии кешей и слаги тегов и заполняет кеш ответов
+    справочников (ReferenceCacheMixin) запросами к самим представлениям:
+    ключ и версия записи те же, что у первого запроса клиента.
+    """
+    cache_versions.refresh()
+    tag_slug_cache.get_map()
+    factory = RequestFactory()
+    for url in WARMUP_URLS:
+        match = resolve(url)
+        match.func(
+            factory.get(url, HTTP_ACCEPT='application/json'),
+            *match.args,
+            **match.kwargs,
+        )
+
+
+def warm_up(data=True):
+    """
+    Прогрев процесса до первого запроса. Возвращает длительность
+    каждого шага в секундах. С data=False база не используется,
+    поэтому прогрев безопасен в AppConfig.ready().
+    """
+    steps = [import_modules, compile_urls, build_serializer_fields]
+    if data:
+        steps.append(load_reference_data)
+    timings = {}
+    for step in steps:
+        started = time.perf_counter()
+        step()
+        timings[step.__name__] = time.perf_counter() - started
+    return timings
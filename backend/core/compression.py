@@ -0,0 +1,99 @@
+import gzip
+import re
+
+from django.utils.cache import patch_vary_headers
+
+from core.constants import COMPRESSIBLE_CONTENT_TYPES, COMPRESSION_MIN_SIZE
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+BROTLI = 'br'
+
+# Порядок предпочтения при равном q в Accept-Encoding.
+ENCODINGS = (BROTLI, GZIP) if brotli else (GZIP,)
+
+# Уровни сжатия: на лету - быстрый, для кешируемых ответов - максимальный,
+# так как он выполняется один раз на версию ответа.
+LEVELS = {GZIP: (6, 9), BROTLI: (5, 11)}
+
+ACCEPT_ENCODING_RE = re.compile(
+    r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*'
+)
+
+
+def get_accepted_encoding(request):
+    """
+    Выбирает кодирование из Accept-Encoding с учетом q-значений.
+    Возвращает None, если клиент не принимает ни одно из ENCODINGS.
+    """
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    weights = {}
+    for item in header.split(','):
+        match = ACCEPT_ENCODING_RE.fullmatch(item)
+        if not match:
+            continue
+        try:
+            weights[match[1].lower()] = float(match[2] or 1)
+        except ValueError:
+            continue
+    best, best_weight = None, 0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(content, encoding, best=False):
+    level = LEVELS[encoding][best]
+    if encoding == BROTLI:
+        return brotli.compress(content, quality=level)
+    return gzip.compress(content, compresslevel=level, mtime=0)
+
+
+def is_compressible(content_type, content):
+    return len(content) >= COMPRESSION_MIN_SIZE and content_type.startswith(
+        COMPRESSIBLE_CONTENT_TYPES
+    )
+
+
+def precompress(content_type, content):
+    """
+    Тело ответа во всех поддерживаемых кодированиях для хранения
+    в кеше. Небольшие и несжимаемые ответы хранятся только как есть.
+    """
+    bodies = {IDENTITY: content}
+    if is_compressible(content_type, content):
+        for encoding in ENCODINGS:
+            bodies[encoding] = compress(content, encoding, best=True)
+    return bodies
+
+
+def set_encoded_content(response, encoding, content):
+    """
+    Подставляет в ответ тело в заданном кодировании. Сильный ETag
+    ослабляется: сжатое представление не совпадает побайтно с исходным.
+    """
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if encoding == IDENTITY:
+        return response
+    response['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = f'W/{etag}'
+    return response
+
+
+def set_precompressed_content(request, response, bodies):
+    """Выбирает из заранее сжатых тел подходящее клиенту."""
+    encoding = get_accepted_encoding(request)
+    if encoding not in bodies:
+        encoding = IDENTITY
+    return set_encoded_content(response, encoding, bodies[encoding])
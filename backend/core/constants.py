@@ -3,15 +3,79 @@ MAX_LENGTH_USER_FIELD = 150
 MAX_LENGTH_EMAIL = 254
 ALLOWED_EXTENSIONS = ['jpg', 'jpeg', 'png']
 
+# Загрузка изображений
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_DIMENSION = 4096
+
 # recipe.models
 MAX_LENGTH_INGREDIENT_NAME = 128
 MAX_LENGTH_MEASUREMENT_UNIT = 64
 MAX_LENGTH_TAG_NAME = 32
 MAX_LENGTH_TAG_SLUG = 32
 MAX_LENGTH_RECIPE_NAME = 256
+MAX_LENGTH_TOMBSTONE_MODEL = 16
+MAX_LENGTH_CACHE_VERSION_NAME = 32
+MAX_LENGTH_CACHE_LOCK_KEY = 64
+MAX_LENGTH_THROTTLE_KEY = 128
+MAX_LENGTH_IMPORT_CHECKPOINT = 255
+MAX_LENGTH_ENGAGEMENT_KIND = 16
 
 
 MIN_COOKING_TIME = 1
 MAX_COOKING_TIME = 500
 MIN_INGRDEINTS_AMOUNT = 1
 MAX_INGRDEINTS_AMOUNT = 32766
+
+# Фасеты списка рецептов
+COOKING_TIME_BUCKETS = (
+    ('0-15', MIN_COOKING_TIME, 15),
+    ('16-30', 16, 30),
+    ('31-60', 31, 60),
+    ('60+', 61, MAX_COOKING_TIME),
+)
+FACETS_CACHE_TIMEOUT = 60
+
+# Сжатие ответов и кеш справочников
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSIBLE_CONTENT_TYPES = (
+    'application/json',
+    'application/msgpack',
+    'text/',
+)
+RESPONSE_CACHE_TIMEOUT = 300
+CACHE_LOCK_POLL_INTERVAL = 0.05
+
+# Проверка версий кешей в памяти воркеров, секунды
+CACHE_VERSION_CHECK_INTERVAL = 0.5
+
+# Пакетное получение рецептов и подписка
+MAX_BATCH_RECIPES = 100
+MAX_BULK_FOLLOW = 100
+
+# Поиск похожих рецептов (MinHash/LSH)
+MINHASH_PERMUTATIONS = 128
+MINHASH_BANDS = 16
+NAME_SHINGLE_SIZE = 3
+DUPLICATE_SIMILARITY_THRESHOLD = 0.7
+# Со сколькими более ранними рецептами корзины сравнивается рецепт
+DUPLICATE_BUCKET_LIMIT = 100
+
+# Ограничение частоты запросов
+THROTTLE_SYNC_INTERVAL = 1
+# Сколько корзин читается из базы одним запросом при синхронизации
+THROTTLE_SYNC_BATCH_SIZE = 500
+THROTTLE_PRUNE_INTERVAL = 300
+
+# Популярные рецепты: вес событий и период полураспада оценки
+TRENDING_WEIGHTS = {'favorite': 1.0, 'shopping_cart': 0.5}
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_MAX_EXPONENT = 300
+
+# Рекомендации подписок: число авторов на пользователя и пользователей
+# в одной пачке расчета
+SUGGESTIONS_PER_USER = 20
+SUGGESTIONS_BATCH_SIZE = 1000
+
+# Синхронизация
+SYNC_TOKEN_OVERLAP = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
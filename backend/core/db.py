@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+
+
+def close_unusable_connections(**kwargs):
+    """
+    Закрывает постоянные соединения с БД, которые перестали отвечать.
+
+    Вызывается в начале каждого запроса, если включена настройка
+    DB_CONN_HEALTH_CHECKS. Django сам переоткроет соединение при первом
+    обращении к базе, поэтому запрос не упадет из-за разорванного
+    соединения (рестарт PostgreSQL, обрыв сети, idle-таймаут pgbouncer).
+    """
+    for conn in connections.all():
+        if conn.connection is None or conn.in_atomic_block:
+            continue
+        if not conn.is_usable():
+            conn.close()
+
+
+def reset_connections_after_fork():
+    """
+    Сбрасывает унаследованные от мастер-процесса соединения.
+
+    Сокет соединения, открытого до fork, разделяется между процессами,
+    поэтому его нельзя закрывать штатно: это оборвет сессию и у мастера.
+    Достаточно забыть о нем, воркер откроет собственное соединение.
+    """
+    for conn in connections.all():
+        conn.connection = None
+        conn.closed_in_transaction = False
+        conn.close_at = None
+
+
+def connect_health_checks():
+    if settings.DB_CONN_HEALTH_CHECKS:
+        request_started.connect(
+            close_unusable_connections,
+            dispatch_uid='core.db.close_unusable_connections',
+        )
@@ -0,0 +1,109 @@
+from collections import Counter
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, models
+from django.db.models.deletion import get_candidate_relations_to_delete
+
+
+def get_file_fields():
+    """Пары (модель, поле) для всех FileField проекта."""
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+
+
+def raw_delete(queryset, using=DEFAULT_DB_ALIAS):
+    """
+    Удаляет строки queryset одним DELETE и возвращает их число.
+
+    В отличие от QuerySet.delete() строки не загружаются в память и
+    сигналы pre_delete и post_delete не отправляются, а связанные
+    строки не удаляются каскадом: вызывающий код сам обновляет
+    счетчики и версии кэша, которые поддерживают обработчики
+    сигналов. QuerySet._raw_delete() - приватный метод Django, поэтому
+    он вызывается только здесь.
+    """
+    return queryset._raw_delete(using)
+
+
+def purge_orphaned_files(names, modified_before, storage=default_storage):
+    """
+    Удаляет файлы из names, на которые больше не ссылается ни одна
+    запись и которые не изменялись с modified_before: повторная
+    загрузка того же содержимого обновляет время изменения файла,
+    см. ContentHashStorage.purge(). Возвращает число удаленных файлов.
+    """
+    names = set(names)
+    if not names:
+        return 0
+    referenced = set()
+    for model, field in get_file_fields():
+        referenced.update(
+            model._base_manager.filter(
+                **{f'{field.attname}__in': names}
+            ).values_list(field.attname, flat=True)
+        )
+    orphaned = names - referenced
+    purge = getattr(storage, 'purge', None)
+    if purge is None:
+        for name in orphaned:
+            storage.delete(name)
+        return len(orphaned)
+    return sum(purge(name, modified_before) for name in orphaned)
+
+
+class BatchDeleter:
+    """
+    Удаление строк вместе с зависимыми без сборщика Django.
+
+    Зависимые строки удаляются снизу вверх пачками по batch_size
+    отдельными DELETE без загрузки объектов в память, поэтому ни одна
+    транзакция не держит блокировки долго. Учитываются связи с
+    on_delete CASCADE и SET_NULL, включая промежуточные таблицы
+    ManyToManyField. Сигналы pre_delete и post_delete не отправляются:
+    нужную обработку можно выполнить в before_delete(model, pks).
+    Имена файлов удаленных строк накапливаются в files.
+    """
+
+    def __init__(self, batch_size, before_delete=None):
+        self.batch_size = batch_size
+        self.before_delete = before_delete
+        self.deleted = Counter()
+        self.files = set()
+
+    def delete_queryset(self, queryset):
+        while True:
+            pks = list(
+                queryset.values_list('pk', flat=True)[: self.batch_size]
+            )
+            if not pks:
+                return
+            self.delete(queryset.model, pks)
+
+    def delete(self, model, pks):
+        for relation in get_candidate_relations_to_delete(model._meta):
+            field = relation.field
+            related = relation.related_model._base_manager.filter(
+                **{f'{field.name}__in': pks}
+            )
+            on_delete = field.remote_field.on_delete
+            if on_delete is models.CASCADE:
+                self.delete_queryset(related)
+            elif on_delete is models.SET_NULL:
+                related.update(**{field.name: None})
+
+        queryset = model._base_manager.filter(pk__in=pks)
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                self.files.update(
+                    name
+                    for name in queryset.values_list(field.attname, flat=True)
+                    if name
+                )
+        if self.before_delete is not None:
+            self.before_delete(model, pks)
+        self.deleted[model._meta.label] += raw_delete(queryset)
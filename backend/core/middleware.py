@@ -0,0 +1,169 @@
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.urls import reverse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+
+from core.compression import (
+    IDENTITY,
+    compress,
+    get_accepted_encoding,
+    is_compressible,
+    set_encoded_content,
+)
+from core.profiling import RequestProfiler, save_report
+from core.routers import (
+    REPLICA_DB_ALIAS,
+    finish_request,
+    replica_failed,
+    start_request,
+)
+
+PRIMARY_PIN_COOKIE = 'db_primary_pin'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_QUERY_PARAM = '_profile'
+PROFILE_OUTPUT_QUERY_PARAM = '_profile_output'
+PROFILE_OUTPUT_HEADER = 'HTTP_X_PROFILE_OUTPUT'
+PROFILE_REPORT_HEADER = 'X-Profile-Report'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает чтение из реплики для безопасных запросов.
+
+    После запроса с записью клиенту ставится cookie, и на
+    DB_REPLICA_PIN_SECONDS секунд все его запросы читают из основной базы:
+    так клиент не увидит устаревших данных из-за отставания реплики.
+    Если соединение с репликой оборвалось посреди безопасного запроса,
+    запрос выполняется повторно на основной базе.
+    Без настроенной реплики middleware отключается.
+    """
+
+    def __init__(self, get_response):
+        if REPLICA_DB_ALIAS not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start_request(
+            request.method in SAFE_METHODS
+            and PRIMARY_PIN_COOKIE not in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            has_written = finish_request()
+        if has_written:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                '1',
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_exception(self, request, exception):
+        if request.method not in SAFE_METHODS or not replica_failed(
+            exception
+        ):
+            return None
+        start_request(False)
+        return self.get_response(request)
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов gzip или brotli (если установлен пакет brotli)
+    по заголовку Accept-Encoding.
+
+    Сжимаются только JSON, MessagePack и текстовые ответы не меньше
+    COMPRESSION_MIN_SIZE байт. Ответы, уже имеющие Content-Encoding
+    (например, заранее сжатые ответы из кеша справочников), и потоковые
+    ответы передаются как есть.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not is_compressible(
+            response.get('Content-Type', ''), response.content
+        ):
+            return response
+        encoding = get_accepted_encoding(request)
+        if encoding is None:
+            return set_encoded_content(response, IDENTITY, response.content)
+        return set_encoded_content(
+            response, encoding, compress(response.content, encoding)
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запроса по требованию сотрудника.
+
+    Запрос профилируется, если в заголовке X-Profile или параметре
+    ?_profile= передан PROFILING_SECRET, а пользователь (по сессии или
+    токену) - сотрудник. Отчет возвращается вместо ответа или, при
+    X-Profile-Output: store (?_profile_output=store), сохраняется
+    в PROFILES_ROOT, а ссылка на него (доступная только сотрудникам)
+    передается в заголовке X-Profile-Report обычного ответа.
+    Без PROFILING_SECRET
+    middleware отключается и не участвует в обработке запросов.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_SECRET:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        secret = request.META.get(PROFILE_HEADER) or request.GET.get(
+            PROFILE_QUERY_PARAM
+        )
+        if not secret or not self.is_allowed(request, secret):
+            return self.get_response(request)
+
+        with RequestProfiler() as profiler:
+            response = self.get_response(request)
+        report = profiler.report(request, response)
+
+        output = request.META.get(PROFILE_OUTPUT_HEADER) or request.GET.get(
+            PROFILE_OUTPUT_QUERY_PARAM
+        )
+        if output == 'store':
+            response[PROFILE_REPORT_HEADER] = request.build_absolute_uri(
+                reverse('profile-report', args=[save_report(report)])
+            )
+            return response
+
+        response = HttpResponse(
+            report, content_type='text/plain; charset=utf-8'
+        )
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def is_allowed(self, request, secret):
+        """Секрет совпадает, и запрос выполняет сотрудник."""
+        if not hmac.compare_digest(
+            secret.encode(), settings.PROFILING_SECRET.encode()
+        ):
+            return False
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                authenticated = TokenAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return False
+            if authenticated is None:
+                return False
+            user = authenticated[0]
+        return user.is_staff
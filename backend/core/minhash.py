@@ -0,0 +1,86 @@
+import hashlib
+import random
+import re
+import struct
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = MERSENNE_PRIME - 1
+
+
+def feature_hash(feature):
+    """Стабильный между процессами 61-битный хеш строки."""
+    digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') % MERSENNE_PRIME
+
+
+def shingles(text, size):
+    """Множество символьных n-грамм нормализованной строки."""
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i: i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash-сигнатуры множеств строк и их разбиение на полосы для
+    поиска похожих множеств (LSH).
+
+    Сигнатура — num_perm минимумов хешей вида (a * x + b) mod p,
+    доля совпадающих позиций двух сигнатур оценивает коэффициент
+    Жаккара исходных множеств. Полосы по rows позиций хешируются
+    в корзины: похожие множества с высокой вероятностью совпадают
+    хотя бы в одной корзине.
+    """
+
+    def __init__(self, num_perm, bands, seed=1):
+        if num_perm % bands:
+            raise ValueError('num_perm должно делиться на bands.')
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        generator = random.Random(seed)
+        self.permutations = [
+            (
+                generator.randint(1, MERSENNE_PRIME - 1),
+                generator.randint(0, MERSENNE_PRIME - 1),
+            )
+            for _ in range(num_perm)
+        ]
+        self.format = f'<{num_perm}Q'
+
+    def signature(self, features):
+        hashes = [feature_hash(feature) for feature in features]
+        if not hashes:
+            return (MAX_HASH,) * self.num_perm
+        return tuple(
+            min((a * value + b) % MERSENNE_PRIME for value in hashes)
+            for a, b in self.permutations
+        )
+
+    def band_buckets(self, signature):
+        """Пары (номер полосы, знаковый 64-битный хеш корзины)."""
+        buckets = []
+        for band in range(self.bands):
+            start = band * self.rows
+            digest = hashlib.blake2b(
+                struct.pack(
+                    f'<{self.rows}Q', *signature[start: start + self.rows]
+                ),
+                digest_size=8,
+            ).digest()
+            buckets.append(
+                (band, int.from_bytes(digest, 'little', signed=True))
+            )
+        return buckets
+
+    def pack(self, signature):
+        return struct.pack(self.format, *signature)
+
+    def unpack(self, data):
+        return struct.unpack(self.format, bytes(data))
+
+    @staticmethod
+    def similarity(first, second):
+        """Оценка коэффициента Жаккара по двум сигнатурам."""
+        return sum(a == b for a, b in zip(first, second)) / len(first)
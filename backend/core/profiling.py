@@ -0,0 +1,128 @@
+import cProfile
+import io
+import pstats
+import secrets
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connections
+from django.utils import timezone
+
+PROFILE_STATS_LIMIT = 60
+PROFILE_ALLOCATIONS_LIMIT = 25
+PROFILE_SQL_LIMIT = 200
+# Параметры запроса ?_profile= и ?_profile_output=: в отчет не попадают,
+# чтобы в нем не оказался секрет.
+PROFILE_PARAM_PREFIX = '_profile'
+
+
+def get_report_storage():
+    """Хранилище отчетов в PROFILES_ROOT, вне публичных медиафайлов."""
+    return FileSystemStorage(location=settings.PROFILES_ROOT)
+
+
+def save_report(report):
+    """
+    Сохраняет отчет и возвращает его имя. Случайная часть имени не дает
+    подобрать адрес соседних отчетов.
+    """
+    return get_report_storage().save(
+        f'{timezone.now():%Y%m%d-%H%M%S}-{secrets.token_hex(8)}.txt',
+        ContentFile(report.encode()),
+    )
+
+
+def get_logged_path(request):
+    """Адрес запроса без параметров профилирования."""
+    params = request.GET.copy()
+    for key in list(params):
+        if key.startswith(PROFILE_PARAM_PREFIX):
+            del params[key]
+    query = params.urlencode()
+    return f'{request.path}?{query}' if query else request.path
+
+
+class RequestProfiler:
+    """
+    Профилирование одного запроса: cProfile, разница снимков
+    tracemalloc до и после запроса и журнал SQL-запросов всех баз
+    (через execute_wrapper, поэтому DEBUG не нужен).
+
+    Используется как контекстный менеджер, отчет формирует report().
+    """
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.queries = []
+        self.stack = ExitStack()
+
+    def log_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (
+                    context['connection'].alias,
+                    time.perf_counter() - started,
+                    sql,
+                )
+            )
+
+    def __enter__(self):
+        for connection in connections.all():
+            self.stack.enter_context(
+                connection.execute_wrapper(self.log_query)
+            )
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.snapshot = tracemalloc.take_snapshot()
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.elapsed = time.perf_counter() - self.started
+        self.allocations = tracemalloc.take_snapshot().compare_to(
+            self.snapshot, 'lineno'
+        )
+        self.peak = tracemalloc.get_traced_memory()[1]
+        if self.started_tracing:
+            tracemalloc.stop()
+        self.stack.close()
+
+    def report(self, request, response):
+        output = io.StringIO()
+        sql_time = sum(duration for _, duration, _ in self.queries)
+        output.write(
+            f'{request.method} {get_logged_path(request)} -> '
+            f'{response.status_code}\n'
+            f'Time: {self.elapsed * 1000:.1f} ms, '
+            f'SQL: {len(self.queries)} queries, {sql_time * 1000:.1f} ms, '
+            f'peak memory: {self.peak / 1024:.0f} KiB\n'
+        )
+
+        output.write('\n== cProfile (cumulative) ==\n')
+        pstats.Stats(self.profiler, stream=output).sort_stats(
+            'cumulative'
+        ).print_stats(PROFILE_STATS_LIMIT)
+
+        output.write('\n== tracemalloc (allocations by line) ==\n')
+        for stat in self.allocations[:PROFILE_ALLOCATIONS_LIMIT]:
+            output.write(f'{stat}\n')
+
+        output.write('\n== SQL ==\n')
+        for alias, duration, sql in self.queries[:PROFILE_SQL_LIMIT]:
+            output.write(f'[{alias}] {duration * 1000:.2f} ms: {sql}\n')
+        if len(self.queries) > PROFILE_SQL_LIMIT:
+            output.write(
+                f'... {len(self.queries) - PROFILE_SQL_LIMIT} more queries\n'
+            )
+        return output.getvalue()
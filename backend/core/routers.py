@@ -0,0 +1,107 @@
+import time
+
+from asgiref.local import Local
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    InterfaceError,
+    OperationalError,
+    connections,
+)
+
+REPLICA_DB_ALIAS = 'replica'
+
+_state = Local()
+
+
+def start_request(read_from_replica):
+    """Задает, можно ли читать из реплики в текущем запросе."""
+    _state.read_from_replica = read_from_replica
+    _state.has_written = False
+    _state.used_replica = False
+
+
+def replica_failed(exception):
+    """
+    Сообщает, вызвана ли ошибка обрывом соединения с репликой в текущем
+    запросе до первой записи: тогда запрос можно безопасно повторить
+    на основной базе. Соединение закрывается, а реплика считается
+    недоступной на DB_REPLICA_RETRY_SECONDS секунд.
+    """
+    if (
+        not isinstance(exception, (InterfaceError, OperationalError))
+        or not getattr(_state, 'used_replica', False)
+        or getattr(_state, 'has_written', False)
+    ):
+        return False
+    connection = connections[REPLICA_DB_ALIAS]
+    if not connection.errors_occurred:
+        return False
+    PrimaryReplicaRouter.mark_unavailable()
+    try:
+        connection.close()
+    except DatabaseError:
+        connection.connection = None
+    return True
+
+
+def finish_request():
+    """Сбрасывает состояние и сообщает, была ли в запросе запись."""
+    has_written = getattr(_state, 'has_written', False)
+    _state.read_from_replica = False
+    _state.has_written = False
+    return has_written
+
+
+class PrimaryReplicaRouter:
+    """
+    Направляет чтение в реплику, а запись - в основную базу.
+
+    Реплика используется, только если ReplicaRoutingMiddleware разрешила
+    это для текущего запроса. После первой записи все дальнейшие чтения
+    запроса идут в основную базу, чтобы клиент видел свои изменения.
+    Если реплика недоступна, чтение идет в основную базу, а повторная
+    попытка подключиться к реплике делается через
+    DB_REPLICA_RETRY_SECONDS секунд. Обрыв уже открытого соединения
+    обрабатывает ReplicaRoutingMiddleware, см. replica_failed().
+    """
+
+    unavailable_until = 0
+
+    def db_for_read(self, model, **hints):
+        if (
+            not getattr(_state, 'read_from_replica', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+            or not self.replica_available()
+        ):
+            return DEFAULT_DB_ALIAS
+        _state.used_replica = True
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.read_from_replica = False
+        _state.has_written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+    def replica_available(self):
+        if time.monotonic() < PrimaryReplicaRouter.unavailable_until:
+            return False
+        try:
+            connections[REPLICA_DB_ALIAS].ensure_connection()
+        except OperationalError:
+            self.mark_unavailable()
+            return False
+        return True
+
+    @staticmethod
+    def mark_unavailable():
+        PrimaryReplicaRouter.unavailable_until = (
+            time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+        )
@@ -0,0 +1,50 @@
+import threading
+
+
+class Flight:
+    __slots__ = ('event', 'result', 'failed')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+class SingleFlight:
+    """
+    Объединение одновременных вычислений одного значения в процессе.
+
+    Первый поток, запросивший ключ, вычисляет значение, остальные
+    получают устаревшую копию stale, если она передана, или ждут
+    результата первого потока. Если вычисление завершилось ошибкой или
+    ожидание превысило timeout, поток вычисляет значение сам.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, compute, stale=None, timeout=None):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+
+        if not leader:
+            if stale is not None:
+                return stale
+            if flight.event.wait(timeout) and not flight.failed:
+                return flight.result
+            return compute()
+
+        try:
+            flight.result = compute()
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+        return flight.result
@@ -0,0 +1,74 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    Файловое хранилище с адресацией по содержимому.
+
+    Имя файла - SHA-256 его содержимого, поэтому повторная загрузка той же
+    картинки не создает новый файл, а возвращает имя уже сохраненного.
+    Файл по такому имени никогда не меняется, что позволяет отдавать медиа
+    с заголовком Cache-Control: immutable.
+
+    Один файл может использоваться несколькими записями, поэтому delete()
+    ничего не удаляет: неиспользуемые файлы удаляет команда clean_media.
+    Она не трогает недавно измененные файлы, поэтому повторная загрузка
+    обновляет время изменения уже сохраненного файла.
+    """
+
+    hash_algorithm = 'sha256'
+
+    def get_content_hash(self, content):
+        digest = hashlib.new(self.hash_algorithm)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_hashed_name(self, name, content):
+        """recipes/images/photo.png -> recipes/images/ab/ab12...ef.png"""
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        content_hash = self.get_content_hash(content)
+        return os.path.join(
+            directory, content_hash[:2], f'{content_hash}{extension}'
+        )
+
+    def _save(self, name, content):
+        name = self.get_hashed_name(name, content)
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super()._save(name, content)
+        return name
+
+    def delete(self, name):
+        pass
+
+    def purge(self, name, modified_before=None):
+        """
+        Удаляет файл с диска. Используется при сборке мусора.
+
+        С modified_before файл удаляется, только если он не изменялся
+        с этого момента. Сначала файл переименовывается: если его
+        одновременно загружают повторно, utime() в _save() либо успевает
+        обновить время изменения (и файл возвращается на место), либо
+        не находит файл, и _save() записывает его заново.
+        Возвращает True, если файл удален.
+        """
+        if modified_before is None:
+            super().delete(name)
+            return True
+        path = self.path(name)
+        purging = f'{path}.purge'
+        try:
+            os.rename(path, purging)
+        except FileNotFoundError:
+            return False
+        if os.stat(purging).st_mtime >= modified_before:
+            os.replace(purging, path)
+            return False
+        os.remove(purging)
+        return True
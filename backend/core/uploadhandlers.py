@@ -0,0 +1,24 @@
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from core.constants import MAX_IMAGE_SIZE
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Записывает загружаемый файл во временный файл на диске по частям,
+    не держа его в памяти целиком.
+
+    Данные сверх MAX_IMAGE_SIZE не записываются: файл помечается
+    атрибутом truncated, а сериализатор отклоняет его с понятной ошибкой.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > MAX_IMAGE_SIZE:
+            self.file.truncated = True
+            return None
+        return super().receive_data_chunk(raw_data, start)
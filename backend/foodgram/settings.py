@@ -1,4 +1,5 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -33,14 +34,32 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
+# Прогрев процесса (импорты, URL, сериализаторы) в ApiConfig.ready(),
+# для серверов без прогрева в gunicorn.conf.py.
+WARMUP_ON_READY = os.getenv('WARMUP_ON_READY', 'false').lower() == 'true'
+# Синхронизация корзин ограничения частоты с базой в ApiConfig.ready(),
+# для серверов без запуска в gunicorn.conf.py, см. TokenBucketThrottle.
+THROTTLE_SYNC_ON_READY = (
+    os.getenv('THROTTLE_SYNC_ON_READY', 'false').lower() == 'true'
+)
+
+# Профилирование запросов сотрудников по секрету, см. ProfilingMiddleware
+PROFILING_SECRET = os.getenv('PROFILING_SECRET', '')
+# Сохраненные отчеты лежат вне MEDIA_ROOT: nginx отдает медиа всем,
+# а отчеты доступны только сотрудникам через /api/profiles/<name>/.
+PROFILES_ROOT = Path(os.getenv('PROFILES_ROOT', BASE_DIR / 'profiles'))
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -62,17 +81,61 @@ TEMPLATES = [
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.postgresql')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': DB_ENGINE,
         'NAME': os.getenv('POSTGRES_DB', 'foodgram'),
         'USER': os.getenv('POSTGRES_USER', 'foodgram_user'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        # Постоянные соединения: 0 - закрывать после каждого запроса,
+        # None - держать без ограничения по времени.
+        'CONN_MAX_AGE': (
+            None
+            if os.getenv('DB_CONN_MAX_AGE', '0').lower() == 'none'
+            else int(os.getenv('DB_CONN_MAX_AGE', 0))
+        ),
+        'OPTIONS': {},
     }
 }
 
+# Проверка живости постоянного соединения перед его повторным
+# использованием в новом запросе (см. core.db).
+DB_CONN_HEALTH_CHECKS = (
+    os.getenv('DB_CONN_HEALTH_CHECKS', 'false').lower() == 'true'
+)
+
+# Ограничение времени выполнения одного SQL-запроса, мс (0 - без лимита).
+DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', 0))
+
+if DB_ENGINE == 'django.db.backends.postgresql':
+    DATABASES['default']['OPTIONS']['connect_timeout'] = int(
+        os.getenv('DB_CONNECT_TIMEOUT', 10)
+    )
+    if DB_STATEMENT_TIMEOUT:
+        DATABASES['default']['OPTIONS']['options'] = (
+            f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'
+        )
+
+# Реплика для чтения. Безопасные (GET, HEAD, OPTIONS) запросы читают из
+# нее, запись и чтение после записи идут в основную базу (см. core.routers).
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи клиент читает из основной базы.
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+# Через сколько секунд снова пробовать недоступную реплику.
+DB_REPLICA_RETRY_SECONDS = int(os.getenv('DB_REPLICA_RETRY_SECONDS', 30))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,6 +170,13 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+DEFAULT_FILE_STORAGE = 'core.storage.ContentHashStorage'
+
+# Загружаемые файлы пишутся во временный файл на диске по частям.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploadhandlers.LimitedTemporaryFileUploadHandler',
+]
+
 AUTH_USER_MODEL = 'users.CustomUser'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -125,8 +195,55 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS':
         'api.pagination.CustomPaginator',
     'PAGE_SIZE': 6,
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': ('api.throttling.TokenBucketThrottle',),
+    'DEFAULT_THROTTLE_RATES': {
+        'recipe_create': os.getenv('THROTTLE_RECIPE_CREATE', '60/min'),
+        'favorite': os.getenv('THROTTLE_FAVORITE', '120/min'),
+        'shopping_cart': os.getenv('THROTTLE_SHOPPING_CART', '120/min'),
+        'subscribe': os.getenv('THROTTLE_SUBSCRIBE', '60/min'),
+        'get_link': os.getenv('THROTTLE_GET_LINK', '120/min'),
+    },
 }
 
+# По умолчанию кеш в памяти процесса. Общий для воркеров кеш задается
+# CACHE_BACKEND и CACHE_LOCATION, например
+# django.core.cache.backends.memcached.PyMemcacheCache и memcached:11211.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+}
+
+# Кеш ответов: сколько секунд после устаревания запись отдается, пока
+# ее пересчитывает другой поток (0 - ждать пересчета), и на сколько
+# секунд пересчет ключа блокируется для других воркеров (0 - без
+# блокировки; с кешем в памяти процесса не используется).
+RESPONSE_CACHE_STALE_SECONDS = int(
+    os.getenv('RESPONSE_CACHE_STALE_SECONDS', 30)
+)
+RESPONSE_CACHE_LOCK_SECONDS = int(os.getenv('RESPONSE_CACHE_LOCK_SECONDS', 0))
+
+# Формат MessagePack подключается, только если установлен пакет msgpack.
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append(
+        'api.renderers.MessagePackRenderer'
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append(
+        'api.parsers.MessagePackParser'
+    )
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
@@ -0,0 +1,81 @@
+"""
+Профиль запуска gunicorn для продакшена.
+
+Все параметры задаются переменными окружения. Значения по умолчанию
+совпадают с настройками gunicorn.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# sync - по процессу на запрос, gthread - пул потоков в каждом воркере.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 2))
+
+# Перезапуск воркера после N запросов ограничивает рост памяти,
+# jitter не дает всем воркерам перезапуститься одновременно.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# Загрузка приложения в мастер-процессе до fork: воркеры стартуют
+# быстрее и делят страницы памяти с мастером.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+# Прогрев импортов, URL, сериализаторов и справочников до первого
+# запроса: в мастере перед fork при preload_app, иначе в каждом воркере.
+warmup = os.getenv('GUNICORN_WARMUP', 'false').lower() == 'true'
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG') or None
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+
+def pre_fork(server, worker):
+    """Закрывает соединения мастера, чтобы воркеры их не унаследовали."""
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def post_fork(server, worker):
+    """Сбрасывает соединения с БД, оставшиеся от мастер-процесса."""
+    if preload_app:
+        from core.db import reset_connections_after_fork
+
+        reset_connections_after_fork()
+
+
+def run_warmup(log):
+    from api.warmup import warm_up
+
+    timings = warm_up()
+    log.info(
+        'Warm-up done: %s',
+        ', '.join(
+            f'{step} {seconds * 1000:.0f} ms'
+            for step, seconds in timings.items()
+        ),
+    )
+
+
+def when_ready(server):
+    """Прогревает приложение в мастере, пока воркеры еще не созданы."""
+    if warmup and preload_app:
+        run_warmup(server.log)
+
+
+def post_worker_init(worker):
+    """
+    Запускает синхронизацию ограничения частоты запросов с базой.
+    Без preload_app здесь же прогревается каждый воркер.
+    """
+    from api.throttling import TokenBucketThrottle
+
+    TokenBucketThrottle.start_sync()
+    if warmup and not preload_app:
+        run_warmup(worker.log)
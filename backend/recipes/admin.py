@@ -1,10 +1,12 @@
 from django.contrib import admin
 
+from .deletion import mark_recipes_deleted
 from .models import (
     Favorite,
     Ingredient,
     Recipe,
     RecipeIngredient,
+    RecipeSignature,
     ShoppingCart,
     Tag,
 )
@@ -41,7 +43,13 @@ class RecipeAdmin(admin.ModelAdmin):
         return obj.favorites.count()
 
     favorites_count.short_description = 'Добавлено в избранное'
-    readonly_fields = ('favorites_count',)
+    readonly_fields = ('favorites_count', 'trending_score')
+
+    def delete_model(self, request, obj):
+        mark_recipes_deleted(Recipe.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        mark_recipes_deleted(queryset)
 
 
 @admin.register(Favorite)
@@ -56,3 +64,24 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
     list_filter = ('user', 'recipe')
+
+
+@admin.register(RecipeSignature)
+class RecipeSignatureAdmin(admin.ModelAdmin):
+    """Рецепты, отмеченные как возможные дубликаты ранее опубликованных."""
+
+    list_display = ('recipe', 'duplicate_of', 'similarity', 'updated_at')
+    list_select_related = ('recipe', 'duplicate_of')
+    search_fields = ('recipe__name', 'duplicate_of__name')
+    fields = ('recipe', 'duplicate_of', 'similarity', 'updated_at')
+    readonly_fields = fields
+
+    def get_queryset(self, request):
+        return (
+            super().get_queryset(request)
+            .filter(duplicate_of__isnull=False)
+            .defer('signature')
+        )
+
+    def has_add_permission(self, request):
+        return False
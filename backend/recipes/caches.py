@@ -0,0 +1,120 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, models, transaction
+from django.utils import timezone
+
+from core.constants import CACHE_VERSION_CHECK_INTERVAL
+from recipes.models import CacheLock, CacheVersion, Tag
+
+
+class CacheVersions:
+    """
+    Версии данных (CacheVersion), известные процессу.
+
+    Таблица версий перечитывается одним запросом не чаще раза
+    в CACHE_VERSION_CHECK_INTERVAL секунд, поэтому кеш в памяти,
+    сравнивающий сохраненную версию с get(), устаревает в других
+    воркерах не дольше этого интервала, а в своем - сразу после коммита.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        if time.monotonic() - self._checked_at >= (
+            CACHE_VERSION_CHECK_INTERVAL
+        ):
+            self.refresh()
+        return self._versions.get(name, 0)
+
+    def refresh(self):
+        with self._lock:
+            self._versions = dict(
+                CacheVersion.objects.using(DEFAULT_DB_ALIAS).values_list(
+                    'name', 'version'
+                )
+            )
+            self._checked_at = time.monotonic()
+
+    def bump(self, *names):
+        """
+        Увеличивает версии после коммита текущей транзакции
+        (или сразу, если транзакции нет).
+        """
+        transaction.on_commit(lambda: self._bump(names))
+
+    def _bump(self, names):
+        for name in names:
+            updated = CacheVersion.objects.filter(name=name).update(
+                version=models.F('version') + 1
+            )
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        CacheVersion.objects.create(name=name, version=1)
+                except IntegrityError:
+                    self._bump([name])
+        self._checked_at = float('-inf')
+
+
+cache_versions = CacheVersions()
+
+
+def acquire_cache_lock(key, timeout):
+    """
+    Захватывает блокировку пересчета key на timeout секунд, чтобы
+    значение пересчитывал только один воркер. Возвращает False, если
+    блокировка уже захвачена и не истекла. Запросы идут в основную базу
+    в обход роутера, чтобы чтение не закреплялось за ней.
+    """
+    now = timezone.now()
+    locks = CacheLock.objects.using(DEFAULT_DB_ALIAS)
+    locks.filter(key=key, expires_at__lt=now).delete()
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            locks.create(key=key, expires_at=now + timedelta(seconds=timeout))
+    except IntegrityError:
+        return False
+    return True
+
+
+def release_cache_lock(key):
+    CacheLock.objects.using(DEFAULT_DB_ALIAS).filter(key=key).delete()
+
+
+class TagSlugCache:
+    """
+    Соответствие слагов тегов их id, хранящееся в памяти процесса.
+    Перезагружается при изменении версии тегов.
+    """
+
+    def __init__(self):
+        self._slug_to_id = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get_map(self):
+        version = cache_versions.get(CacheVersion.TAGS)
+        slug_to_id = self._slug_to_id
+        if slug_to_id is not None and self._version == version:
+            return slug_to_id
+        with self._lock:
+            if self._slug_to_id is not None and self._version == version:
+                return self._slug_to_id
+            self._slug_to_id = dict(
+                Tag.objects.using(DEFAULT_DB_ALIAS).values_list('slug', 'id')
+            )
+            self._version = version
+            return self._slug_to_id
+
+    def get_ids(self, slugs):
+        """Возвращает id известных тегов, неизвестные слаги пропускаются."""
+        slug_to_id = self.get_map()
+        return [slug_to_id[slug] for slug in slugs if slug in slug_to_id]
+
+
+tag_slug_cache = TagSlugCache()
@@ -0,0 +1,32 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import CustomUser, Recipe
+from users.models import Follow
+
+
+def count_subquery(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        0,
+    )
+
+
+def recount_user_counters(queryset=None):
+    """
+    Пересчитывает денормализованные счетчики рецептов, подписчиков и
+    подписок одним UPDATE. Возвращает число обновленных пользователей.
+    """
+    if queryset is None:
+        queryset = CustomUser.objects.all()
+    return queryset.update(
+        recipes_count=count_subquery(Recipe.objects.all(), 'author'),
+        followers_count=count_subquery(Follow.objects.all(), 'author'),
+        following_count=count_subquery(Follow.objects.all(), 'user'),
+    )
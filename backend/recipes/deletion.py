@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core.deletion import raw_delete
+from recipes.caches import cache_versions
+from recipes.models import CacheVersion, CustomUser, Recipe, Tombstone
+from users.models import Follow
+
+
+def soft_delete_recipes(queryset, now):
+    """
+    Помечает рецепты удаленными и сразу создает для них записи
+    Tombstone: клиенты /api/sync/ узнают об удалении, не дожидаясь
+    purge_deleted.
+    """
+    pks = list(queryset.values_list('pk', flat=True))
+    Tombstone.objects.bulk_create(
+        Tombstone(model_name=Tombstone.RECIPE, object_id=pk) for pk in pks
+    )
+    return Recipe.all_objects.filter(pk__in=pks).update(deleted_at=now)
+
+
+def mark_recipes_deleted(queryset):
+    """
+    Помечает рецепты удаленными: они сразу пропадают из Recipe.objects
+    и попадают в удаленные в /api/sync/, а строки и зависимые записи
+    удаляет команда purge_deleted. Счетчики рецептов авторов
+    уменьшаются сразу.
+    """
+    with transaction.atomic():
+        by_author = (
+            queryset.order_by()
+            .values('author')
+            .annotate(count=Count('pk'))
+            .values_list('author', 'count')
+        )
+        for author_id, count in by_author:
+            CustomUser.adjust_counter([author_id], 'recipes_count', -count)
+        cache_versions.bump(CacheVersion.RECIPES)
+        return soft_delete_recipes(queryset, timezone.now())
+
+
+def mark_user_deleted(user):
+    """
+    Помечает пользователя и его рецепты удаленными, отзывает токены
+    и сразу удаляет его подписки без сигналов, поправив счетчики
+    подписчиков и подписок других пользователей.
+    Email и username заменяются, чтобы их можно было сразу занять
+    повторно: строка остается в базе до запуска purge_deleted.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        CustomUser.all_objects.filter(pk=user.pk).update(
+            deleted_at=now,
+            is_active=False,
+            email=f'deleted-{user.pk}@deleted.invalid',
+            username=f'deleted-{user.pk}',
+        )
+        soft_delete_recipes(Recipe.objects.filter(author=user), now)
+        Token.objects.filter(user=user).delete()
+        CustomUser.adjust_counter(
+            CustomUser.all_objects.filter(following__user=user).values('pk'),
+            'followers_count',
+            -1,
+        )
+        CustomUser.adjust_counter(
+            CustomUser.all_objects.filter(follower__author=user).values('pk'),
+            'following_count',
+            -1,
+        )
+        raw_delete(Follow.objects.filter(Q(user=user) | Q(author=user)))
+        cache_versions.bump(
+            CacheVersion.USERS, CacheVersion.RECIPES, CacheVersion.FOLLOWS
+        )
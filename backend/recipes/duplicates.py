@@ -0,0 +1,281 @@
+import heapq
+from collections import defaultdict, deque
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.constants import (
+    DUPLICATE_BUCKET_LIMIT,
+    DUPLICATE_SIMILARITY_THRESHOLD,
+    MINHASH_BANDS,
+    MINHASH_PERMUTATIONS,
+    NAME_SHINGLE_SIZE,
+)
+from core.minhash import MinHasher, shingles
+from recipes.models import (
+    Recipe,
+    RecipeIngredient,
+    RecipeSignature,
+    RecipeSignatureBucket,
+)
+
+hasher = MinHasher(MINHASH_PERMUTATIONS, MINHASH_BANDS)
+# Корзины пустой сигнатуры: их могли сохранить до того, как рецепты
+# без признаков перестали попадать в корзины.
+EMPTY_BUCKETS = frozenset(hasher.band_buckets(hasher.signature(())))
+
+
+def recipe_features(name, ingredient_ids):
+    """Множество признаков рецепта: ингредиенты и n-граммы названия."""
+    features = {f'ingredient:{pk}' for pk in ingredient_ids}
+    features.update(
+        f'name:{shingle}' for shingle in shingles(name, NAME_SHINGLE_SIZE)
+    )
+    return features
+
+
+def recipe_signature(name, ingredient_ids):
+    """
+    Сигнатура рецепта и ее корзины LSH. У рецепта без признаков корзин
+    нет: сигнатуры всех таких рецептов одинаковы, и они собрались бы
+    в одних огромных корзинах.
+    """
+    features = recipe_features(name, ingredient_ids)
+    signature = hasher.signature(features)
+    return signature, hasher.band_buckets(signature) if features else []
+
+
+def latest_before(recipe_ids, recipe_id):
+    """Не больше DUPLICATE_BUCKET_LIMIT ближайших более ранних id."""
+    return heapq.nlargest(
+        DUPLICATE_BUCKET_LIMIT, (pk for pk in recipe_ids if pk < recipe_id)
+    )
+
+
+def best_match(signature, candidates):
+    """
+    Самый похожий из кандидатов (recipe_id, упакованная сигнатура)
+    со сходством не ниже порога: (recipe_id, сходство) или (None, None).
+    """
+    best_id, best_similarity = None, None
+    for recipe_id, packed in candidates:
+        similarity = hasher.similarity(signature, hasher.unpack(packed))
+        if similarity >= DUPLICATE_SIMILARITY_THRESHOLD and (
+            best_similarity is None or similarity > best_similarity
+        ):
+            best_id, best_similarity = recipe_id, similarity
+    return best_id, best_similarity
+
+
+def find_similar(recipe_id, signature, buckets):
+    """
+    Ищет среди более ранних рецептов похожий на данный. Кандидаты
+    выбираются одним запросом по совпадающим корзинам LSH, поэтому
+    сравнивать сигнатуры со всеми рецептами не нужно. Сравниваются
+    не больше DUPLICATE_BUCKET_LIMIT самых поздних кандидатов на полосу.
+    """
+    if not buckets:
+        return None, None
+    condition = Q()
+    for band, bucket in buckets:
+        condition |= Q(band=band, bucket=bucket)
+    candidates = RecipeSignature.objects.filter(
+        recipe__in=RecipeSignatureBucket.objects.filter(condition).values(
+            'recipe'
+        ),
+        recipe__lt=recipe_id,
+        recipe__deleted_at__isnull=True,
+    ).order_by('-recipe_id').values_list('recipe_id', 'signature')
+    return best_match(
+        signature, sorted(candidates[: DUPLICATE_BUCKET_LIMIT * len(buckets)])
+    )
+
+
+def update_recipe_signature(recipe, ingredient_ids):
+    """
+    Сохраняет сигнатуру созданного или измененного рецепта и отмечает
+    его возможным дубликатом ранее опубликованного. Возвращает id
+    похожего рецепта или None.
+    """
+    signature, buckets = recipe_signature(recipe.name, ingredient_ids)
+    duplicate_of, similarity = find_similar(recipe.pk, signature, buckets)
+    with transaction.atomic():
+        RecipeSignature.objects.update_or_create(
+            recipe=recipe,
+            defaults={
+                'signature': hasher.pack(signature),
+                'duplicate_of_id': duplicate_of,
+                'similarity': similarity,
+            },
+        )
+        RecipeSignatureBucket.objects.filter(recipe=recipe).delete()
+        RecipeSignatureBucket.objects.bulk_create(
+            RecipeSignatureBucket(recipe=recipe, band=band, bucket=bucket)
+            for band, bucket in buckets
+        )
+    return duplicate_of
+
+
+def create_signatures(recipes):
+    """
+    Сохраняет сигнатуры пачки новых рецептов [(id, название, id
+    ингредиентов)] и отмечает возможные дубликаты, как
+    update_recipe_signature. Кандидаты для всей пачки выбираются одним
+    запросом на полосу LSH; рецепты пачки сравниваются и между собой.
+    Возвращает число найденных дубликатов.
+    """
+    signatures, buckets = {}, {}
+    for pk, name, ingredient_ids in recipes:
+        signatures[pk], buckets[pk] = recipe_signature(name, ingredient_ids)
+    by_band = defaultdict(set)
+    for recipe_buckets in buckets.values():
+        for band, bucket in recipe_buckets:
+            by_band[band].add(bucket)
+    members = defaultdict(set)
+    for band, values in by_band.items():
+        for bucket, recipe_id in RecipeSignatureBucket.objects.filter(
+            band=band, bucket__in=values
+        ).values_list('bucket', 'recipe_id'):
+            members[band, bucket].add(recipe_id)
+    candidate_ids = set().union(*members.values()) - signatures.keys()
+    packed = dict(
+        RecipeSignature.objects.filter(
+            recipe__in=candidate_ids, recipe__deleted_at__isnull=True
+        ).values_list('recipe_id', 'signature')
+    )
+    packed.update((pk, hasher.pack(sig)) for pk, sig in signatures.items())
+
+    created = []
+    for pk in sorted(signatures):
+        candidates = set()
+        for band, bucket in buckets[pk]:
+            candidates.update(latest_before(members[band, bucket], pk))
+            members[band, bucket].add(pk)
+        duplicate_of, similarity = best_match(
+            signatures[pk],
+            (
+                (other, packed[other])
+                for other in sorted(candidates)
+                if other in packed
+            ),
+        )
+        created.append(
+            RecipeSignature(
+                recipe_id=pk,
+                signature=packed[pk],
+                duplicate_of_id=duplicate_of,
+                similarity=similarity,
+            )
+        )
+    with transaction.atomic():
+        RecipeSignature.objects.bulk_create(created)
+        RecipeSignatureBucket.objects.bulk_create(
+            RecipeSignatureBucket(recipe_id=pk, band=band, bucket=bucket)
+            for pk, recipe_buckets in buckets.items()
+            for band, bucket in recipe_buckets
+        )
+    return sum(signature.duplicate_of_id is not None for signature in created)
+
+
+def iter_recipe_batches(batch_size):
+    """Пачки рецептов [(id, название, id ингредиентов)] по возрастанию id."""
+    last_id = 0
+    while True:
+        recipes = list(
+            Recipe.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'name')[:batch_size]
+        )
+        if not recipes:
+            return
+        ingredients = {}
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__in=[pk for pk, _ in recipes]
+        ).values_list('recipe_id', 'ingredient_id'):
+            ingredients.setdefault(recipe_id, []).append(ingredient_id)
+        yield [
+            (pk, name, ingredients.get(pk, ())) for pk, name in recipes
+        ]
+        last_id = recipes[-1][0]
+
+
+def rebuild_signatures(batch_size):
+    """Пересчитывает сигнатуры и корзины всех рецептов, возвращает их число."""
+    RecipeSignatureBucket.objects.all().delete()
+    RecipeSignature.objects.all().delete()
+    total = 0
+    for batch in iter_recipe_batches(batch_size):
+        signatures, buckets = [], []
+        for pk, name, ingredient_ids in batch:
+            signature, recipe_buckets = recipe_signature(name, ingredient_ids)
+            signatures.append(
+                RecipeSignature(recipe_id=pk, signature=hasher.pack(signature))
+            )
+            buckets.extend(
+                RecipeSignatureBucket(recipe_id=pk, band=band, bucket=bucket)
+                for band, bucket in recipe_buckets
+            )
+        with transaction.atomic():
+            RecipeSignature.objects.bulk_create(signatures)
+            RecipeSignatureBucket.objects.bulk_create(buckets)
+        total += len(batch)
+    return total
+
+
+def collect_candidate_pairs():
+    """
+    Пары (более новый рецепт, множество более ранних) из корзин,
+    в которые попало больше одного рецепта. Корзины читаются одним
+    проходом в порядке индекса (band, bucket). В корзине рецепт
+    сравнивается только с DUPLICATE_BUCKET_LIMIT предыдущими, поэтому
+    число пар растет линейно, а не квадратично от размера корзины;
+    корзины пустой сигнатуры пропускаются.
+    """
+    members = RecipeSignatureBucket.objects.order_by(
+        'band', 'bucket', 'recipe_id'
+    ).values_list('band', 'bucket', 'recipe_id')
+    pairs = {}
+    current, previous = None, None
+    for band, bucket, recipe_id in members.iterator():
+        if (band, bucket) in EMPTY_BUCKETS:
+            continue
+        if (band, bucket) != current:
+            current = (band, bucket)
+            previous = deque(maxlen=DUPLICATE_BUCKET_LIMIT)
+        if previous:
+            pairs.setdefault(recipe_id, set()).update(previous)
+        previous.append(recipe_id)
+    return pairs
+
+
+def mark_duplicates(pairs, batch_size):
+    """Проверяет пары по сигнатурам и сохраняет найденные дубликаты."""
+    found = []
+    recipe_ids = sorted(pairs)
+    for start in range(0, len(recipe_ids), batch_size):
+        chunk = recipe_ids[start: start + batch_size]
+        needed = set(chunk).union(*(pairs[pk] for pk in chunk))
+        signatures = dict(
+            RecipeSignature.objects.filter(recipe_id__in=needed).values_list(
+                'recipe_id', 'signature'
+            )
+        )
+        updated = []
+        for pk in chunk:
+            duplicate_of, similarity = best_match(
+                hasher.unpack(signatures[pk]),
+                ((other, signatures[other]) for other in sorted(pairs[pk])),
+            )
+            if duplicate_of is not None:
+                updated.append(
+                    RecipeSignature(
+                        recipe_id=pk,
+                        duplicate_of_id=duplicate_of,
+                        similarity=similarity,
+                    )
+                )
+                found.append((pk, duplicate_of, similarity))
+        RecipeSignature.objects.bulk_update(
+            updated, ['duplicate_of', 'similarity']
+        )
+    return found
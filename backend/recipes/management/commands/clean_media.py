@@ -0,0 +1,129 @@
+import os
+import time
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+
+from core.storage import ContentHashStorage
+
+
+class Command(BaseCommand):
+    help = 'Delete media files that are no longer referenced by any model'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of files checked against the database at once',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Skip files modified less than N seconds ago',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report files that would be deleted',
+        )
+
+    def get_file_fields(self):
+        """Поля FileField всех моделей, сгруппированные по каталогу."""
+        fields = {}
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if isinstance(field, models.FileField) and isinstance(
+                    field.upload_to, str
+                ):
+                    directory = field.upload_to.strip('/')
+                    fields.setdefault(directory, []).append((model, field))
+        return fields
+
+    def iter_files(self, directory, skip):
+        """
+        Обходит каталог рекурсивно, не собирая список файлов в памяти.
+        Вложенные каталоги других полей из skip не обходятся.
+        """
+        root = default_storage.path(directory)
+        if not os.path.isdir(root):
+            return
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path not in skip:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+
+    def iter_batches(self, entries, batch_size):
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def get_referenced(self, fields, names):
+        referenced = set()
+        for model, field in fields:
+            referenced.update(
+                model._base_manager.filter(
+                    **{f'{field.name}__in': names}
+                ).values_list(field.name, flat=True)
+            )
+        return referenced
+
+    def handle(self, *args, **options):
+        media_root = default_storage.path('')
+        threshold = time.time() - options['min_age']
+        checked = deleted = freed = 0
+
+        file_fields = self.get_file_fields()
+        roots = {default_storage.path(directory) for directory in file_fields}
+
+        for directory, fields in file_fields.items():
+            entries = (
+                entry
+                for entry in self.iter_files(directory, roots)
+                if entry.stat().st_mtime < threshold
+            )
+            for batch in self.iter_batches(entries, options['batch_size']):
+                names = {
+                    os.path.relpath(entry.path, media_root).replace(
+                        os.sep, '/'
+                    ): entry
+                    for entry in batch
+                }
+                referenced = self.get_referenced(fields, list(names))
+                checked += len(names)
+                for name, entry in names.items():
+                    if name in referenced:
+                        continue
+                    size = entry.stat().st_size
+                    if options['dry_run']:
+                        self.stdout.write(f'Would delete {name}')
+                    elif isinstance(default_storage, ContentHashStorage):
+                        # Файл могли загрузить повторно после проверки
+                        # ссылок: такой файл не удаляется.
+                        if not default_storage.purge(name, threshold):
+                            continue
+                    else:
+                        default_storage.delete(name)
+                    deleted += 1
+                    freed += size
+
+        action = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Checked {checked} files. {action} {deleted} files, '
+                f'{freed / 2**20:.1f} MB.'
+            )
+        )
@@ -0,0 +1,85 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Export recipes to a JSON Lines file, one recipe per line'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Output file, "-" to write to standard output'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of recipes read from the database at once',
+        )
+
+    def iter_batches(self, batch_size):
+        """Рецепты пачками по возрастанию id без OFFSET."""
+        queryset = (
+            Recipe.objects.order_by('pk')
+            .select_related('author')
+            .prefetch_related('tags', 'recipe_ingredients__ingredient')
+        )
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].pk
+
+    def to_record(self, recipe):
+        return {
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'pub_date': recipe.pub_date.isoformat(),
+            'author': recipe.author.email,
+            'tags': [tag.slug for tag in recipe.tags.all()],
+            'ingredients': [
+                {
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in recipe.recipe_ingredients.all()
+            ],
+            'image': recipe.image.name or None,
+        }
+
+    def handle(self, *args, **options):
+        path = options['path']
+        output = (
+            sys.stdout
+            if path == '-'
+            else open(path, 'w', encoding='utf-8')
+        )
+        started = time.perf_counter()
+        total = 0
+        try:
+            for batch in self.iter_batches(options['batch_size']):
+                output.writelines(
+                    json.dumps(self.to_record(recipe), ensure_ascii=False)
+                    + '\n'
+                    for recipe in batch
+                )
+                total += len(batch)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        self.stderr.write(
+            self.style.SUCCESS(
+                f'Exported {total} recipes in {elapsed:.2f} s '
+                f'({rate:.0f} recipes/s)'
+            )
+        )
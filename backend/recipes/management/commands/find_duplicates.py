@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.duplicates import (
+    collect_candidate_pairs,
+    mark_duplicates,
+    rebuild_signatures,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute MinHash signatures of all recipes and mark near-duplicates '
+        'found through LSH buckets'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of recipes processed at once',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+        total = rebuild_signatures(batch_size)
+        hashed = time.perf_counter()
+        pairs = collect_candidate_pairs()
+        candidates = sum(len(others) for others in pairs.values())
+        found = mark_duplicates(pairs, batch_size)
+        finished = time.perf_counter()
+
+        if options['verbosity'] > 1:
+            for recipe_id, duplicate_of, similarity in found:
+                self.stdout.write(
+                    f'{recipe_id} ~ {duplicate_of}: {similarity:.2f}'
+                )
+        rate = total / (hashed - started) if hashed > started else 0
+        self.stdout.write(
+            f'Signatures: {total} recipes in {hashed - started:.2f} s '
+            f'({rate:.0f} recipes/s)'
+        )
+        self.stdout.write(
+            f'Candidate pairs: {candidates}, checked in '
+            f'{finished - hashed:.2f} s'
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Marked {len(found)} possible duplicates')
+        )
@@ -0,0 +1,312 @@
+import hashlib
+import json
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from core.constants import MAX_LENGTH_IMPORT_CHECKPOINT
+from recipes.caches import cache_versions
+from recipes.counters import recount_user_counters
+from recipes.duplicates import create_signatures
+from recipes.models import (
+    CacheVersion,
+    CustomUser,
+    ImportCheckpoint,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+)
+
+INGREDIENT_KEYS = {'name', 'measurement_unit', 'amount'}
+RECIPE_FIELDS = ('name', 'text', 'cooking_time')
+
+
+class Command(BaseCommand):
+    help = (
+        'Import recipes from a JSON Lines file created by export_recipes, '
+        'resuming from a checkpoint after a failure'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON Lines file with recipes')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of recipes inserted in one transaction',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint name, defaults to the absolute path of the file',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore an existing checkpoint and start from the beginning',
+        )
+
+    def get_checkpoint_name(self, options):
+        name = options['checkpoint'] or os.path.abspath(options['path'])
+        if len(name) > MAX_LENGTH_IMPORT_CHECKPOINT:
+            name = hashlib.sha1(name.encode()).hexdigest()
+        return name
+
+    def read_checkpoint(self):
+        checkpoint = ImportCheckpoint.objects.filter(
+            name=self.checkpoint
+        ).first()
+        return checkpoint.line_number if checkpoint is not None else 0
+
+    def load_maps(self):
+        """Справочники для сопоставления записей без запросов на рецепт."""
+        self.authors = dict(CustomUser.objects.values_list('email', 'id'))
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, unit): pk
+            for pk, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        }
+
+    def iter_batches(self, file, skip, batch_size):
+        """Пачки (номер строки, запись), начиная после строки skip."""
+        batch = []
+        for line_number, line in enumerate(file, 1):
+            if line_number <= skip or not line.strip():
+                continue
+            try:
+                batch.append((line_number, json.loads(line)))
+            except ValueError:
+                self.errors += 1
+                self.stderr.write(f'Line {line_number}: invalid JSON')
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def skip(self, line_number, reason):
+        self.errors += 1
+        self.stderr.write(f'Line {line_number}: {reason}')
+
+    def clean_value(self, model, name, value):
+        """Значение, проверенное полем модели и его валидаторами."""
+        return model._meta.get_field(name).clean(value, None)
+
+    def clean_ingredients(self, items):
+        """Проверяет ингредиенты записи, возвращает их с числом amount."""
+        cleaned = []
+        seen = set()
+        for item in items:
+            if not (isinstance(item, dict) and INGREDIENT_KEYS <= item.keys()):
+                raise ValidationError('incomplete ingredient')
+            key = (item['name'], item['measurement_unit'])
+            if key in seen:
+                raise ValidationError(f'duplicate ingredient {item["name"]}')
+            seen.add(key)
+            try:
+                amount = self.clean_value(
+                    RecipeIngredient, 'amount', item['amount']
+                )
+            except ValidationError as error:
+                raise ValidationError(
+                    f'invalid amount of {item["name"]}: '
+                    f'{" ".join(error.messages)}'
+                )
+            cleaned.append({**item, 'amount': amount})
+        return cleaned
+
+    def build_recipe(self, line_number, record):
+        """Рецепт из записи или None, если запись нельзя загрузить."""
+        if not isinstance(record, dict):
+            self.skip(line_number, 'record is not an object')
+            return None
+        author_id = self.authors.get(record.get('author'))
+        if author_id is None:
+            self.skip(line_number, f'unknown author {record.get("author")}')
+            return None
+        try:
+            record['ingredients'] = self.clean_ingredients(
+                record.get('ingredients', ())
+            )
+        except ValidationError as error:
+            self.skip(line_number, ' '.join(error.messages))
+            return None
+        fields = {}
+        for name in RECIPE_FIELDS:
+            if name not in record:
+                self.skip(line_number, f'missing field {name!r}')
+                return None
+            try:
+                fields[name] = self.clean_value(Recipe, name, record[name])
+            except ValidationError as error:
+                self.skip(
+                    line_number, f'invalid {name}: {" ".join(error.messages)}'
+                )
+                return None
+        return Recipe(
+            author_id=author_id, image=record.get('image') or None, **fields
+        )
+
+    def create_missing_ingredients(self, records):
+        """Добавляет в справочник ингредиенты, которых еще нет в базе."""
+        missing = {
+            (item['name'], item['measurement_unit'])
+            for record in records
+            for item in record.get('ingredients', ())
+        } - self.ingredients.keys()
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in missing
+            ),
+            ignore_conflicts=True,
+        )
+        cache_versions.bump(CacheVersion.INGREDIENTS)
+        self.ingredients.update(
+            ((name, unit), pk)
+            for pk, name, unit in Ingredient.objects.filter(
+                name__in={name for name, _ in missing}
+            ).values_list('id', 'name', 'measurement_unit')
+        )
+
+    def prepare_batch(self, batch):
+        """Пары (рецепт, запись) для записей, которые можно загрузить."""
+        prepared = []
+        for line_number, record in batch:
+            recipe = self.build_recipe(line_number, record)
+            if recipe is not None:
+                prepared.append((line_number, recipe, record))
+        self.create_missing_ingredients(record for _, _, record in prepared)
+        result = []
+        for line_number, recipe, record in prepared:
+            unknown = [
+                item['name']
+                for item in record.get('ingredients', ())
+                if (item['name'], item['measurement_unit'])
+                not in self.ingredients
+            ]
+            if unknown:
+                self.skip(
+                    line_number, f'conflicting ingredients {unknown}'
+                )
+            else:
+                result.append((recipe, record))
+        return result
+
+    def insert_recipes(self, recipes):
+        """
+        Вставляет рецепты пачкой, если СУБД возвращает id вставленных
+        строк (PostgreSQL), иначе по одному.
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            for recipe in recipes:
+                recipe.save()
+
+    def import_batch(self, batch):
+        """
+        Загружает пачку в одной транзакции вместе с новыми ингредиентами
+        справочника, сигнатурами для поиска похожих рецептов, счетчиками
+        рецептов авторов и номером последней строки: после сбоя ничего
+        из этого не расходится с checkpoint.
+        """
+        with transaction.atomic():
+            prepared = self.prepare_batch(batch)
+            recipes = [recipe for recipe, _ in prepared]
+            self.insert_recipes(recipes)
+            cache_versions.bump(CacheVersion.RECIPES)
+            dated = []
+            for recipe, record in prepared:
+                pub_date = parse_datetime(record.get('pub_date') or '')
+                if pub_date is not None:
+                    recipe.pub_date = pub_date
+                    dated.append(recipe)
+            Recipe.objects.bulk_update(dated, ['pub_date'])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient_id=self.ingredients[
+                        (item['name'], item['measurement_unit'])
+                    ],
+                    amount=item['amount'],
+                )
+                for recipe, record in prepared
+                for item in record.get('ingredients', ())
+            )
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+                for recipe, record in prepared
+                for tag_id in {
+                    self.tags[slug]
+                    for slug in record.get('tags', ())
+                    if slug in self.tags
+                }
+            )
+            self.duplicates += create_signatures(
+                (
+                    recipe.pk,
+                    recipe.name,
+                    [
+                        self.ingredients[
+                            (item['name'], item['measurement_unit'])
+                        ]
+                        for item in record['ingredients']
+                    ],
+                )
+                for recipe, record in prepared
+            )
+            recount_user_counters(
+                CustomUser.objects.filter(
+                    pk__in={recipe.author_id for recipe in recipes}
+                )
+            )
+            ImportCheckpoint.objects.update_or_create(
+                name=self.checkpoint,
+                defaults={'line_number': batch[-1][0]},
+            )
+        return len(recipes)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File {path} does not exist')
+        self.checkpoint = self.get_checkpoint_name(options)
+        skip = 0 if options['restart'] else self.read_checkpoint()
+        if skip:
+            self.stdout.write(f'Resuming after line {skip}')
+
+        self.load_maps()
+        self.errors = 0
+        self.duplicates = 0
+        total = 0
+        started = time.perf_counter()
+        with open(path, encoding='utf-8') as file:
+            for batch in self.iter_batches(
+                file, skip, options['batch_size']
+            ):
+                total += self.import_batch(batch)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Imported {total} recipes ({total / elapsed:.0f}/s)'
+                )
+        ImportCheckpoint.objects.filter(name=self.checkpoint).delete()
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {total} recipes in {elapsed:.2f} s '
+                f'({rate:.0f} recipes/s), skipped {self.errors} records, '
+                f'possible duplicates: {self.duplicates}'
+            )
+        )
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.constants import SYNC_TOMBSTONE_RETENTION_DAYS
+from recipes.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete deletion records older than the sync retention period'
+
+    def handle(self, *args, **options):
+        deleted, _ = Tombstone.objects.filter(
+            deleted_at__lt=timezone.now()
+            - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS)
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} deletion records')
+        )
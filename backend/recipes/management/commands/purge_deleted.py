@@ -0,0 +1,110 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.deletion import BatchDeleter, purge_orphaned_files
+from recipes.models import CustomUser, Recipe, Tombstone
+from recipes.signals import TOMBSTONE_MODELS
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete recipes and users marked as deleted together with '
+        'dependent rows and orphaned media, in bounded batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of rows deleted by one statement',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Keep files modified less than N seconds ago',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running and repeat every N seconds',
+        )
+
+    def create_tombstones(self, model, pks):
+        """
+        Записи для синхронизации: сигнал post_delete не отправляется.
+        Рецепты получают их еще при пометке на удаление, поэтому
+        повторно записи не создаются.
+        """
+        model_name = TOMBSTONE_MODELS.get(model)
+        if model_name is None:
+            return
+        existing = set(
+            Tombstone.objects.filter(
+                model_name=model_name, object_id__in=pks
+            ).values_list('object_id', flat=True)
+        )
+        Tombstone.objects.bulk_create(
+            Tombstone(model_name=model_name, object_id=pk)
+            for pk in pks
+            if pk not in existing
+        )
+
+    def purge(self, model, queryset, batch_size, modified_before):
+        remaining = queryset.count()
+        if not remaining:
+            return
+        name = model._meta.verbose_name_plural
+        done = 0
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            deleter = BatchDeleter(batch_size, self.create_tombstones)
+            deleter.delete(model, pks)
+            files = purge_orphaned_files(deleter.files, modified_before)
+            done += len(pks)
+            for label, count in deleter.deleted.items():
+                self.deleted[label] = self.deleted.get(label, 0) + count
+            self.files += files
+            self.stdout.write(f'{name}: {done}/{remaining}, files: {files}')
+
+    def run(self, batch_size, min_age):
+        self.deleted = {}
+        self.files = 0
+        started = time.perf_counter()
+        # Как в clean_media: файл, загруженный повторно за последние
+        # min_age секунд, может быть нужен еще не сохраненной записи.
+        modified_before = time.time() - min_age
+        self.purge(
+            Recipe,
+            Recipe.all_objects.filter(deleted_at__isnull=False),
+            batch_size,
+            modified_before,
+        )
+        self.purge(
+            CustomUser,
+            CustomUser.all_objects.filter(deleted_at__isnull=False),
+            batch_size,
+            modified_before,
+        )
+        if self.deleted:
+            summary = ', '.join(
+                f'{label}: {count}' for label, count in self.deleted.items()
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Deleted {summary}; files: {self.files} '
+                    f'in {time.perf_counter() - started:.2f} s'
+                )
+            )
+
+    def handle(self, *args, **options):
+        while True:
+            self.run(options['batch_size'], options['min_age'])
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
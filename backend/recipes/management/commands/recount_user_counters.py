@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import recount_user_counters
+
+
+class Command(BaseCommand):
+    help = 'Recalculate recipe, follower and following counters of users'
+
+    def handle(self, *args, **options):
+        updated = recount_user_counters()
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated counters of {updated} users')
+        )
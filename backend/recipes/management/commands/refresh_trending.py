@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.trending import refresh_trending_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply new favorite and shopping cart events to the time-decayed '
+        'trending scores of recipes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of recipes updated by one statement',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running and repeat every N seconds',
+        )
+
+    def run(self, batch_size):
+        started = time.perf_counter()
+        events, recipes = refresh_trending_scores(batch_size)
+        if events:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Applied {events} events to {recipes} recipes '
+                    f'in {time.perf_counter() - started:.2f} s'
+                )
+            )
+
+    def handle(self, *args, **options):
+        while True:
+            self.run(options['batch_size'])
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-19 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_auto_20241201_1622'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(choices=[('recipe', 'рецепт'), ('tag', 'тег'), ('ingredient', 'ингредиент')], max_length=16, verbose_name='модель')),
+                ('object_id', models.BigIntegerField(verbose_name='id объекта')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='дата удаления')),
+            ],
+            options={
+                'verbose_name': 'удаленный объект',
+                'verbose_name_plural': 'Удаленные объекты',
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='дата изменения'),
+        ),
+    ]
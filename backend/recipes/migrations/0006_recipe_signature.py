@@ -0,0 +1,46 @@
+# Generated by Django 3.2 on 2026-10-19 09:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_sync_updated_at_tombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSignatureBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='полоса')),
+                ('bucket', models.BigIntegerField(verbose_name='корзина')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_buckets', to='recipes.recipe', verbose_name='рецепт')),
+            ],
+            options={
+                'verbose_name': 'корзина сигнатуры',
+                'verbose_name_plural': 'Корзины сигнатур',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeSignature',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='recipes.recipe', verbose_name='рецепт')),
+                ('signature', models.BinaryField(verbose_name='сигнатура')),
+                ('similarity', models.FloatField(blank=True, null=True, verbose_name='сходство')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='дата вычисления')),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicate_signatures', to='recipes.recipe', verbose_name='возможный дубликат рецепта')),
+            ],
+            options={
+                'verbose_name': 'сигнатура рецепта',
+                'verbose_name_plural': 'Похожие рецепты',
+                'ordering': ['-similarity'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipesignaturebucket',
+            index=models.Index(fields=['band', 'bucket'], name='signature_band_bucket'),
+        ),
+    ]
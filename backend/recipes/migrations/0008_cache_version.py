@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-19 09:23
+
+from django.db import migrations, models
+
+CACHE_VERSION_NAMES = ('tags', 'ingredients', 'recipes', 'users', 'follows')
+
+
+def create_versions(apps, schema_editor):
+    CacheVersion = apps.get_model('recipes', 'CacheVersion')
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(name=name) for name in CACHE_VERSION_NAMES]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='название')),
+                ('version', models.BigIntegerField(default=0, verbose_name='версия')),
+            ],
+            options={
+                'verbose_name': 'версия кеша',
+                'verbose_name_plural': 'Версии кешей',
+            },
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
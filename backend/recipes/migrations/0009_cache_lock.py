@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-19 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_cache_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheLock',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='ключ')),
+                ('expires_at', models.DateTimeField(verbose_name='действует до')),
+            ],
+            options={
+                'verbose_name': 'блокировка кеша',
+                'verbose_name_plural': 'Блокировки кешей',
+            },
+        ),
+    ]
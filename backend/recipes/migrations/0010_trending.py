@@ -0,0 +1,52 @@
+# Generated by Django 3.2 on 2026-10-19 09:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_cache_lock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngagementEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('favorite', 'избранное'), ('shopping_cart', 'список покупок')], max_length=16, verbose_name='действие')),
+                ('weight', models.SmallIntegerField(verbose_name='вес')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='время')),
+            ],
+            options={
+                'verbose_name': 'событие рецепта',
+                'verbose_name_plural': 'События рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.DateTimeField(verbose_name='точка отсчета')),
+            ],
+            options={
+                'verbose_name': 'состояние популярности',
+                'verbose_name_plural': 'Состояние популярности',
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, verbose_name='популярность'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending'),
+        ),
+        migrations.AddField(
+            model_name='engagementevent',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='engagement_events', to='recipes.recipe', verbose_name='рецепт'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-19 09:43
+
+from django.db import migrations, models
+from django.utils import timezone
+
+TRENDING_STATE_PK = 1
+
+
+def create_trending_state(apps, schema_editor):
+    """Единственная запись точки отсчета с постоянным pk."""
+    TrendingState = apps.get_model('recipes', 'TrendingState')
+    state = TrendingState.objects.order_by('pk').first()
+    epoch = state.epoch if state is not None else timezone.now()
+    TrendingState.objects.exclude(pk=TRENDING_STATE_PK).delete()
+    TrendingState.objects.update_or_create(
+        pk=TRENDING_STATE_PK, defaults={'epoch': epoch}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True, verbose_name='дата добавления'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True, verbose_name='дата добавления'),
+        ),
+        migrations.AlterField(
+            model_name='engagementevent',
+            name='created_at',
+            field=models.DateTimeField(verbose_name='время добавления'),
+        ),
+        migrations.RunPython(
+            create_trending_state, migrations.RunPython.noop
+        ),
+    ]
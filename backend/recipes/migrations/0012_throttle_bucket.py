@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-19 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_engagement_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleBucket',
+            fields=[
+                ('key', models.CharField(max_length=128, primary_key=True, serialize=False, verbose_name='ключ')),
+                ('tokens', models.FloatField(verbose_name='токены')),
+                ('updated_at', models.FloatField(verbose_name='время пополнения')),
+                ('expires_at', models.FloatField(db_index=True, verbose_name='время полного пополнения')),
+            ],
+            options={
+                'verbose_name': 'корзина ограничения частоты',
+                'verbose_name_plural': 'Корзины ограничения частоты',
+            },
+        ),
+    ]
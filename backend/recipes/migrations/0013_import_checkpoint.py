@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-19 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_throttle_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='название')),
+                ('line_number', models.PositiveIntegerField(verbose_name='последняя строка')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='дата изменения')),
+            ],
+            options={
+                'verbose_name': 'точка продолжения импорта',
+                'verbose_name_plural': 'Точки продолжения импорта',
+            },
+        ),
+    ]
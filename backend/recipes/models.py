@@ -2,11 +2,17 @@ from django.contrib.auth import get_user_model
 from django.db import models
 
 from core.constants import (
+    MAX_LENGTH_CACHE_LOCK_KEY,
+    MAX_LENGTH_CACHE_VERSION_NAME,
+    MAX_LENGTH_ENGAGEMENT_KIND,
+    MAX_LENGTH_IMPORT_CHECKPOINT,
     MAX_LENGTH_INGREDIENT_NAME,
     MAX_LENGTH_MEASUREMENT_UNIT,
     MAX_LENGTH_RECIPE_NAME,
     MAX_LENGTH_TAG_NAME,
     MAX_LENGTH_TAG_SLUG,
+    MAX_LENGTH_THROTTLE_KEY,
+    MAX_LENGTH_TOMBSTONE_MODEL,
 )
 from core.validators import (
     max_amount_validator,
@@ -14,9 +20,61 @@ from core.validators import (
     min_amount_validator,
     min_cooking_time_validator,
 )
+from users.models import Follow
 
 CustomUser = get_user_model()
 
+USER_FLAGS = ('is_favorited', 'is_in_shopping_cart', 'author_is_subscribed')
+
+
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user, flags=None):
+        """
+        Добавляет признаки is_favorited, is_in_shopping_cart и
+        author_is_subscribed для текущего пользователя подзапросами
+        EXISTS, чтобы не проверять их отдельным запросом на каждый рецепт.
+        В flags можно передать только нужные признаки.
+        """
+        if user.is_anonymous:
+            expressions = {
+                name: models.Value(False, models.BooleanField())
+                for name in USER_FLAGS
+            }
+        else:
+            expressions = {
+                'is_favorited': models.Exists(
+                    Favorite.objects.filter(
+                        user=user, recipe=models.OuterRef('pk')
+                    )
+                ),
+                'is_in_shopping_cart': models.Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=models.OuterRef('pk')
+                    )
+                ),
+                'author_is_subscribed': models.Exists(
+                    Follow.objects.filter(
+                        user=user, author=models.OuterRef('author')
+                    )
+                ),
+            }
+        if flags is None:
+            flags = USER_FLAGS
+        return self.annotate(**{name: expressions[name] for name in flags})
+
+    def with_related(self):
+        """Загружает автора, теги и ингредиенты вместе с рецептами."""
+        return self.select_related('author').prefetch_related(
+            'tags', 'recipe_ingredients__ingredient'
+        )
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    """Рецепты, кроме помеченных на удаление."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
 class Tag(models.Model):
     name = models.CharField(
@@ -29,6 +87,9 @@ class Tag(models.Model):
         unique=True,
         verbose_name='уникальный слаг',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True, verbose_name='дата изменения'
+    )
 
     class Meta:
         verbose_name = 'тег'
@@ -50,6 +111,9 @@ class Ingredient(models.Model):
         max_length=MAX_LENGTH_MEASUREMENT_UNIT,
         verbose_name='единица измерения',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True, verbose_name='дата изменения'
+    )
 
     class Meta:
         default_related_name = 'ingredients'
@@ -94,16 +158,47 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True, verbose_name='дата изменения'
+    )
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, db_index=True, verbose_name='дата удаления'
+    )
+    trending_score = models.FloatField(
+        default=0, verbose_name='популярность'
+    )
+
+    objects = RecipeManager()
+    all_objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
         default_related_name = 'recipes'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-trending_score', '-id'], name='recipe_trending'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет рецепт, не трогая trending_score: его меняет только
+        recipes.trending.refresh_trending_scores(), и сохранение
+        загруженного ранее объекта не должно откатить его.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'trending_score'
+            ]
+        super().save(*args, **kwargs)
+
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
@@ -143,6 +238,11 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
         verbose_name='рецепт',
     )
+    # Пусто у записей, добавленных до учета популярности: они не входят
+    # в trending_score, и их удаление его не меняет.
+    created_at = models.DateTimeField(
+        auto_now_add=True, null=True, verbose_name='дата добавления'
+    )
 
     class Meta:
         verbose_name = 'избранное'
@@ -169,6 +269,11 @@ class ShoppingCart(models.Model):
         on_delete=models.CASCADE,
         verbose_name='рецепт',
     )
+    # Пусто у записей, добавленных до учета популярности: они не входят
+    # в trending_score, и их удаление его не меняет.
+    created_at = models.DateTimeField(
+        auto_now_add=True, null=True, verbose_name='дата добавления'
+    )
 
     class Meta:
         verbose_name = 'список покупок'
@@ -182,3 +287,252 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user.username} - {self.recipe.name}'
+
+
+class EngagementEvent(models.Model):
+    """
+    Добавление рецепта в избранное или список покупок (weight=1) или
+    удаление из них (weight=-1). У удаления created_at - время самого
+    добавления, поэтому оно вычитает ровно вклад добавления. События
+    учитываются в trending_score рецепта командой refresh_trending
+    и затем удаляются.
+    """
+
+    FAVORITE = 'favorite'
+    SHOPPING_CART = 'shopping_cart'
+    KIND_CHOICES = (
+        (FAVORITE, 'избранное'),
+        (SHOPPING_CART, 'список покупок'),
+    )
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='engagement_events',
+        verbose_name='рецепт',
+    )
+    kind = models.CharField(
+        max_length=MAX_LENGTH_ENGAGEMENT_KIND,
+        choices=KIND_CHOICES,
+        verbose_name='действие',
+    )
+    weight = models.SmallIntegerField(verbose_name='вес')
+    created_at = models.DateTimeField(verbose_name='время добавления')
+
+    class Meta:
+        verbose_name = 'событие рецепта'
+        verbose_name_plural = 'События рецептов'
+
+    def __str__(self):
+        return f'{self.kind} {self.weight:+d} {self.recipe_id}'
+
+
+class TrendingState(models.Model):
+    """
+    Точка отсчета trending_score (единственная запись с pk=1, см.
+    recipes.trending).
+    """
+
+    PK = 1
+
+    epoch = models.DateTimeField(verbose_name='точка отсчета')
+
+    class Meta:
+        verbose_name = 'состояние популярности'
+        verbose_name_plural = 'Состояние популярности'
+
+    def __str__(self):
+        return f'{self.epoch:%Y-%m-%d %H:%M}'
+
+
+class CacheVersion(models.Model):
+    """
+    Счетчик версии данных для сброса кешей в памяти воркеров.
+    Увеличивается после коммита изменений, см. recipes.caches.
+    """
+
+    TAGS = 'tags'
+    INGREDIENTS = 'ingredients'
+    RECIPES = 'recipes'
+    USERS = 'users'
+    FOLLOWS = 'follows'
+    NAMES = (TAGS, INGREDIENTS, RECIPES, USERS, FOLLOWS)
+
+    name = models.CharField(
+        max_length=MAX_LENGTH_CACHE_VERSION_NAME,
+        primary_key=True,
+        verbose_name='название',
+    )
+    version = models.BigIntegerField(default=0, verbose_name='версия')
+
+    class Meta:
+        verbose_name = 'версия кеша'
+        verbose_name_plural = 'Версии кешей'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
+
+
+class CacheLock(models.Model):
+    """
+    Короткая блокировка пересчета значения кеша одним воркером,
+    см. recipes.caches.acquire_cache_lock.
+    """
+
+    key = models.CharField(
+        max_length=MAX_LENGTH_CACHE_LOCK_KEY,
+        primary_key=True,
+        verbose_name='ключ',
+    )
+    expires_at = models.DateTimeField(verbose_name='действует до')
+
+    class Meta:
+        verbose_name = 'блокировка кеша'
+        verbose_name_plural = 'Блокировки кешей'
+
+    def __str__(self):
+        return self.key
+
+
+class ThrottleBucket(models.Model):
+    """
+    Общая для воркеров корзина токенов ограничения частоты запросов,
+    см. api.throttling.TokenBucketThrottle. Время хранится в секундах
+    Unix.
+    """
+
+    key = models.CharField(
+        max_length=MAX_LENGTH_THROTTLE_KEY,
+        primary_key=True,
+        verbose_name='ключ',
+    )
+    tokens = models.FloatField(verbose_name='токены')
+    updated_at = models.FloatField(verbose_name='время пополнения')
+    expires_at = models.FloatField(
+        db_index=True, verbose_name='время полного пополнения'
+    )
+
+    class Meta:
+        verbose_name = 'корзина ограничения частоты'
+        verbose_name_plural = 'Корзины ограничения частоты'
+
+    def __str__(self):
+        return self.key
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Последняя загруженная строка файла import_recipes. Сохраняется
+    в транзакции пачки рецептов, поэтому после сбоя загрузка
+    продолжается ровно с первой незагруженной строки.
+    """
+
+    name = models.CharField(
+        max_length=MAX_LENGTH_IMPORT_CHECKPOINT,
+        primary_key=True,
+        verbose_name='название',
+    )
+    line_number = models.PositiveIntegerField(
+        verbose_name='последняя строка'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='дата изменения'
+    )
+
+    class Meta:
+        verbose_name = 'точка продолжения импорта'
+        verbose_name_plural = 'Точки продолжения импорта'
+
+    def __str__(self):
+        return f'{self.name}: {self.line_number}'
+
+
+class Tombstone(models.Model):
+    """Запись об удаленном объекте для синхронизации клиентов."""
+
+    RECIPE = 'recipe'
+    TAG = 'tag'
+    INGREDIENT = 'ingredient'
+    MODEL_CHOICES = (
+        (RECIPE, 'рецепт'),
+        (TAG, 'тег'),
+        (INGREDIENT, 'ингредиент'),
+    )
+
+    model_name = models.CharField(
+        max_length=MAX_LENGTH_TOMBSTONE_MODEL,
+        choices=MODEL_CHOICES,
+        verbose_name='модель',
+    )
+    object_id = models.BigIntegerField(verbose_name='id объекта')
+    deleted_at = models.DateTimeField(
+        auto_now_add=True, db_index=True, verbose_name='дата удаления'
+    )
+
+    class Meta:
+        verbose_name = 'удаленный объект'
+        verbose_name_plural = 'Удаленные объекты'
+        ordering = ['deleted_at']
+
+    def __str__(self):
+        return f'{self.model_name} {self.object_id}'
+
+
+class RecipeSignature(models.Model):
+    """MinHash-сигнатура рецепта для поиска похожих рецептов."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='рецепт',
+    )
+    signature = models.BinaryField(verbose_name='сигнатура')
+    duplicate_of = models.ForeignKey(
+        Recipe,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicate_signatures',
+        verbose_name='возможный дубликат рецепта',
+    )
+    similarity = models.FloatField(
+        null=True, blank=True, verbose_name='сходство'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='дата вычисления'
+    )
+
+    class Meta:
+        verbose_name = 'сигнатура рецепта'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ['-similarity']
+
+    def __str__(self):
+        return f'{self.recipe_id} ~ {self.duplicate_of_id}'
+
+
+class RecipeSignatureBucket(models.Model):
+    """Корзина LSH: рецепты с совпадающей полосой сигнатуры."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='signature_buckets',
+        verbose_name='рецепт',
+    )
+    band = models.PositiveSmallIntegerField(verbose_name='полоса')
+    bucket = models.BigIntegerField(verbose_name='корзина')
+
+    class Meta:
+        verbose_name = 'корзина сигнатуры'
+        verbose_name_plural = 'Корзины сигнатур'
+        indexes = [
+            models.Index(
+                fields=['band', 'bucket'], name='signature_band_bucket'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.band}/{self.bucket}'
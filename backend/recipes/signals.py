@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.caches import cache_versions
+from recipes.models import (
+    CacheVersion,
+    CustomUser,
+    EngagementEvent,
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+    Tombstone,
+)
+from users.models import Follow
+
+TOMBSTONE_MODELS = {
+    Recipe: Tombstone.RECIPE,
+    Tag: Tombstone.TAG,
+    Ingredient: Tombstone.INGREDIENT,
+}
+
+ENGAGEMENT_KINDS = {
+    Favorite: EngagementEvent.FAVORITE,
+    ShoppingCart: EngagementEvent.SHOPPING_CART,
+}
+
+CACHE_VERSION_MODELS = {
+    Recipe: CacheVersion.RECIPES,
+    RecipeIngredient: CacheVersion.RECIPES,
+    Tag: CacheVersion.TAGS,
+    Ingredient: CacheVersion.INGREDIENTS,
+    CustomUser: CacheVersion.USERS,
+    Follow: CacheVersion.FOLLOWS,
+}
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Ingredient)
+@receiver([post_save, post_delete], sender=CustomUser)
+@receiver([post_save, post_delete], sender=Follow)
+def bump_cache_version(sender, **kwargs):
+    """Сбрасывает кеши воркеров после коммита изменения."""
+    cache_versions.bump(CACHE_VERSION_MODELS[sender])
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def create_tombstone(sender, instance, **kwargs):
+    """Сохраняет id удаленного объекта для /api/sync/."""
+    Tombstone.objects.create(
+        model_name=TOMBSTONE_MODELS[sender], object_id=instance.pk
+    )
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+def bump_user_state_version(instance, **kwargs):
+    CustomUser.bump_state_version(instance.user_id)
+
+
+def record_engagement_event(instance, kind, weight):
+    """
+    Событие для trending_score, учтет его refresh_trending. Время
+    события - время добавления, поэтому удаление вычитает ровно вклад
+    добавления. Запись откладывается до коммита: при каскадном удалении
+    рецепта его избранное удаляется раньше самого рецепта.
+    """
+    recipe_id, created_at = instance.recipe_id, instance.created_at
+
+    def create():
+        if Recipe.all_objects.filter(pk=recipe_id).exists():
+            EngagementEvent.objects.create(
+                recipe_id=recipe_id,
+                kind=kind,
+                weight=weight,
+                created_at=created_at,
+            )
+
+    transaction.on_commit(create)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def record_engagement(sender, instance, created, **kwargs):
+    if created:
+        record_engagement_event(instance, ENGAGEMENT_KINDS[sender], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def record_disengagement(sender, instance, **kwargs):
+    """Записи без created_at не учитывались в trending_score."""
+    if instance.created_at is not None:
+        record_engagement_event(instance, ENGAGEMENT_KINDS[sender], -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        CustomUser.adjust_counter([instance.author_id], 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    """Рецепты, помеченные удаленными, уже вычтены из счетчика."""
+    if instance.deleted_at is None:
+        CustomUser.adjust_counter([instance.author_id], 'recipes_count', -1)
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from recipes.duplicates import (
+    EMPTY_BUCKETS,
+    collect_candidate_pairs,
+    mark_duplicates,
+    rebuild_signatures,
+    update_recipe_signature,
+)
+from recipes.models import Recipe, RecipeSignature, RecipeSignatureBucket
+from users.models import CustomUser
+
+
+class DuplicateCandidateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(
+            email='author@example.org',
+            username='author',
+            password='password',
+            first_name='Автор',
+            last_name='Автор',
+        )
+
+    def create_recipes(self, name, count):
+        return [
+            Recipe.objects.create(
+                author=self.author, name=name, text='Сварить', cooking_time=5
+            )
+            for _ in range(count)
+        ]
+
+    def test_recipes_without_features_have_no_buckets(self):
+        empty = self.create_recipes('', 3)
+        self.create_recipes('Суп', 2)
+        self.assertEqual(rebuild_signatures(100), 5)
+        self.assertFalse(
+            RecipeSignatureBucket.objects.filter(
+                recipe__in=[recipe.pk for recipe in empty]
+            ).exists()
+        )
+        for recipe in empty:
+            self.assertIsNone(update_recipe_signature(recipe, []))
+        self.assertEqual(len(collect_candidate_pairs()), 1)
+
+    def test_stored_empty_buckets_are_skipped(self):
+        recipes = self.create_recipes('', 3)
+        RecipeSignatureBucket.objects.bulk_create(
+            RecipeSignatureBucket(recipe=recipe, band=band, bucket=bucket)
+            for recipe in recipes
+            for band, bucket in EMPTY_BUCKETS
+        )
+        self.assertEqual(collect_candidate_pairs(), {})
+
+    @mock.patch('recipes.duplicates.DUPLICATE_BUCKET_LIMIT', 3)
+    def test_oversized_bucket_is_capped(self):
+        recipes = self.create_recipes('Гречневая каша', 20)
+        rebuild_signatures(100)
+        pairs = collect_candidate_pairs()
+        self.assertEqual(len(pairs), 19)
+        self.assertTrue(all(len(others) <= 3 for others in pairs.values()))
+        self.assertEqual(
+            pairs[recipes[-1].pk], {recipe.pk for recipe in recipes[-4:-1]}
+        )
+
+        found = mark_duplicates(pairs, 100)
+        self.assertEqual(len(found), 19)
+        self.assertEqual(
+            RecipeSignature.objects.filter(duplicate_of__isnull=False).count(),
+            19,
+        )
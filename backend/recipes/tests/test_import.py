@@ -0,0 +1,181 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.constants import MAX_COOKING_TIME
+from recipes.models import (
+    ImportCheckpoint,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeSignature,
+)
+from users.models import CustomUser
+
+AUTHOR = 'author@example.org'
+
+
+def make_record(name, cooking_time=10, ingredients=None):
+    return {
+        'author': AUTHOR,
+        'name': name,
+        'text': 'Приготовить',
+        'cooking_time': cooking_time,
+        'tags': [],
+        'ingredients': (
+            [
+                {'name': 'соль', 'measurement_unit': 'г', 'amount': 5},
+                {'name': 'вода', 'measurement_unit': 'мл', 'amount': 500},
+            ]
+            if ingredients is None
+            else ingredients
+        ),
+    }
+
+
+class ImportRecipesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        CustomUser.objects.create_user(
+            email=AUTHOR,
+            username='author',
+            password='password',
+            first_name='Автор',
+            last_name='Автор',
+        )
+
+    def write_file(self, records):
+        file = tempfile.NamedTemporaryFile(
+            'w', suffix='.jsonl', delete=False, encoding='utf-8'
+        )
+        with file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def run_import(self, path, **options):
+        stderr = StringIO()
+        call_command(
+            'import_recipes', path, stdout=StringIO(), stderr=stderr, **options
+        )
+        return stderr.getvalue()
+
+    def test_invalid_values_are_skipped(self):
+        path = self.write_file(
+            [
+                make_record('Суп'),
+                make_record('Долго', cooking_time=MAX_COOKING_TIME + 1),
+                make_record('Быстро', cooking_time=0),
+                make_record(
+                    'Без соли',
+                    ingredients=[
+                        {'name': 'соль', 'measurement_unit': 'г', 'amount': 0},
+                    ],
+                ),
+                make_record(
+                    'Дважды',
+                    ingredients=[
+                        {'name': 'соль', 'measurement_unit': 'г', 'amount': 1},
+                        {'name': 'соль', 'measurement_unit': 'г', 'amount': 2},
+                    ],
+                ),
+                make_record('Строка', cooking_time='десять'),
+                ['not', 'an', 'object'],
+            ]
+        )
+        errors = self.run_import(path)
+        self.assertEqual(
+            list(Recipe.objects.values_list('name', flat=True)), ['Суп']
+        )
+        for line_number in range(2, 8):
+            self.assertIn(f'Line {line_number}:', errors)
+        self.assertIn('invalid cooking_time', errors)
+        self.assertIn('invalid amount of соль', errors)
+        self.assertIn('duplicate ingredient соль', errors)
+
+    def test_resume_after_failure_imports_each_line_once(self):
+        path = self.write_file(
+            [make_record(f'Рецепт {number}') for number in range(5)]
+        )
+        original = RecipeIngredient.objects.bulk_create
+        calls = []
+
+        def fail_on_second_batch(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return original(*args, **kwargs)
+
+        with mock.patch.object(
+            RecipeIngredient.objects, 'bulk_create', fail_on_second_batch
+        ):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, batch_size=2)
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(
+            ImportCheckpoint.objects.get(
+                name=os.path.abspath(path)
+            ).line_number,
+            2,
+        )
+
+        self.run_import(path, batch_size=2)
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('name', flat=True)),
+            [f'Рецепт {number}' for number in range(5)],
+        )
+        self.assertEqual(RecipeIngredient.objects.count(), 10)
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_failed_batch_leaves_no_partial_state(self):
+        """
+        Новые ингредиенты и счетчики авторов откатываются вместе
+        с пачкой, поэтому повторный запуск загружает ее заново.
+        """
+        path = self.write_file([make_record('Суп')])
+        with mock.patch(
+            'recipes.management.commands.import_recipes.'
+            'recount_user_counters',
+            side_effect=RuntimeError('сбой'),
+        ):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Ingredient.objects.exists())
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+        self.run_import(path)
+        self.assertEqual(
+            CustomUser.objects.get(email=AUTHOR).recipes_count, 1
+        )
+        self.assertEqual(Ingredient.objects.count(), 2)
+
+    def get_duplicate_of(self, recipe):
+        return RecipeSignature.objects.get(recipe=recipe).duplicate_of
+
+    def test_signatures_mark_duplicates(self):
+        """Дубликаты ищутся и среди загруженных раньше, и внутри пачки."""
+        self.run_import(self.write_file([make_record('Суп')]))
+        self.run_import(
+            self.write_file(
+                [
+                    make_record('Суп'),
+                    make_record('Каша', ingredients=[]),
+                    make_record('Каша', ingredients=[]),
+                ]
+            )
+        )
+        soup, soup_copy, porridge, porridge_copy = Recipe.objects.order_by(
+            'pk'
+        )
+        self.assertEqual(RecipeSignature.objects.count(), 4)
+        self.assertIsNone(self.get_duplicate_of(soup))
+        self.assertEqual(self.get_duplicate_of(soup_copy), soup)
+        self.assertIsNone(self.get_duplicate_of(porridge))
+        self.assertEqual(self.get_duplicate_of(porridge_copy), porridge)
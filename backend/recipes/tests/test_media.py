@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from recipes.deletion import mark_recipes_deleted
+from recipes.models import Recipe
+from users.models import CustomUser
+
+IMAGE = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+
+
+class ContentHashStorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.long_ago = time.time() - 2 * 3600
+
+    def save(self, content=IMAGE):
+        return default_storage.save(
+            'recipes/images/photo.png', ContentFile(content)
+        )
+
+    def make_old(self, name):
+        os.utime(default_storage.path(name), (self.long_ago, self.long_ago))
+
+    def clean_media(self):
+        call_command('clean_media', stdout=StringIO())
+
+    def test_repeated_upload_refreshes_modification_time(self):
+        name = self.save()
+        self.make_old(name)
+        self.assertEqual(self.save(), name)
+        self.assertGreater(
+            os.stat(default_storage.path(name)).st_mtime, self.long_ago
+        )
+
+    def test_purge_keeps_file_uploaded_again(self):
+        name = self.save()
+        self.make_old(name)
+        threshold = time.time() - 3600
+        self.save()
+        self.assertFalse(default_storage.purge(name, threshold))
+        self.assertTrue(default_storage.exists(name))
+
+    def test_upload_after_purge_writes_file_again(self):
+        name = self.save()
+        self.make_old(name)
+        self.assertTrue(default_storage.purge(name, time.time() - 3600))
+        self.assertFalse(default_storage.exists(name))
+        self.assertEqual(self.save(), name)
+        with default_storage.open(name) as file:
+            self.assertEqual(file.read(), IMAGE)
+
+    def make_recipe(self, image):
+        author, _ = CustomUser.objects.get_or_create(
+            username='author',
+            defaults={
+                'email': 'author@example.org',
+                'first_name': 'Автор',
+                'last_name': 'Автор',
+            },
+        )
+        return Recipe.objects.create(
+            author=author,
+            name='Суп',
+            text='Сварить',
+            cooking_time=10,
+            image=image,
+        )
+
+    def test_purge_deleted_keeps_recently_uploaded_files(self):
+        old = self.save()
+        recent = self.save(IMAGE + b'recent')
+        self.make_old(old)
+        mark_recipes_deleted(
+            Recipe.objects.filter(
+                pk__in=[self.make_recipe(old).pk, self.make_recipe(recent).pk]
+            )
+        )
+
+        call_command('purge_deleted', stdout=StringIO())
+        self.assertFalse(Recipe.all_objects.exists())
+        self.assertFalse(default_storage.exists(old))
+        self.assertTrue(default_storage.exists(recent))
+
+    def test_clean_media_deletes_only_old_unreferenced_files(self):
+        used = self.save()
+        self.make_recipe(used)
+        unused = self.save(IMAGE + b'unused')
+        recent = self.save(IMAGE + b'recent')
+        self.make_old(used)
+        self.make_old(unused)
+
+        self.clean_media()
+        self.assertTrue(default_storage.exists(used))
+        self.assertFalse(default_storage.exists(unused))
+        self.assertTrue(default_storage.exists(recent))
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.models import (
+    EngagementEvent,
+    Favorite,
+    Recipe,
+    ShoppingCart,
+    TrendingState,
+)
+from recipes.trending import refresh_trending_scores
+from users.models import CustomUser
+
+
+class TrendingScoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(
+            email='author@example.org',
+            username='author',
+            password='password',
+            first_name='Автор',
+            last_name='Автор',
+        )
+        cls.user = CustomUser.objects.create_user(
+            email='user@example.org',
+            username='user',
+            password='password',
+            first_name='Пользователь',
+            last_name='Пользователь',
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Суп', text='Сварить', cooking_time=10
+        )
+        cls.other = Recipe.objects.create(
+            author=cls.author, name='Каша', text='Сварить', cooking_time=5
+        )
+
+    def score(self, recipe):
+        return Recipe.objects.get(pk=recipe.pk).trending_score
+
+    def favorite(self, recipe, at):
+        with mock.patch('django.utils.timezone.now', return_value=at):
+            with self.captureOnCommitCallbacks(execute=True):
+                return Favorite.objects.create(user=self.user, recipe=recipe)
+
+    def unfavorite(self, favorite):
+        with self.captureOnCommitCallbacks(execute=True):
+            favorite.delete()
+
+    def test_removal_cancels_add_made_long_ago(self):
+        """Удаление через сутки вычитает ровно вклад добавления."""
+        favorite = self.favorite(
+            self.recipe, timezone.now() - timedelta(hours=24)
+        )
+        refresh_trending_scores()
+        self.assertGreater(self.score(self.recipe), 0)
+
+        self.unfavorite(favorite)
+        refresh_trending_scores()
+        self.assertAlmostEqual(self.score(self.recipe), 0)
+        self.assertFalse(EngagementEvent.objects.exists())
+
+    def test_toggling_does_not_push_recipe_below_untouched(self):
+        now = timezone.now()
+        for hours in (48, 24, 1):
+            favorite = self.favorite(self.recipe, now - timedelta(hours=hours))
+            self.unfavorite(favorite)
+            refresh_trending_scores()
+        self.assertAlmostEqual(self.score(self.recipe), 0)
+        self.assertGreaterEqual(
+            self.score(self.recipe) + 1e-9, self.score(self.other)
+        )
+
+    def test_removal_cancels_add_after_rebase(self):
+        now = timezone.now()
+        TrendingState.objects.filter(pk=TrendingState.PK).update(
+            epoch=now - timedelta(days=400)
+        )
+        favorite = self.favorite(self.recipe, now)
+        refresh_trending_scores()
+
+        later = now + timedelta(days=100)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            refresh_trending_scores()
+            self.assertEqual(TrendingState.objects.get().epoch, later)
+            before = self.score(self.recipe)
+            self.assertGreater(before, 0)
+
+            self.unfavorite(favorite)
+            refresh_trending_scores()
+        self.assertLess(abs(self.score(self.recipe)), before * 1e-9)
+
+    def test_recent_engagement_ranks_higher(self):
+        now = timezone.now()
+        self.favorite(self.recipe, now - timedelta(hours=48))
+        self.favorite(self.other, now)
+        with self.captureOnCommitCallbacks(execute=True):
+            ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        refresh_trending_scores()
+        self.assertAlmostEqual(
+            self.score(self.recipe) / self.score(self.other), 0.75, 3
+        )
+
+    def test_rows_without_created_at_are_ignored(self):
+        """Записи, добавленные до учета популярности, не вычитаются."""
+        favorite = Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Favorite.objects.filter(pk=favorite.pk).update(created_at=None)
+        favorite.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            EngagementEvent.objects.all().delete()
+            favorite.delete()
+        self.assertFalse(EngagementEvent.objects.exists())
+
+    def test_single_state_row(self):
+        refresh_trending_scores()
+        refresh_trending_scores()
+        self.assertEqual(
+            list(TrendingState.objects.values_list('pk', flat=True)),
+            [TrendingState.PK],
+        )
+
+    def test_event_committed_late_is_kept(self):
+        """Событие с меньшим id, записанное во время пересчета, остается."""
+        events = [
+            EngagementEvent.objects.create(
+                recipe=recipe,
+                kind=EngagementEvent.FAVORITE,
+                weight=1,
+                created_at=timezone.now(),
+            )
+            for recipe in (self.recipe, self.other, self.recipe)
+        ]
+        late = events[1]
+        EngagementEvent.objects.filter(pk=late.pk).delete()
+        bulk_update = Recipe.all_objects.bulk_update
+
+        def commit_late_event(*args, **kwargs):
+            late.save(force_insert=True)
+            return bulk_update(*args, **kwargs)
+
+        with mock.patch.object(
+            Recipe.all_objects, 'bulk_update', side_effect=commit_late_event
+        ):
+            self.assertEqual(refresh_trending_scores(), (2, 1))
+        self.assertEqual(
+            list(EngagementEvent.objects.values_list('pk', flat=True)),
+            [late.pk],
+        )
+        self.assertEqual(self.score(self.other), 0)
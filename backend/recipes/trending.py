@@ -0,0 +1,104 @@
+import math
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.utils import timezone
+
+from core.constants import (
+    TRENDING_HALF_LIFE_HOURS,
+    TRENDING_MAX_EXPONENT,
+    TRENDING_WEIGHTS,
+)
+from core.deletion import raw_delete
+from recipes.models import EngagementEvent, Recipe, TrendingState
+
+# Скорость затухания в секунду: вклад события уменьшается вдвое
+# за TRENDING_HALF_LIFE_HOURS часов.
+DECAY_RATE = math.log(2) / (TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def get_state():
+    """
+    Запись точки отсчета, заблокированная до конца транзакции: запуски
+    refresh_trending выполняются по очереди.
+    """
+    state, _ = TrendingState.objects.select_for_update().get_or_create(
+        pk=TrendingState.PK, defaults={'epoch': timezone.now()}
+    )
+    return state
+
+
+def rebase(state, now):
+    """
+    Переносит точку отсчета на now, умножая все оценки на одинаковый
+    множитель: порядок рецептов не меняется, а степени в новых вкладах
+    снова становятся небольшими.
+    """
+    factor = math.exp(-DECAY_RATE * (now - state.epoch).total_seconds())
+    Recipe.all_objects.exclude(trending_score=0).update(
+        trending_score=models.F('trending_score') * factor
+    )
+    state.epoch = now
+    state.save(update_fields=['epoch'])
+
+
+def refresh_trending_scores(batch_size=1000):
+    """
+    Учитывает новые события в trending_score и удаляет их.
+
+    Оценка рецепта - сумма весов событий, затухающих экспоненциально
+    со временем. Вместо пересчета всех рецептов вклад события хранится
+    умноженным на exp(DECAY_RATE * (t - epoch)): у всех рецептов
+    оценки затухают одинаково, поэтому на порядок это не влияет,
+    и обновляются только рецепты с новыми событиями.
+    Возвращает (число событий, число рецептов).
+    """
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        state = get_state()
+        now = timezone.now()
+        if (
+            DECAY_RATE * (now - state.epoch).total_seconds()
+            > TRENDING_MAX_EXPONENT
+        ):
+            rebase(state, now)
+
+        # Удаляются только учтенные события: строка с меньшим id может
+        # быть зафиксирована уже после чтения, и удаление по диапазону
+        # id потеряло бы ее.
+        event_ids = []
+        increments = defaultdict(float)
+        for pk, recipe_id, kind, weight, created_at in (
+            EngagementEvent.objects.values_list(
+                'pk', 'recipe_id', 'kind', 'weight', 'created_at'
+            ).iterator(chunk_size=batch_size)
+        ):
+            increments[recipe_id] += (
+                weight
+                * TRENDING_WEIGHTS[kind]
+                * math.exp(
+                    DECAY_RATE * (created_at - state.epoch).total_seconds()
+                )
+            )
+            event_ids.append(pk)
+
+        recipe_ids = sorted(increments)
+        for start in range(0, len(recipe_ids), batch_size):
+            recipes = list(
+                Recipe.all_objects.filter(
+                    pk__in=recipe_ids[start: start + batch_size]
+                )
+                .select_for_update()
+                .only('pk', 'trending_score')
+            )
+            for recipe in recipes:
+                recipe.trending_score += increments[recipe.pk]
+            Recipe.all_objects.bulk_update(
+                recipes, ['trending_score'], batch_size=batch_size
+            )
+        for start in range(0, len(event_ids), batch_size):
+            raw_delete(
+                EngagementEvent.objects.filter(
+                    pk__in=event_ids[start: start + batch_size]
+                )
+            )
+    return len(event_ids), len(recipe_ids)
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from users.models import CustomUser, Follow
+from recipes.deletion import mark_user_deleted
+from users.models import CustomUser, Follow, FollowSuggestion
 
 
 @admin.register(CustomUser)
@@ -16,9 +17,24 @@ class UserAdmin(BaseUserAdmin):
     search_fields = ('email', 'username')
     list_filter = ('email', 'username')
 
+    def delete_model(self, request, obj):
+        mark_user_deleted(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            mark_user_deleted(user)
+
 
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'author')
     search_fields = ('user__username', 'author__username')
     list_filter = ('user', 'author')
+
+
+@admin.register(FollowSuggestion)
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'author', 'score', 'mutual_count')
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    readonly_fields = ('user', 'author', 'score', 'mutual_count')
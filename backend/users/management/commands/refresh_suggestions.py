@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.constants import SUGGESTIONS_BATCH_SIZE, SUGGESTIONS_PER_USER
+from users.suggestions import refresh_follow_suggestions, sparse
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute "who to follow" suggestions from the two-hop '
+        'follow graph'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=SUGGESTIONS_PER_USER,
+            help='Suggestions stored per user',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SUGGESTIONS_BATCH_SIZE,
+            help='Users computed and replaced in one transaction',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running and repeat every N seconds',
+        )
+
+    def run(self, limit, batch_size):
+        started = time.perf_counter()
+        total = refresh_follow_suggestions(limit, batch_size)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Stored {total} suggestions '
+                f'({"scipy" if sparse is not None else "pure Python"}) '
+                f'in {time.perf_counter() - started:.2f} s'
+            )
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.run(options['limit'], options['batch_size'])
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_auto_20241201_1622'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='state_version',
+            field=models.PositiveIntegerField(default=0, verbose_name='версия избранного, списка покупок и подписок'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='дата изменения'),
+        ),
+    ]
@@ -1,9 +1,24 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import connections, models, router, transaction
+from django.db.models.functions import Greatest
 
 from core.constants import MAX_LENGTH_EMAIL, MAX_LENGTH_USER_FIELD
 from core.validators import avatar_extension_validator, username_validator
 
+COUNTER_FIELDS = (
+    'state_version',
+    'recipes_count',
+    'followers_count',
+    'following_count',
+)
+
+
+class ActiveUserManager(UserManager):
+    """Пользователи, кроме помеченных на удаление."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
 class CustomUser(AbstractUser):
     email = models.EmailField(
@@ -30,6 +45,28 @@ class CustomUser(AbstractUser):
         blank=True,
         validators=[avatar_extension_validator],
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='дата изменения'
+    )
+    state_version = models.PositiveIntegerField(
+        default=0,
+        verbose_name='версия избранного, списка покупок и подписок',
+    )
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, db_index=True, verbose_name='дата удаления'
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0, verbose_name='число рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name='число подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0, verbose_name='число подписок'
+    )
+
+    objects = ActiveUserManager()
+    all_objects = UserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -42,6 +79,102 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет пользователя, не трогая state_version и счетчики: они
+        меняются только в bump_state_version() и adjust_counter(), и
+        сохранение загруженного ранее объекта не должно откатить их
+        к устаревшим значениям.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bump_state_version(cls, user_id):
+        """
+        Увеличивает версию избранного, списка покупок и подписок
+        пользователя. Версия входит в ETag ответов со списками рецептов.
+        """
+        cls.objects.filter(pk=user_id).update(
+            state_version=models.F('state_version') + 1
+        )
+
+    @classmethod
+    def adjust_counter(cls, user_ids, field, delta):
+        """
+        Изменяет денормализованный счетчик рецептов, подписчиков или
+        подписок на delta, не опуская его ниже нуля.
+        """
+        cls.all_objects.filter(pk__in=user_ids).update(
+            **{field: Greatest(models.F(field) + delta, 0)}
+        )
+
+
+class FollowQuerySet(models.QuerySet):
+    def update_counters(self, user, author_ids, delta):
+        """
+        Счетчики подписок и подписчиков и версия состояния подписчика:
+        при вставке без ORM сигнал post_save не отправляется.
+        """
+        CustomUser.all_objects.filter(pk=user.pk).update(
+            following_count=Greatest(
+                models.F('following_count') + delta * len(author_ids), 0
+            ),
+            state_version=models.F('state_version') + 1,
+        )
+        CustomUser.adjust_counter(author_ids, 'followers_count', delta)
+
+    def follow(self, user, author_ids):
+        """
+        Подписывает пользователя на авторов одним запросом
+        INSERT ... SELECT ... ON CONFLICT DO NOTHING и возвращает id
+        авторов, подписка на которых действительно создана.
+        Несуществующие и удаленные авторы, сам пользователь и уже
+        существующие подписки пропускаются.
+        """
+        author_ids = [pk for pk in author_ids if pk != user.pk]
+        if not author_ids:
+            return []
+        db = router.db_for_write(self.model)
+        quote = connections[db].ops.quote_name
+        users_table = CustomUser._meta
+        follow_table = self.model._meta
+        sql = (
+            'INSERT INTO {follow} ({user}, {author}) '
+            'SELECT %s, {id} FROM {users} '
+            'WHERE {id} IN ({ids}) AND {deleted_at} IS NULL '
+            'ON CONFLICT DO NOTHING RETURNING {author}'
+        ).format(
+            follow=quote(follow_table.db_table),
+            user=quote(follow_table.get_field('user').column),
+            author=quote(follow_table.get_field('author').column),
+            users=quote(users_table.db_table),
+            id=quote(users_table.pk.column),
+            deleted_at=quote(users_table.get_field('deleted_at').column),
+            ids=', '.join(['%s'] * len(author_ids)),
+        )
+        with transaction.atomic(using=db):
+            with connections[db].cursor() as cursor:
+                cursor.execute(sql, [user.pk, *author_ids])
+                created = [row[0] for row in cursor.fetchall()]
+            if created:
+                self.update_counters(user, created, 1)
+        return created
+
+    def unfollow(self, user, author_id):
+        """
+        Удаляет подписку, возвращает True, если она была. Удаление идет
+        через ORM: счетчики, версию состояния подписчика и версию кеша
+        обновляют обработчики post_delete.
+        """
+        deleted, _ = self.filter(user=user, author_id=author_id).delete()
+        return bool(deleted)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -57,6 +190,8 @@ class Follow(models.Model):
         verbose_name='автор',
     )
 
+    objects = FollowQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'подписка'
         verbose_name_plural = 'Подписки'
@@ -73,3 +208,45 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class FollowSuggestion(models.Model):
+    """
+    Автор, рекомендованный пользователю для подписки. Записи целиком
+    пересчитывает команда refresh_suggestions (см. users.suggestions).
+    """
+
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='пользователь',
+    )
+    author = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='suggested_to',
+        verbose_name='автор',
+    )
+    score = models.FloatField(verbose_name='оценка')
+    mutual_count = models.PositiveIntegerField(
+        verbose_name='число подписок пользователя, подписанных на автора'
+    )
+
+    class Meta:
+        verbose_name = 'рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow_suggestion'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score', 'author'],
+                name='follow_suggestion_rank',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.author} для {self.user}'
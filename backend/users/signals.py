@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import CustomUser, Follow
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def bump_follower_state_version(instance, **kwargs):
+    CustomUser.bump_state_version(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+def increment_follow_counters(instance, created, **kwargs):
+    if created:
+        CustomUser.adjust_counter([instance.user_id], 'following_count', 1)
+        CustomUser.adjust_counter([instance.author_id], 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_follow_counters(instance, **kwargs):
+    CustomUser.adjust_counter([instance.user_id], 'following_count', -1)
+    CustomUser.adjust_counter([instance.author_id], 'followers_count', -1)
@@ -0,0 +1,200 @@
+import heapq
+import math
+from array import array
+from collections import Counter, defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count
+
+from core.constants import SUGGESTIONS_BATCH_SIZE, SUGGESTIONS_PER_USER
+from core.deletion import raw_delete
+from recipes.models import Recipe
+from users.models import Follow, FollowSuggestion
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+
+def load_follow_graph():
+    """Подписки активных пользователей: массивы id подписчиков и авторов."""
+    users, authors = array('q'), array('q')
+    for user_id, author_id in (
+        Follow.objects.filter(
+            user__deleted_at__isnull=True, author__deleted_at__isnull=True
+        )
+        .values_list('user_id', 'author_id')
+        .iterator(chunk_size=10000)
+    ):
+        users.append(user_id)
+        authors.append(author_id)
+    return users, authors
+
+
+def get_author_weights():
+    """
+    Вес автора 1 + ln(1 + число добавлений его рецептов в избранное).
+    Авторы без рецептов не рекомендуются.
+    """
+    return {
+        author_id: 1 + math.log1p(favorites)
+        for author_id, favorites in (
+            Recipe.objects.filter(author__deleted_at__isnull=True)
+            .order_by()
+            .values('author')
+            .annotate(favorites=Count('favorites'))
+            .values_list('author', 'favorites')
+        )
+    }
+
+
+def iter_sparse_suggestions(users, authors, weights, limit, batch_size):
+    """
+    Рекомендации произведением разреженных матриц. Пользователи
+    нумеруются по возрастанию id, F - матрица подписок. Для пачки строк
+    B = F[i:j] число общих подписок - B @ F; из него убираются сам
+    пользователь и его подписки, остаток умножается на вес автора,
+    и в каждой строке остаются limit лучших авторов.
+    Выдает (наибольший id пачки, рекомендации пачки).
+    """
+    users = np.frombuffer(users, dtype=np.int64)
+    authors = np.frombuffer(authors, dtype=np.int64)
+    ids = np.unique(np.concatenate([users, authors]))
+    size = len(ids)
+    follows = sparse.csr_matrix(
+        (
+            np.ones(len(users), dtype=np.int32),
+            (np.searchsorted(ids, users), np.searchsorted(ids, authors)),
+        ),
+        shape=(size, size),
+    )
+    weighted_ids = np.fromiter(weights, dtype=np.int64, count=len(weights))
+    positions = np.searchsorted(ids, weighted_ids)
+    known = positions < size
+    known[known] = ids[positions[known]] == weighted_ids[known]
+    author_weights = np.zeros(size)
+    author_weights[positions[known]] = np.fromiter(
+        weights.values(), dtype=float, count=len(weights)
+    )[known]
+
+    for start in range(0, size, batch_size):
+        block = follows[start: start + batch_size]
+        rows = block.shape[0]
+        excluded = block + sparse.csr_matrix(
+            (
+                np.ones(rows, dtype=np.int32),
+                (np.arange(rows), np.arange(start, start + rows)),
+            ),
+            shape=(rows, size),
+        )
+        mutual = block @ follows
+        mutual = (mutual - mutual.multiply(excluded)).tocoo()
+        scores = mutual.data * author_weights[mutual.col]
+        keep = scores > 0
+        row, col = mutual.row[keep], mutual.col[keep]
+        counts, scores = mutual.data[keep], scores[keep]
+
+        order = np.lexsort((col, -scores, row))
+        row, col = row[order], col[order]
+        counts, scores = counts[order], scores[order]
+        rank = np.arange(len(row)) - np.searchsorted(row, row)
+        top = rank < limit
+        yield ids[start + rows - 1].item(), [
+            FollowSuggestion(
+                user_id=user_id,
+                author_id=author_id,
+                score=score,
+                mutual_count=count,
+            )
+            for user_id, author_id, score, count in zip(
+                ids[start + row[top]].tolist(),
+                ids[col[top]].tolist(),
+                scores[top].tolist(),
+                counts[top].tolist(),
+            )
+        ]
+
+
+def iter_python_suggestions(users, authors, weights, limit, batch_size):
+    """Тот же расчет без numpy и scipy, по словарю подписок."""
+    follows = defaultdict(set)
+    for user_id, author_id in zip(users, authors):
+        follows[user_id].add(author_id)
+    ids = sorted(set(users) | set(authors))
+
+    for start in range(0, len(ids), batch_size):
+        block = ids[start: start + batch_size]
+        suggestions = []
+        for user_id in block:
+            followed = follows.get(user_id, ())
+            mutual = Counter()
+            for followee in followed:
+                mutual.update(follows.get(followee, ()))
+            candidates = (
+                (count * weights[author_id], author_id, count)
+                for author_id, count in mutual.items()
+                if author_id in weights
+                and author_id != user_id
+                and author_id not in followed
+            )
+            suggestions.extend(
+                FollowSuggestion(
+                    user_id=user_id,
+                    author_id=author_id,
+                    score=score,
+                    mutual_count=count,
+                )
+                for score, author_id, count in heapq.nsmallest(
+                    limit,
+                    candidates,
+                    key=lambda candidate: (-candidate[0], candidate[1]),
+                )
+            )
+        yield block[-1], suggestions
+
+
+def delete_suggestions(lower, upper):
+    """Удаляет рекомендации пользователей с id в (lower, upper]."""
+    stale = FollowSuggestion.objects.all()
+    if lower is not None:
+        stale = stale.filter(user_id__gt=lower)
+    if upper is not None:
+        stale = stale.filter(user_id__lte=upper)
+    raw_delete(stale)
+
+
+def refresh_follow_suggestions(
+    limit=SUGGESTIONS_PER_USER, batch_size=SUGGESTIONS_BATCH_SIZE
+):
+    """
+    Пересчитывает рекомендации подписок: авторы, на которых подписаны
+    те, на кого подписан пользователь. Оценка - число таких подписок,
+    умноженное на вес автора (get_author_weights()); существующие
+    подписки и сам пользователь исключаются, сохраняются limit лучших.
+    Рекомендации заменяются пачками пользователей по диапазону id,
+    поэтому во время расчета API отдает прежние записи.
+    Возвращает число сохраненных рекомендаций.
+    """
+    users, authors = load_follow_graph()
+    weights = get_author_weights()
+    compute = (
+        iter_sparse_suggestions
+        if sparse is not None
+        else iter_python_suggestions
+    )
+    total = 0
+    lower = None
+    for upper, suggestions in compute(
+        users, authors, weights, limit, batch_size
+    ):
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            delete_suggestions(lower, upper)
+            FollowSuggestion.objects.bulk_create(
+                suggestions, batch_size=batch_size
+            )
+        total += len(suggestions)
+        lower = upper
+    delete_suggestions(lower, None)
+    return total
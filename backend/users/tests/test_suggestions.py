@@ -0,0 +1,104 @@
+import math
+import unittest
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite, Recipe
+from users import suggestions
+from users.models import CustomUser, Follow, FollowSuggestion
+
+
+class FollowSuggestionTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: CustomUser.objects.create_user(
+                email=f'{name}@example.org',
+                username=name,
+                password='password',
+                first_name=name.title(),
+                last_name=name.title(),
+            )
+            for name in ('reader', 'friend', 'colleague', 'chef', 'baker')
+        }
+        for user, author in (
+            ('reader', 'friend'),
+            ('reader', 'colleague'),
+            ('friend', 'chef'),
+            ('colleague', 'chef'),
+            ('colleague', 'baker'),
+            ('colleague', 'friend'),
+            ('chef', 'reader'),
+        ):
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+        for author in ('friend', 'chef', 'baker'):
+            Recipe.objects.create(
+                author=cls.users[author],
+                name='Суп',
+                text='Сварить',
+                cooking_time=10,
+            )
+        Favorite.objects.create(
+            user=cls.users['reader'],
+            recipe=Recipe.objects.get(author=cls.users['baker']),
+        )
+
+    def get_suggestions(self):
+        return {
+            (suggestion.user.username, suggestion.author.username): (
+                suggestion.score,
+                suggestion.mutual_count,
+            )
+            for suggestion in FollowSuggestion.objects.select_related(
+                'user', 'author'
+            )
+        }
+
+    def refresh(self):
+        call_command('refresh_suggestions', stdout=StringIO())
+        return self.get_suggestions()
+
+    def assertSuggestionsEqual(self, actual, expected):
+        self.assertEqual(actual.keys(), expected.keys())
+        for key, (score, mutual_count) in expected.items():
+            with self.subTest(key=key):
+                self.assertAlmostEqual(actual[key][0], score)
+                self.assertEqual(actual[key][1], mutual_count)
+
+    def test_pure_python_fallback(self):
+        """Без numpy и scipy расчет идет на чистом Python."""
+        with mock.patch.object(suggestions, 'sparse', None):
+            result = self.refresh()
+        self.assertSuggestionsEqual(
+            result,
+            {
+                ('reader', 'chef'): (2, 2),
+                ('reader', 'baker'): (1 + math.log(2), 1),
+                ('chef', 'friend'): (1, 1),
+            },
+        )
+
+    @unittest.skipIf(suggestions.sparse is None, 'scipy is not installed')
+    def test_sparse_matches_pure_python(self):
+        result = self.refresh()
+        with mock.patch.object(suggestions, 'sparse', None):
+            self.assertSuggestionsEqual(result, self.refresh())
+
+    def test_endpoint_skips_followed_authors(self):
+        self.refresh()
+        reader = self.users['reader']
+        self.client.force_authenticate(reader)
+        data = self.client.get('/api/users/suggestions/').json()
+        self.assertEqual(
+            [(author['username'], author['mutual_count']) for author in data],
+            [('chef', 2), ('baker', 1)],
+        )
+
+        Follow.objects.create(user=reader, author=self.users['chef'])
+        data = self.client.get('/api/users/suggestions/').json()
+        self.assertEqual([author['username'] for author in data], ['baker'])